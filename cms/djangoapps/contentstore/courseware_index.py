@@ -86,8 +86,8 @@ class SearchIndexerBase(object):
 
     @classmethod
     @abstractmethod
-    def _fetch_top_level(cls, modulestore, structure_key):
-        """ Fetch the item from the modulestore location """
+    def _fetch_top_level(cls, modulestore, structure_key, depth=None):
+        """ Fetch the item from the modulestore location, with `depth` levels of descendants """
 
     @classmethod
     @abstractmethod
@@ -128,7 +128,9 @@ class SearchIndexerBase(object):
             (within REINDEX_AGE above ^^) will have their index updated, others skip
             updating their index but are still walked through in order to identify
             which items may need to be removed from the index
-            If None, then a full reindex takes place
+            If None, then a full reindex takes place. Otherwise, if the indexer can tell
+            what changed since the structure was last indexed (see
+            _get_structure_changes), only the parts of it that changed are reindexed.
 
         Returns:
         Number of items that have been added to the index
@@ -248,17 +250,38 @@ class SearchIndexerBase(object):
 
         try:
             with modulestore.branch_setting(ModuleStoreEnum.RevisionOption.published_only):
-                structure = cls._fetch_top_level(modulestore, structure_key)
+                version, changes = cls._get_structure_changes(modulestore, searcher, structure_key)
+                subtrees, removed_items = None, None
+                if triggered_at is not None and changes is not None:
+                    # Only the subtrees containing changes are walked, so the
+                    # whole structure doesn't need loading.
+                    structure = cls._fetch_top_level(modulestore, structure_key, depth=0)
+                    subtrees, removed_items = cls._get_changed_subtrees(modulestore, structure.location, changes)
+
+                if subtrees is None:
+                    structure = cls._fetch_top_level(modulestore, structure_key)
+                    subtrees = structure.get_children()
+                else:
+                    subtrees = [modulestore.get_item(usage_key, depth=None) for usage_key in subtrees]
                 groups_usage_info = cls.fetch_group_usage(modulestore, structure)
 
                 # First perform any additional indexing from the structure object
                 cls.supplemental_index_information(modulestore, structure)
 
                 # Now index the content
-                for item in structure.get_children():
+                for item in subtrees:
                     prepare_item_index(item, groups_usage_info=groups_usage_info)
                 searcher.index(cls.DOCUMENT_TYPE, items_index)
-                cls.remove_deleted_items(searcher, structure_key, indexed_items)
+                if removed_items is None:
+                    cls.remove_deleted_items(searcher, structure_key, indexed_items)
+                else:
+                    # Removed items, and changed ones which are no longer indexable
+                    stale_items = removed_items - indexed_items
+                    if stale_items:
+                        searcher.remove(cls.DOCUMENT_TYPE, list(stale_items))
+
+                if version is not None and not error_list:
+                    cls._record_indexed_version(searcher, structure_key, version)
         except Exception as err:  # pylint: disable=broad-except
             # broad exception so that index operation does not prevent the rest of the application from working
             log.exception(
@@ -273,6 +296,75 @@ class SearchIndexerBase(object):
 
         return indexed_count["count"]
 
+    @classmethod
+    def _get_structure_changes(cls, modulestore, searcher, structure_key):  # pylint: disable=unused-argument
+        """
+        Find out what changed in the structure since it was last indexed.
+
+        Returns the current version of the structure (None if it isn't
+        versioned), and the usage keys of the blocks 'added', 'removed' and
+        'changed' since the version last indexed (None if unknown, in which case
+        the whole structure is reindexed). Base implementation knows of no
+        versions.
+        """
+        return None, None
+
+    @classmethod
+    def _record_indexed_version(cls, searcher, structure_key, version):
+        """
+        Remember that `version` of the structure has been indexed. Base
+        implementation performs no operation.
+        """
+        pass
+
+    @classmethod
+    def _get_changed_subtrees(cls, modulestore, root, changes):
+        """
+        Works out which parts of the structure, whose top-level block is `root`,
+        need reindexing for `changes` (see _get_structure_changes).
+
+        Whole top-level subtrees (e.g. chapters) are reindexed, since the index
+        entries of blocks depend on their ancestors (start dates, names in the
+        location path) and on their descendants (content groups).
+
+        Returns the usage keys of the top-level blocks to reindex, and the set of
+        index ids to remove unless they are reindexed; or (None, None) if the
+        whole structure needs reindexing because its top level changed.
+        """
+        top_levels = {}
+
+        def get_top_level(usage_key):
+            """
+            The top-level block containing usage_key (itself, if it's top-level),
+            or None if it's not in the structure.
+            """
+            path = []
+            while usage_key not in top_levels:
+                parent = modulestore.get_parent_location(usage_key)
+                if parent is None or parent == root:
+                    top_levels[usage_key] = usage_key if parent is not None else None
+                    break
+                path.append(usage_key)
+                usage_key = parent
+            for descendant in path:
+                top_levels[descendant] = top_levels[usage_key]
+            return top_levels[usage_key]
+
+        changed_items = changes['added'] + changes['changed']
+        if root in changed_items:
+            return None, None
+
+        subtrees = set()
+        for usage_key in changed_items:
+            top_level = get_top_level(usage_key)
+            if top_level is not None:
+                subtrees.add(top_level)
+
+        removed_items = set(
+            unicode(cls._id_modifier(usage_key)) for usage_key in changes['removed'] + changes['changed']
+        )
+        return sorted(subtrees), removed_items
+
     @classmethod
     def _do_reindex(cls, modulestore, structure_key):
         """
@@ -343,6 +435,8 @@ class CoursewareSearchIndexer(SearchIndexerBase):
     """
     INDEX_NAME = "courseware_index"
     DOCUMENT_TYPE = "courseware_content"
+    # Records the structure version last indexed for each course
+    VERSION_DOCUMENT_TYPE = "courseware_index_version"
     ENABLE_INDEXING_KEY = 'ENABLE_COURSEWARE_INDEX'
 
     INDEX_EVENT = {
@@ -358,15 +452,43 @@ class CoursewareSearchIndexer(SearchIndexerBase):
         return structure_key
 
     @classmethod
-    def _fetch_top_level(cls, modulestore, structure_key):
+    def _fetch_top_level(cls, modulestore, structure_key, depth=None):
         """ Fetch the item from the modulestore location """
-        return modulestore.get_course(structure_key, depth=None)
+        return modulestore.get_course(structure_key, depth=depth)
 
     @classmethod
     def _get_location_info(cls, normalized_structure_key):
         """ Builds location info dictionary """
         return {"course": unicode(normalized_structure_key), "org": normalized_structure_key.org}
 
+    @classmethod
+    def _get_structure_changes(cls, modulestore, searcher, structure_key):
+        """
+        Compare the published structure of the course with the version last
+        indexed, for courses whose structures are versioned (split courses).
+        """
+        response = searcher.search(
+            doc_type=cls.VERSION_DOCUMENT_TYPE,
+            field_dictionary={"id": unicode(structure_key)},
+        )
+        indexed_versions = [result["data"]["structure_version"] for result in response["results"]]
+        try:
+            return modulestore.get_structure_changes(structure_key, indexed_versions[0] if indexed_versions else None)
+        except NotImplementedError:
+            return None, None
+
+    @classmethod
+    def _record_indexed_version(cls, searcher, structure_key, version):
+        """
+        Store the version of the course's published structure that has been
+        indexed, next to its index entries. The document has no "course" field,
+        so that it isn't found by searches of the course's content.
+        """
+        searcher.index(cls.VERSION_DOCUMENT_TYPE, [{
+            "id": unicode(structure_key),
+            "structure_version": unicode(version),
+        }])
+
     @classmethod
     def do_course_reindex(cls, modulestore, course_key):
         """
@@ -446,9 +568,9 @@ class LibrarySearchIndexer(SearchIndexerBase):
         return normalize_key_for_search(structure_key)
 
     @classmethod
-    def _fetch_top_level(cls, modulestore, structure_key):
+    def _fetch_top_level(cls, modulestore, structure_key, depth=None):
         """ Fetch the item from the modulestore location """
-        return modulestore.get_library(structure_key, depth=None)
+        return modulestore.get_library(structure_key, depth=depth)
 
     @classmethod
     def _get_location_info(cls, normalized_structure_key):
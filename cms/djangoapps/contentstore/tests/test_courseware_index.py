@@ -450,6 +450,42 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
         indexed_count = self.reindex_course(store)
         self.assertEqual(indexed_count, 7)
 
+    def _test_index_changed_subtrees(self, store):
+        """ Make sure that indexing a split course's changes only walks the chapters which changed """
+        chapter2 = ItemFactory.create(
+            parent_location=self.course.location,
+            category='chapter',
+            display_name="Week 2",
+            modulestore=store,
+            publish_item=True,
+            start=datetime(2015, 3, 1, tzinfo=UTC),
+        )
+        ItemFactory.create(
+            parent_location=chapter2.location,
+            category='sequential',
+            display_name="Lesson 2",
+            modulestore=store,
+            publish_item=True,
+            start=datetime(2015, 3, 1, tzinfo=UTC),
+        )
+        self.publish_item(store, self.vertical.location)
+        indexed_count = self.reindex_course(store)
+        self.assertEqual(indexed_count, 6)
+
+        # republish the vertical without its html unit
+        self.delete_item(store, self.html_unit.location)
+        self.publish_item(store, self.vertical.location)
+
+        # Week 1 is reindexed in full, whatever the age of its items, while Week 2 is skipped
+        new_indexed_count = self.index_recent_changes(store, datetime(2015, 1, 1, tzinfo=UTC))
+        self.assertEqual(new_indexed_count, 3)
+        response = self.search()
+        self.assertEqual(response["total"], 5)
+        self.assertNotIn(
+            unicode(self.html_unit.location),
+            [result["data"]["id"] for result in response["results"]]
+        )
+
     def _test_course_about_property_index(self, store):
         """ Test that informational properties in the course object end up in the course_info index """
         display_name = "Help, I need somebody!"
@@ -578,6 +614,9 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
     def test_time_based_index(self, store_type):
         self._perform_test_using_store(store_type, self._test_time_based_index)
 
+    def test_index_changed_subtrees(self):
+        self._perform_test_using_store(ModuleStoreEnum.Type.split, self._test_index_changed_subtrees)
+
     @ddt.data(*WORKS_WITH_STORES)
     def test_exception(self, store_type):
         self._perform_test_using_store(store_type, self._test_exception)
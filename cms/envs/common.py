@@ -315,6 +315,8 @@ MIDDLEWARE_CLASSES = (
     # 'django.middleware.locale.LocaleMiddleware',
     'django_locale.middleware.LocaleMiddleware',
 
+    # Must be before TransactionMiddleware, to act after the commit
+    'student.middleware.EnrollmentStateCacheMiddleware',
     'django.middleware.transaction.TransactionMiddleware',
     # needs to run after locale middleware (or anything that modifies the request context)
     'edxmako.middleware.MakoMiddleware',
@@ -332,6 +334,17 @@ MIDDLEWARE_CLASSES = (
 # Clickjacking protection can be enabled by setting this to 'DENY'
 X_FRAME_OPTIONS = 'ALLOW'
 
+# Time every middleware method and view, and report the times to datadog
+# (see monkey_patch/django_core_handlers_base.py).  A PROFILE_SAMPLE_RATE
+# fraction of requests is also profiled; the profiles of those that take at
+# least PROFILE_MIN_SECONDS are written to PROFILE_DIRECTORY.
+MIDDLEWARE_TIMING = {
+    'ENABLED': False,
+    'PROFILE_SAMPLE_RATE': 0,
+    'PROFILE_MIN_SECONDS': 1,
+    'PROFILE_DIRECTORY': None,
+}
+
 ############# XBlock Configuration ##########
 
 # Import after sys.path fixup
@@ -389,6 +402,21 @@ MODULESTORE = {
     }
 }
 
+# Number of compiled split modulestore course structures to keep in each
+# process, in front of the 'course_structure_cache'. Structures never change,
+# so this only bounds memory use. 0 disables the process-local cache.
+COURSE_STRUCTURE_LRU_SIZE = 16
+
+# Local disk cache for the bodies of course assets too large for memcache,
+# shared by the processes on a machine. Set DIRECTORY to turn it on.
+CONTENTSERVER_DISK_CACHE = {
+    'DIRECTORY': None,
+    # Evict the least recently used assets past this many bytes in all.
+    'MAX_BYTES': 10 * 1024 * 1024 * 1024,
+    # Serve assets bigger than this straight from the contentstore.
+    'MAX_ASSET_BYTES': 1024 * 1024 * 1024,
+}
+
 ############################ DJANGO_BUILTINS ################################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -175,6 +175,10 @@ CACHES = {
     },
 }
 
+# Tests count the mongo queries made for course structures, so don't keep
+# structures around between requests.
+COURSE_STRUCTURE_LRU_SIZE = 0
+
 # Add external_auth to Installed apps for testing
 INSTALLED_APPS += ('external_auth', )
 
@@ -8,7 +8,7 @@ from django.conf import settings
 settings.INSTALLED_APPS  # pylint: disable=pointless-statement
 
 from openedx.core.lib.django_startup import autostartup
-from monkey_patch import django_utils_translation
+from monkey_patch import django_core_handlers_base, django_utils_translation
 
 
 def run():
@@ -17,6 +17,9 @@ def run():
     """
     django_utils_translation.patch()
 
+    if settings.MIDDLEWARE_TIMING.get('ENABLED'):
+        django_core_handlers_base.patch()
+
     autostartup()
 
     add_mimetypes()
@@ -0,0 +1,211 @@
+"""
+A local, size-bounded disk cache for the bodies of large course assets.
+
+Assets too large for memcache used to be read out of GridFS on every request.
+The disk cache keeps their bodies in files under a local directory, shared by
+all the processes on a machine, and evicts the least recently used files once
+the directory grows past its size limit.  Files are filled in the background,
+so that requests which miss the cache don't wait for the whole asset.
+"""
+
+import errno
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+from dogapi import dog_stats_api
+
+log = logging.getLogger(__name__)
+
+# How much of a cached file to read at a time when serving it.
+READ_CHUNK_SIZE = 64 * 1024
+
+# Prefix of files being filled, which readers and eviction ignore.
+TEMP_PREFIX = '.fill-'
+
+# Eviction makes room down to this fraction of the size limit, so that the next
+# few fills don't need to look through the directory again.
+EVICT_TO_FRACTION = 0.9
+
+
+class AssetDiskCache(object):
+    """
+    Asset bodies cached in files under `directory`, up to `max_bytes` in all.
+
+    Keys should change whenever the asset's contents do (see `asset_cache_key`),
+    so cached files never need to be invalidated, only evicted.
+
+    The size of the directory is only measured when this process first fills
+    it, and when eviction is due; in between, the sizes of the files this
+    process fills are added up.  Files filled by other processes are counted
+    the next time the directory is measured.
+    """
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._total_bytes = None
+        self._fills = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        """
+        Return the path of the file caching `key`.
+        """
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def open(self, key):
+        """
+        Return the cached file for `key`, open for reading, or None.
+
+        The file stays readable even if it's evicted while being served.
+        """
+        path = self._path(key)
+        try:
+            cached_file = open(path, 'rb')
+        except IOError as err:
+            if err.errno != errno.ENOENT:
+                raise
+            dog_stats_api.increment('contentserver.disk_cache', tags=['result:miss'])
+            return None
+
+        # Mark it as recently used, for eviction.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        dog_stats_api.increment('contentserver.disk_cache', tags=['result:hit'])
+        return cached_file
+
+    def fill(self, key, chunks):
+        """
+        Cache the data from the iterable `chunks` for `key`.
+
+        Return the cached file, open for reading.
+        """
+        path = self._path(key)
+        dirname = os.path.dirname(path)
+        try:
+            os.makedirs(dirname)
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                raise
+
+        # Write to a temporary file, so that nothing reads a partial file.
+        fd, temp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=dirname)
+        try:
+            size = 0
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+                    size += len(chunk)
+            cached_file = open(temp_path, 'rb')
+            os.rename(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+        dog_stats_api.increment('contentserver.disk_cache.filled_bytes', size)
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += size
+            total = self._total_bytes
+        if total is None or total > self.max_bytes:
+            self.evict()
+        else:
+            dog_stats_api.gauge('contentserver.disk_cache.bytes', total)
+        return cached_file
+
+    def fill_in_background(self, key, get_chunks):
+        """
+        Cache the data from the iterable that `get_chunks` returns for `key`, in
+        a thread.  Nothing is cached if `get_chunks` returns None.
+
+        Does nothing if this process is already filling `key`.
+        """
+        with self._lock:
+            if key in self._fills:
+                return
+            thread = threading.Thread(target=self._fill_in_background, args=(key, get_chunks))
+            thread.daemon = True
+            self._fills[key] = thread
+        thread.start()
+
+    def _fill_in_background(self, key, get_chunks):
+        """
+        Fill `key` from `get_chunks` (see `fill_in_background`).
+        """
+        try:
+            chunks = get_chunks()
+            if chunks is not None:
+                self.fill(key, chunks).close()
+        except Exception:  # pylint: disable=broad-except
+            # The disk cache is an optimization: the next request tries again.
+            log.exception(u"Couldn't fill the disk cache for: %s", key)
+        finally:
+            with self._lock:
+                del self._fills[key]
+
+    def evict(self):
+        """
+        Measure the cache, and if it's bigger than `max_bytes`, remove the least
+        recently used files until it's back under EVICT_TO_FRACTION of that.
+        """
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if filename.startswith(TEMP_PREFIX):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes * EVICT_TO_FRACTION:
+                    break
+
+        with self._lock:
+            self._total_bytes = total
+        dog_stats_api.gauge('contentserver.disk_cache.bytes', total)
+
+
+def asset_cache_key(content):
+    """
+    Return a key for `content` which changes whenever the asset does.
+    """
+    return u'{}:{}:{}'.format(content.location, content.last_modified_at.isoformat(), content.length)
+
+
+def stream_file(cached_file, first=0, last=None):
+    """
+    Yield the bytes of `cached_file` from `first` to `last` (included), then close it.
+
+    If `last` is None, stream to the end of the file.
+    """
+    try:
+        cached_file.seek(first)
+        remaining = None if last is None else last - first + 1
+        while remaining is None or remaining > 0:
+            size = READ_CHUNK_SIZE if remaining is None else min(READ_CHUNK_SIZE, remaining)
+            chunk = cached_file.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+    finally:
+        cached_file.close()
@@ -2,15 +2,19 @@
 Middleware to serve assets.
 """
 
+import hashlib
 import logging
+import uuid
 
+from django.conf import settings
 from django.http import (
     HttpResponse, HttpResponseNotModified, HttpResponseForbidden
 )
 from student.models import CourseEnrollment
 
+from contentserver.disk_cache import AssetDiskCache, asset_cache_key, stream_file
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
@@ -23,8 +27,19 @@ from xmodule.exceptions import NotFoundError
 
 log = logging.getLogger(__name__)
 
+# Most ranges served from one Range header; requests for more get the full content.
+MAX_BYTE_RANGES = 20
+
 
 class StaticContentServer(object):
+    def __init__(self):
+        disk_cache_config = getattr(settings, 'CONTENTSERVER_DISK_CACHE', {})
+        if disk_cache_config.get('DIRECTORY'):
+            self.disk_cache = AssetDiskCache(disk_cache_config['DIRECTORY'], disk_cache_config['MAX_BYTES'])
+            self.disk_cache_max_asset_bytes = disk_cache_config['MAX_ASSET_BYTES']
+        else:
+            self.disk_cache = None
+
     def process_request(self, request):
         # look to see if the request is prefixed with an asset prefix tag
         if (
@@ -80,10 +95,17 @@ class StaticContentServer(object):
             # convert over the DB persistent last modified timestamp to a HTTP compatible
             # timestamp, so we can simply compare the strings
             last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
+            etag = '"{}"'.format(hashlib.sha1(asset_cache_key(content).encode('utf-8')).hexdigest())
 
             # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            # ETags or timestamps, if they are the same then just return a 304 (Not Modified)
+            if 'HTTP_IF_NONE_MATCH' in request.META:
+                if_none_match = [tag.strip() for tag in request.META['HTTP_IF_NONE_MATCH'].split(',')]
+                if etag in if_none_match or '*' in if_none_match:
+                    response = HttpResponseNotModified()
+                    response['ETag'] = etag
+                    return response
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
                     return HttpResponseNotModified()
@@ -94,12 +116,8 @@ class StaticContentServer(object):
             # Request -> Range attribute structure: "Range: bytes=first-[last]"
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
-            response = None
+            byte_ranges = None
             if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -109,45 +127,151 @@ class StaticContentServer(object):
                         u"%s in Range header: %s for content: %s", exception.message, header_value, unicode(loc)
                     )
                 else:
+                    # Ranges that can't be satisfied are left out; if none can, the request fails.
+                    satisfiable = [(first, last) for first, last in ranges if 0 <= first <= last < content.length]
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
+                    elif not satisfiable:
+                        log.warning(
+                            u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                        )
+                        return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                    elif (
+                        len(satisfiable) > MAX_BYTE_RANGES or
+                        sum(last - first + 1 for first, last in satisfiable) > content.length
+                    ):
+                        # Many or overlapping ranges cost more to serve than the whole content,
+                        # so send back the full content instead.
                         log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            u"Too many ranges in Range header: %s for content: %s", header_value, unicode(loc)
                         )
                     else:
-                        first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
-                            response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
-                                first=first, last=last, length=content.length
-                            )
-                            response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
-                        else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
-
-            # If Range header is absent or syntactically invalid return a full content response.
-            if response is None:
-                response = HttpResponse(content.stream_data())
+                        byte_ranges = satisfiable
+
+            if byte_ranges is None:
+                # If Range header is absent or syntactically invalid return a full content response.
+                response = HttpResponse(self.content_body(content))
                 response['Content-Length'] = content.length
+                response['Content-Type'] = content.content_type
+            elif len(byte_ranges) == 1:
+                first, last = byte_ranges[0]
+                response = HttpResponse(self.content_body(content, (first, last)))
+                response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
+                    first=first, last=last, length=content.length
+                )
+                response['Content-Length'] = str(last - first + 1)
+                response['Content-Type'] = content.content_type
+                response.status_code = 206  # Partial Content
+            else:
+                # Content for multiple ranges is sent as a multipart message.
+                # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                boundary = uuid.uuid4().hex
+                response = HttpResponse(self.multipart_body(content, byte_ranges, boundary))
+                response['Content-Length'] = str(multipart_length(content, byte_ranges, boundary))
+                response['Content-Type'] = 'multipart/byteranges; boundary={}'.format(boundary)
+                response.status_code = 206  # Partial Content
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
             response['Last-Modified'] = last_modified_at_str
+            response['ETag'] = etag
 
             return response
 
+    def content_body(self, content, byte_range=None):
+        """
+        Return an iterable over the bytes of `content` in `byte_range`, or all of them.
+
+        Content cached in memory is sliced directly.  Content streamed from the
+        database is served out of the disk cache once it's there.
+        """
+        if byte_range is None:
+            first, last = 0, None
+        else:
+            first, last = byte_range
+
+        if not isinstance(content, StaticContentStream):
+            if byte_range is None:
+                return content.stream_data()
+            return [content.data[first:last + 1]]
+
+        cached_file = self.open_cached_file(content)
+        if cached_file is not None:
+            return stream_file(cached_file, first, last)
+        if byte_range is None:
+            return content.stream_data()
+        return content.stream_data_in_range(first, last)
+
+    def multipart_body(self, content, byte_ranges, boundary):
+        """
+        Yield the multipart/byteranges body of `content` for `byte_ranges`.
+
+        Each part is read as it's sent, so only one range's data is in flight at a time.
+        """
+        for first, last in byte_ranges:
+            yield multipart_part_header(content, first, last, boundary)
+            for chunk in self.content_body(content, (first, last)):
+                yield chunk
+            yield '\r\n'
+        yield '--{}--\r\n'.format(boundary)
+
+    def open_cached_file(self, content):
+        """
+        Return the disk-cached body of the streamed `content`, or None if it
+        isn't cached (yet).
+
+        On a miss, the cache is filled from the database in the background,
+        while this request is served from the database.
+        """
+        if self.disk_cache is None or content.length > self.disk_cache_max_asset_bytes:
+            return None
+
+        key = asset_cache_key(content)
+        try:
+            cached_file = self.disk_cache.open(key)
+        except (IOError, OSError):
+            # The disk cache is an optimization: fall back to the database.
+            log.exception(u"Couldn't use the disk cache for content: %s", unicode(content.location))
+            return None
+        if cached_file is None:
+            location = content.location
+            self.disk_cache.fill_in_background(key, lambda: stream_asset(location, key))
+        return cached_file
+
+
+def stream_asset(location, key):
+    """
+    Return an iterable over the bytes of the asset at `location`, read from the
+    database, or None if it no longer has the cache key `key`.
+    """
+    content = AssetManager.find(location, as_stream=True)
+    if asset_cache_key(content) != key:
+        return None
+    return content.stream_data()
+
+
+def multipart_part_header(content, first, last, boundary):
+    """
+    Return the boundary and headers that start the multipart/byteranges part for `first`-`last` of `content`.
+    """
+    return (
+        '--{boundary}\r\n'
+        'Content-Type: {content_type}\r\n'
+        'Content-Range: bytes {first}-{last}/{length}\r\n'
+        '\r\n'
+    ).format(boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length)
+
+
+def multipart_length(content, byte_ranges, boundary):
+    """
+    Return the length of the multipart/byteranges body of `content` for `byte_ranges`.
+    """
+    length = len('--{}--\r\n'.format(boundary))
+    for first, last in byte_ranges:
+        length += len(multipart_part_header(content, first, last, boundary)) + (last - first + 1) + len('\r\n')
+    return length
+
 
 def parse_range_header(header_value, content_length):
     """
@@ -0,0 +1,160 @@
+"""
+Tests for the contentserver's disk cache.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from StringIO import StringIO
+
+from django.test.utils import override_settings
+from mock import patch
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from xmodule.contentstore.content import StaticContentStream
+
+from contentserver import disk_cache
+from contentserver.disk_cache import AssetDiskCache, asset_cache_key, stream_file
+from contentserver.middleware import StaticContentServer
+
+
+class AssetDiskCacheTest(unittest.TestCase):
+    """
+    Tests for AssetDiskCache.
+    """
+    def setUp(self):
+        super(AssetDiskCacheTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = AssetDiskCache(self.directory, max_bytes=25)
+
+    def test_miss_then_hit(self):
+        self.assertIsNone(self.cache.open(u'key'))
+        filled = self.cache.fill(u'key', ['0123', '456789'])
+        self.assertEqual(''.join(stream_file(filled)), '0123456789')
+
+        cached_file = self.cache.open(u'key')
+        self.assertEqual(''.join(stream_file(cached_file, 2, 5)), '2345')
+        self.assertTrue(cached_file.closed)
+
+    def test_evicts_least_recently_used(self):
+        for key in [u'one', u'two']:
+            self.cache.fill(key, ['x' * 10]).close()
+            os.utime(self.cache._path(key), (0, 0))  # pylint: disable=protected-access
+
+        # Using 'one' makes 'two' the one to go.
+        self.cache.open(u'one').close()
+        self.cache.fill(u'three', ['x' * 10]).close()
+
+        self.assertIsNotNone(self.cache.open(u'one'))
+        self.assertIsNone(self.cache.open(u'two'))
+        self.assertIsNotNone(self.cache.open(u'three'))
+
+    def test_measures_only_when_due(self):
+        with patch.object(self.cache, 'evict', wraps=self.cache.evict) as mock_evict:
+            # The first fill measures the directory, later ones add up what they fill.
+            self.cache.fill(u'one', ['x' * 10]).close()
+            self.cache.fill(u'two', ['x' * 10]).close()
+            self.assertEqual(mock_evict.call_count, 1)
+
+            # Going over the limit measures it again, and evicts.
+            self.cache.fill(u'three', ['x' * 10]).close()
+            self.assertEqual(mock_evict.call_count, 2)
+        self.assertEqual(self.cache._total_bytes, 20)  # pylint: disable=protected-access
+
+    def test_fill_in_background(self):
+        with patch('contentserver.disk_cache.threading.Thread') as mock_thread:
+            self.cache.fill_in_background(u'key', lambda: ['0123'])
+            # Only one fill of a key at a time.
+            self.cache.fill_in_background(u'key', lambda: ['0123'])
+        self.assertEqual(mock_thread.call_count, 1)
+        _, kwargs = mock_thread.call_args
+        kwargs['target'](*kwargs['args'])
+
+        self.assertEqual(''.join(stream_file(self.cache.open(u'key'))), '0123')
+        self.assertEqual(self.cache._fills, {})  # pylint: disable=protected-access
+
+    def test_failed_background_fill(self):
+        def get_chunks():
+            raise IOError('lost the connection')
+
+        with patch('contentserver.disk_cache.threading.Thread') as mock_thread:
+            self.cache.fill_in_background(u'key', get_chunks)
+        _, kwargs = mock_thread.call_args
+        with patch.object(disk_cache.log, 'exception') as mock_log:
+            kwargs['target'](*kwargs['args'])
+        self.assertTrue(mock_log.called)
+        self.assertIsNone(self.cache.open(u'key'))
+        self.assertEqual(self.cache._fills, {})  # pylint: disable=protected-access
+
+    def test_failed_fill_leaves_nothing(self):
+        def chunks():
+            yield 'partial'
+            raise IOError('lost the connection')
+
+        with self.assertRaises(IOError):
+            self.cache.fill(u'key', chunks())
+        self.assertIsNone(self.cache.open(u'key'))
+        self.assertEqual(
+            [filenames for _, _, filenames in os.walk(self.directory) if filenames], []
+        )
+
+
+class StaticContentServerDiskCacheTest(unittest.TestCase):
+    """
+    Tests for serving streamed content out of the disk cache.
+    """
+    def setUp(self):
+        super(StaticContentServerDiskCacheTest, self).setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        config = {'DIRECTORY': directory, 'MAX_BYTES': 1000, 'MAX_ASSET_BYTES': 100}
+        with override_settings(CONTENTSERVER_DISK_CACHE=config):
+            self.server = StaticContentServer()
+
+    def make_content(self, data):
+        """
+        Return a StaticContentStream with `data` as its body.
+        """
+        loc = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall').make_asset_key('asset', 'big.pdf')
+        return StaticContentStream(
+            loc, 'big.pdf', 'application/pdf', StringIO(data),
+            last_modified_at=datetime(2015, 1, 1), length=len(data)
+        )
+
+    def fill_in_foreground(self):
+        """
+        Patch the disk cache to fill right away instead of in a thread.
+        """
+        def fill_in_background(key, get_chunks):
+            chunks = get_chunks()
+            if chunks is not None:
+                self.server.disk_cache.fill(key, chunks).close()
+        return patch.object(self.server.disk_cache, 'fill_in_background', side_effect=fill_in_background)
+
+    def test_serves_from_disk(self):
+        # A miss is served from the database while the cache is filled.
+        content = self.make_content('0123456789')
+        with self.fill_in_foreground():
+            with patch('contentserver.middleware.AssetManager.find', return_value=self.make_content('0123456789')):
+                self.assertEqual(''.join(self.server.content_body(content, (3, 6))), '3456')
+        self.assertIsNotNone(self.server.disk_cache.open(asset_cache_key(content)))
+
+        # Later requests don't touch the stream.
+        content = self.make_content('0123456789')
+        content._stream = None  # pylint: disable=protected-access
+        self.assertEqual(''.join(self.server.content_body(content, (3, 6))), '3456')
+
+    def test_changed_while_filling(self):
+        content = self.make_content('0123456789')
+        changed = self.make_content('012345678')
+        with self.fill_in_foreground():
+            with patch('contentserver.middleware.AssetManager.find', return_value=changed):
+                self.assertEqual(''.join(self.server.content_body(content)), '0123456789')
+        self.assertIsNone(self.server.disk_cache.open(asset_cache_key(content)))
+        self.assertIsNone(self.server.disk_cache.open(asset_cache_key(changed)))
+
+    def test_too_large_for_disk(self):
+        content = self.make_content('x' * 101)
+        self.assertEqual(''.join(self.server.content_body(content, (0, 9))), 'x' * 10)
+        self.assertIsNone(self.server.disk_cache.open(asset_cache_key(content)))
@@ -0,0 +1,116 @@
+"""
+Country lookups by IP address.
+
+Opening a GeoIP database reads and parses its header, so each process keeps
+one reader per database (IPv4 and IPv6), and only opens the database again
+when its file changes.  The countries of up to
+settings.GEOIP_COUNTRY_CACHE_SIZE recently looked up addresses are also kept,
+for settings.GEOIP_COUNTRY_CACHE_TIMEOUT seconds.
+
+Usage:
+
+    from geoinfo.api import country_code_by_addr
+    country_code = country_code_by_addr(ip_address)
+
+"""
+from collections import OrderedDict
+import os
+import threading
+import time
+
+import pygeoip
+from django.conf import settings
+
+import dogstats_wrapper as dog_stats_api
+
+
+class _DatabaseReader(object):
+    """
+    A pygeoip reader of the database whose path is in the `path_setting`
+    setting, opened again when the database file changes.
+    """
+    def __init__(self, path_setting):
+        self.path_setting = path_setting
+        self._lock = threading.Lock()
+        self._geoip = None
+        self._path = None
+        self._mtime = None
+
+    def get(self):
+        """
+        Return the pygeoip.GeoIP reader of the database.
+        """
+        path = unicode(getattr(settings, self.path_setting))
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+
+        with self._lock:
+            if self._geoip is None or path != self._path or mtime != self._mtime:
+                flags = pygeoip.MMAP_CACHE if getattr(settings, 'GEOIP_MMAP', False) else pygeoip.STANDARD
+                self._geoip = pygeoip.GeoIP(path, flags)
+                self._path = path
+                self._mtime = mtime
+                dog_stats_api.increment('geoinfo.database_opened', tags=[u'setting:{}'.format(self.path_setting)])
+            return self._geoip
+
+
+_IPV4_READER = _DatabaseReader('GEOIP_PATH')
+_IPV6_READER = _DatabaseReader('GEOIPV6_PATH')
+
+# Maps addresses to (country code, expiry time) pairs, least recently used first.
+_countries = OrderedDict()
+_countries_lock = threading.Lock()
+
+
+def country_code_by_addr(ip_addr):
+    """
+    Return the country code associated with an IP address, as
+    pygeoip.GeoIP.country_code_by_addr does.
+    Handles both IPv4 and IPv6 addresses.
+
+    Args:
+        ip_addr (str): The IP address to look up.
+
+    Returns:
+        str: A 2-letter country code.
+
+    """
+    max_size = getattr(settings, 'GEOIP_COUNTRY_CACHE_SIZE', 0)
+    timeout = getattr(settings, 'GEOIP_COUNTRY_CACHE_TIMEOUT', 0)
+    use_cache = max_size and timeout
+
+    if use_cache:
+        now = time.time()
+        with _countries_lock:
+            cached = _countries.pop(ip_addr, None)
+            if cached is not None and cached[1] <= now:
+                cached = None
+            if cached is not None:
+                # Re-insert to mark it as the most recently used.
+                _countries[ip_addr] = cached
+        if cached is not None:
+            dog_stats_api.increment('geoinfo.country_cache', tags=['result:hit'])
+            return cached[0]
+        dog_stats_api.increment('geoinfo.country_cache', tags=['result:miss'])
+
+    with dog_stats_api.timer('geoinfo.country_lookup'):
+        reader = _IPV6_READER if ip_addr.find(':') >= 0 else _IPV4_READER
+        country_code = reader.get().country_code_by_addr(ip_addr)
+
+    if use_cache:
+        with _countries_lock:
+            _countries[ip_addr] = (country_code, time.time() + timeout)
+            while len(_countries) > max_size:
+                _countries.popitem(last=False)
+
+    return country_code
+
+
+def clear_country_cache():
+    """
+    Forget the countries of all looked up addresses.
+    """
+    with _countries_lock:
+        _countries.clear()
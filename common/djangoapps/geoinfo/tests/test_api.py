@@ -0,0 +1,68 @@
+"""
+Tests for country lookups by IP address.
+"""
+from mock import patch
+import pygeoip
+
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from geoinfo import api
+
+
+class CountryCodeByAddrTests(TestCase):
+    """
+    Tests of geoinfo.api.country_code_by_addr.
+    """
+    def setUp(self):
+        super(CountryCodeByAddrTests, self).setUp()
+        api.clear_country_cache()
+        self.addCleanup(api.clear_country_cache)
+        patcher = patch.object(pygeoip.GeoIP, 'country_code_by_addr', autospec=True, return_value='CN')
+        self.mock_country_code_by_addr = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_ipv4_and_ipv6(self):
+        self.assertEqual(api.country_code_by_addr('117.79.83.1'), 'CN')
+        self.assertEqual(api.country_code_by_addr('2001:da8:20f:1502:edcf:550b:4a9c:207d'), 'CN')
+        readers = [call_args[0][0] for call_args in self.mock_country_code_by_addr.call_args_list]
+        self.assertIs(readers[0], api._IPV4_READER.get())  # pylint: disable=protected-access
+        self.assertIs(readers[1], api._IPV6_READER.get())  # pylint: disable=protected-access
+
+    def test_reader_reused(self):
+        api.country_code_by_addr('117.79.83.1')
+        with patch('geoinfo.api.pygeoip.GeoIP', wraps=pygeoip.GeoIP) as mock_geoip:
+            api.country_code_by_addr('4.0.0.0')
+        self.assertFalse(mock_geoip.called)
+
+    def test_reader_reopened_when_database_changes(self):
+        api.country_code_by_addr('117.79.83.1')
+        with patch('geoinfo.api.os.path.getmtime', return_value=0):
+            with patch('geoinfo.api.pygeoip.GeoIP', wraps=pygeoip.GeoIP) as mock_geoip:
+                api.country_code_by_addr('4.0.0.0')
+        self.assertTrue(mock_geoip.called)
+
+    def test_not_cached(self):
+        api.country_code_by_addr('117.79.83.1')
+        api.country_code_by_addr('117.79.83.1')
+        self.assertEqual(self.mock_country_code_by_addr.call_count, 2)
+
+    @override_settings(GEOIP_COUNTRY_CACHE_SIZE=2, GEOIP_COUNTRY_CACHE_TIMEOUT=60)
+    def test_cached(self):
+        api.country_code_by_addr('117.79.83.1')
+        api.country_code_by_addr('117.79.83.1')
+        self.assertEqual(self.mock_country_code_by_addr.call_count, 1)
+
+        # The least recently used address is evicted.
+        api.country_code_by_addr('117.79.83.2')
+        api.country_code_by_addr('117.79.83.3')
+        api.country_code_by_addr('117.79.83.1')
+        self.assertEqual(self.mock_country_code_by_addr.call_count, 4)
+
+    @override_settings(GEOIP_COUNTRY_CACHE_SIZE=2, GEOIP_COUNTRY_CACHE_TIMEOUT=60)
+    def test_cache_expires(self):
+        with patch('geoinfo.api.time.time', return_value=1000):
+            api.country_code_by_addr('117.79.83.1')
+        with patch('geoinfo.api.time.time', return_value=1061):
+            api.country_code_by_addr('117.79.83.1')
+        self.assertEqual(self.mock_country_code_by_addr.call_count, 2)
@@ -0,0 +1,198 @@
+"""
+Monkey-patch `django.core.handlers.base` to time the middleware stack
+
+Modify Django's request handler, such that every middleware method it
+loads (process_request, process_view, process_template_response,
+process_response and process_exception) and every view it calls is
+timed. The times are reported as datadog histograms:
+    - django.middleware.duration, tagged with the middleware class and
+      the method
+    - django.view.duration, tagged with the view
+
+Some requests can also be profiled with cProfile, from the moment the
+handler starts on them until it has their response, even if a middleware
+raises. The profiles of those that take at least
+settings.MIDDLEWARE_TIMING['PROFILE_MIN_SECONDS'] are written to
+settings.MIDDLEWARE_TIMING['PROFILE_DIRECTORY'], for offline analysis
+with pstats.
+
+Affected Methods:
+    - BaseHandler.load_middleware
+
+Django 1.4 calls the view between the last view middleware and the
+first response middleware [0], so the view is timed from the one to the
+other.
+
+[0] https://github.com/django/django/blob/1.4.8/django/core/handlers/base.py#L89
+"""
+import cProfile
+from functools import wraps
+import logging
+import os
+import random
+import re
+import time
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+
+import dogstats_wrapper as dog_stats_api
+import monkey_patch
+
+log = logging.getLogger(__name__)
+
+# The handler attributes holding the loaded middleware methods, and the
+# middleware method each holds.
+MIDDLEWARE_LISTS = [
+    ('_request_middleware', 'process_request'),
+    ('_view_middleware', 'process_view'),
+    ('_template_response_middleware', 'process_template_response'),
+    ('_response_middleware', 'process_response'),
+    ('_exception_middleware', 'process_exception'),
+]
+
+
+def is_patched():
+    """
+    Check if the request handler has been monkey-patched
+    """
+    return monkey_patch.is_patched(BaseHandler, 'load_middleware')
+
+
+def patch():
+    """
+    Monkey-patch the request handler to time its middleware
+
+    Affected Methods:
+        - BaseHandler.load_middleware
+    """
+    load_middleware = BaseHandler.load_middleware
+
+    def load_timed_middleware(self):
+        """
+        Load the middleware, and wrap every method in a timer
+        """
+        load_middleware(self)
+        instrument_middleware(self)
+
+    return monkey_patch.patch(BaseHandler, 'load_middleware', load_timed_middleware)
+
+
+def unpatch():
+    """
+    Un-monkey-patch the request handler
+
+    Handlers which have already loaded their middleware keep timing it.
+    """
+    return monkey_patch.unpatch(BaseHandler, 'load_middleware')
+
+
+def instrument_middleware(handler):
+    """
+    Time the middleware methods loaded by `handler`, and the views it calls,
+    and profile a sample of its requests
+    """
+    for list_name, method_name in MIDDLEWARE_LISTS:
+        methods = getattr(handler, list_name)
+        setattr(handler, list_name, [_timed(method, method_name) for method in methods])
+
+    # Views are called between the last view middleware and the first
+    # response middleware (the last one in the list).
+    handler._view_middleware.append(_start_view)  # pylint: disable=protected-access
+    handler._response_middleware.insert(0, _finish_view)  # pylint: disable=protected-access
+
+    # Middleware can be loaded again, but the handler is only profiled once.
+    if not getattr(handler.get_response, 'profiled', False):
+        handler.get_response = _profiled(handler.get_response)
+
+
+def _timed(method, method_name):
+    """
+    Wrap the middleware method `method` in a timer
+    """
+    middleware_class = type(method.__self__)
+    tags = [
+        u'middleware:{}.{}'.format(middleware_class.__module__, middleware_class.__name__),
+        u'method:{}'.format(method_name),
+    ]
+
+    @wraps(method)
+    def timed_method(*args, **kwargs):
+        """
+        Call the middleware method, and report how long it took
+        """
+        start = time.time()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            dog_stats_api.histogram('django.middleware.duration', time.time() - start, tags=tags)
+    return timed_method
+
+
+def _start_view(request, view_func, view_args, view_kwargs):  # pylint: disable=unused-argument
+    """
+    Note the view which is about to be called, and when
+    """
+    request._timed_view = (  # pylint: disable=protected-access
+        getattr(view_func, '__module__', None), getattr(view_func, '__name__', type(view_func).__name__), time.time()
+    )
+
+
+def _finish_view(request, response):
+    """
+    Report how long the view took
+    """
+    timed_view = getattr(request, '_timed_view', None)
+    if timed_view is not None:
+        module_name, view_name, start = timed_view
+        dog_stats_api.histogram(
+            'django.view.duration', time.time() - start, tags=[u'view:{}.{}'.format(module_name, view_name)]
+        )
+        del request._timed_view  # pylint: disable=protected-access
+    return response
+
+
+def _profiled(get_response):
+    """
+    Wrap the handler method `get_response` to profile a sample of requests
+    """
+    @wraps(get_response)
+    def profiled_get_response(request):
+        """
+        Get the response to `request`, profiling it if it's sampled
+        """
+        timing_settings = getattr(settings, 'MIDDLEWARE_TIMING', {})
+        sample_rate = timing_settings.get('PROFILE_SAMPLE_RATE', 0)
+        if not (sample_rate and timing_settings.get('PROFILE_DIRECTORY') and random.random() < sample_rate):
+            return get_response(request)
+
+        profiler = cProfile.Profile()
+        start = time.time()
+        profiler.enable()
+        try:
+            return get_response(request)
+        finally:
+            # Also when a middleware raises, so that the profiler doesn't stay
+            # on for this thread's later requests.
+            profiler.disable()
+            _save_profile(request, profiler, start)
+
+    profiled_get_response.profiled = True
+    return profiled_get_response
+
+
+def _save_profile(request, profiler, start):
+    """
+    Keep the profile of the request if it was slow
+    """
+    duration = time.time() - start
+
+    timing_settings = getattr(settings, 'MIDDLEWARE_TIMING', {})
+    if duration >= timing_settings.get('PROFILE_MIN_SECONDS', 0):
+        filename = u'{:.0f}-{:.3f}s-{}-{}.prof'.format(
+            start * 1000, duration, re.sub(r'[^\w.-]+', '_', request.path)[:100], os.getpid()
+        )
+        try:
+            profiler.dump_stats(os.path.join(timing_settings['PROFILE_DIRECTORY'], filename))
+        except (IOError, OSError):
+            log.exception('Could not write the profile of %s', request.path)
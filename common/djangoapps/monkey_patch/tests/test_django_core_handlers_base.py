@@ -0,0 +1,168 @@
+"""
+Test methods exposed in common/djangoapps/monkey_patch/django_core_handlers_base.py
+
+Verify that the request handler times its middleware and views while
+patched, profiles the sampled requests, and is restored when unpatched.
+"""
+import os
+import shutil
+import tempfile
+
+from django.core.handlers.base import BaseHandler
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import override_settings
+from mock import patch as mock_patch
+
+from monkey_patch.django_core_handlers_base import instrument_middleware, is_patched, patch, unpatch
+
+
+class TimedMiddleware(object):
+    """
+    A middleware with every middleware method
+    """
+    def process_request(self, request):  # pylint: disable=unused-argument
+        return None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):  # pylint: disable=unused-argument
+        return None
+
+    def process_response(self, request, response):  # pylint: disable=unused-argument
+        return response
+
+
+def timed_view(request):  # pylint: disable=unused-argument
+    """
+    The view under test
+    """
+    return HttpResponse('timed')
+
+
+class MonkeyPatchTest(TestCase):
+    """
+    Test the patching of BaseHandler.load_middleware
+    """
+    def setUp(self):
+        super(MonkeyPatchTest, self).setUp()
+        self.addCleanup(unpatch)
+
+    def test_patch_unpatch(self):
+        load_middleware = BaseHandler.load_middleware
+        self.assertFalse(is_patched())
+
+        self.assertTrue(patch())
+        self.assertTrue(is_patched())
+        self.assertNotEqual(BaseHandler.load_middleware, load_middleware)
+
+        self.assertTrue(unpatch())
+        self.assertFalse(is_patched())
+        self.assertEqual(BaseHandler.load_middleware, load_middleware)
+        self.assertFalse(unpatch())
+
+    def test_load_middleware(self):
+        patch()
+        with mock_patch('monkey_patch.django_core_handlers_base.instrument_middleware') as mock_instrument:
+            handler = BaseHandler()
+            handler.load_middleware()
+        mock_instrument.assert_called_once_with(handler)
+        self.assertIsNotNone(handler._request_middleware)  # pylint: disable=protected-access
+
+
+class InstrumentMiddlewareTest(TestCase):
+    """
+    Test the timing and profiling of requests
+    """
+    def setUp(self):
+        super(InstrumentMiddlewareTest, self).setUp()
+        middleware = TimedMiddleware()
+        self.handler = BaseHandler()
+        # pylint: disable=protected-access
+        self.handler._request_middleware = [middleware.process_request]
+        self.handler._view_middleware = [middleware.process_view]
+        self.handler._template_response_middleware = []
+        self.handler._response_middleware = [middleware.process_response]
+        self.handler._exception_middleware = []
+        self.handler.get_response = self.get_response
+        instrument_middleware(self.handler)
+
+        self.request = RequestFactory().get('/timed/view')
+
+    def get_response(self, request):
+        """
+        Run the request through the middleware and the view, as BaseHandler.get_response does
+        """
+        # pylint: disable=protected-access
+        for method in self.handler._request_middleware:
+            method(request)
+        for method in self.handler._view_middleware:
+            method(request, timed_view, (), {})
+        response = timed_view(request)
+        for method in self.handler._response_middleware:
+            response = method(request, response)
+        return response
+
+    def handle(self):
+        """
+        Have the instrumented handler respond to the request
+        """
+        return self.handler.get_response(self.request)
+
+    @mock_patch('monkey_patch.django_core_handlers_base.dog_stats_api.histogram')
+    def test_timed(self, mock_histogram):
+        self.assertEqual(self.handle().content, 'timed')
+
+        timings = [(call_args[0][0], sorted(call_args[1]['tags'])) for call_args in mock_histogram.call_args_list]
+        middleware_tag = u'middleware:{}.TimedMiddleware'.format(__name__)
+        self.assertEqual(timings, [
+            ('django.middleware.duration', [u'method:process_request', middleware_tag]),
+            ('django.middleware.duration', [u'method:process_view', middleware_tag]),
+            ('django.view.duration', [u'view:{}.timed_view'.format(__name__)]),
+            ('django.middleware.duration', [u'method:process_response', middleware_tag]),
+        ])
+
+    def test_profiled(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        timing_settings = {'PROFILE_SAMPLE_RATE': 1, 'PROFILE_MIN_SECONDS': 0, 'PROFILE_DIRECTORY': directory}
+        with override_settings(MIDDLEWARE_TIMING=timing_settings):
+            self.handle()
+        profiles = os.listdir(directory)
+        self.assertEqual(len(profiles), 1)
+        self.assertIn('_timed_view', profiles[0])
+
+        # Fast requests are not kept.
+        timing_settings['PROFILE_MIN_SECONDS'] = 60
+        with override_settings(MIDDLEWARE_TIMING=timing_settings):
+            self.handle()
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_profiling_stopped_on_error(self):
+        def failing_process_response(request, response):  # pylint: disable=unused-argument
+            """
+            A response middleware that raises
+            """
+            raise ValueError()
+        self.handler._response_middleware.insert(1, failing_process_response)  # pylint: disable=protected-access
+
+        timing_settings = {'PROFILE_SAMPLE_RATE': 1, 'PROFILE_MIN_SECONDS': 60, 'PROFILE_DIRECTORY': '/nonexistent'}
+        with override_settings(MIDDLEWARE_TIMING=timing_settings):
+            with mock_patch('monkey_patch.django_core_handlers_base.cProfile.Profile') as mock_profile:
+                with self.assertRaises(ValueError):
+                    self.handle()
+        mock_profile.return_value.enable.assert_called_once_with()
+        mock_profile.return_value.disable.assert_called_once_with()
+
+    def test_profiled_once(self):
+        # Loading the middleware again doesn't profile requests twice.
+        instrument_middleware(self.handler)
+        with override_settings(MIDDLEWARE_TIMING={'PROFILE_SAMPLE_RATE': 1, 'PROFILE_DIRECTORY': '/nonexistent'}):
+            with mock_patch('monkey_patch.django_core_handlers_base.cProfile.Profile') as mock_profile:
+                self.handle()
+        self.assertEqual(mock_profile.call_count, 1)
+
+    def test_not_profiled(self):
+        with override_settings(MIDDLEWARE_TIMING={'PROFILE_SAMPLE_RATE': 0, 'PROFILE_DIRECTORY': '/nonexistent'}):
+            with mock_patch('monkey_patch.django_core_handlers_base.cProfile.Profile') as mock_profile:
+                self.handle()
+        self.assertFalse(mock_profile.called)
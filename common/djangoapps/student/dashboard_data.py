@@ -0,0 +1,113 @@
+"""
+The records the student dashboard shows, fetched for all of a user's enrollments at once.
+
+The dashboard used to look up the course overview, certificate, course modes,
+redeemed registration codes and bulk email authorization of each enrollment
+separately, so the number of queries it made grew with the number of courses
+the user was enrolled in.  DashboardData fetches each kind of record for all
+of the user's enrollments in a single query.
+
+The user's enrollments and certificate statuses are also cached, for
+settings.DASHBOARD_DATA_CACHE_TIMEOUT seconds, until one of them is saved or
+deleted (see student.models.invalidate_dashboard_data).
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from bulk_email.models import CourseAuthorization
+from certificates.models import CertificateStatuses, GeneratedCertificate, certificate_statuses_for_student
+from course_modes.models import CourseMode
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from shoppingcart.models import CourseRegistrationCode
+from student.models import CourseEnrollment, DASHBOARD_DATA_CACHE_KEY
+
+
+class DashboardData(object):
+    """
+    The dashboard records of `user`.
+
+    Attributes:
+        enrollments (list[CourseEnrollment]): the user's active enrollments,
+            with their course overviews (None for courses that are missing or
+            broken) already loaded.
+        certificate_statuses (dict): maps the course keys of the courses in
+            which the user has a certificate to their certificate status (see
+            certificate_status_for_student).
+        all_course_modes (dict): maps course keys to all of the course's modes,
+            including the expired ones.
+        unexpired_course_modes (dict): maps course keys to the course's unexpired modes.
+        redeemed_registration_codes (dict): maps course keys to the registration
+            codes the user redeemed in the course.
+        email_enabled_courses (set): the course keys of the courses for which
+            instructor email is enabled.
+    """
+    def __init__(self, user):
+        self.user = user
+
+        self.enrollments, self.certificate_statuses = self._get_user_records(user)
+        course_ids = [enrollment.course_id for enrollment in self.enrollments]
+
+        course_overviews = CourseOverview.get_from_ids(course_ids)
+        for enrollment in self.enrollments:
+            # pylint: disable=protected-access
+            enrollment._course_overview = course_overviews[enrollment.course_id]
+            enrollment.user = user
+
+        self.all_course_modes, self.unexpired_course_modes = CourseMode.all_and_unexpired_modes_for_courses(
+            course_ids
+        )
+
+        self.redeemed_registration_codes = defaultdict(list)
+        redeemed_registration_codes = CourseRegistrationCode.objects.filter(
+            course_id__in=course_ids,
+            registrationcoderedemption__redeemed_by=user,
+        ).select_related('invoice_item__invoice')
+        for registration_code in redeemed_registration_codes:
+            self.redeemed_registration_codes[registration_code.course_id].append(registration_code)
+
+        self.email_enabled_courses = CourseAuthorization.instructor_email_enabled_courses(course_ids)
+
+    @staticmethod
+    def _get_user_records(user):
+        """
+        Return the user's active enrollments and certificate statuses, from
+        the cache if they're there.
+        """
+        timeout = getattr(settings, 'DASHBOARD_DATA_CACHE_TIMEOUT', None)
+        cache_key = DASHBOARD_DATA_CACHE_KEY.format(user_id=user.id)
+        if timeout:
+            records = cache.get(cache_key)
+            if records is not None:
+                return records
+
+        enrollments = list(CourseEnrollment.enrollments_for_user(user))
+        certificate_statuses = certificate_statuses_for_student(
+            user, [enrollment.course_id for enrollment in enrollments]
+        )
+        records = (enrollments, certificate_statuses)
+        if timeout:
+            cache.set(cache_key, records, timeout)
+        return records
+
+    def selectable_modes(self, course_id):
+        """
+        Return the unexpired modes of the course which are shown on the track
+        selection page, as CourseMode.modes_for_course would.
+        """
+        modes = [
+            mode for mode in self.unexpired_course_modes.get(course_id, [])
+            if mode.slug not in CourseMode.CREDIT_MODES
+        ]
+        return modes or [CourseMode.DEFAULT_MODE]
+
+    def certificate_status(self, course_id):
+        """
+        Return the user's certificate status in the course, as
+        certificate_status_for_student would.
+        """
+        return self.certificate_statuses.get(
+            course_id,
+            {'status': CertificateStatuses.unavailable, 'mode': GeneratedCertificate.MODES.honor}
+        )
@@ -5,7 +5,7 @@ disabled accounts from accessing the site.
 from django.http import HttpResponseForbidden
 from django.utils.translation import ugettext as _
 from django.conf import settings
-from student.models import UserStanding
+from student.models import UserStanding, invalidate_uncommitted_enrollment_states
 
 
 class UserStandingMiddleware(object):
@@ -34,3 +34,14 @@ class UserStandingMiddleware(object):
                     ),
                 )
                 return HttpResponseForbidden(msg)
+
+
+class EnrollmentStateCacheMiddleware(object):
+    """
+    Drops the enrollment states saved during the request from the cache after
+    the request's transaction is over.  Must come before TransactionMiddleware,
+    so that it processes the response after the transaction is committed.
+    """
+    def process_response(self, request, response):  # pylint: disable=unused-argument
+        invalidate_uncommitted_enrollment_states()
+        return response
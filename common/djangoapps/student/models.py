@@ -29,9 +29,10 @@ from django.utils import timezone
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.signals import user_logged_in, user_logged_out
-from django.db import models, IntegrityError
+from django.core.cache import cache
+from django.db import models, IntegrityError, transaction
 from django.db.models import Count
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver, Signal
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.translation import ugettext_noop
@@ -42,6 +43,7 @@ from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from simple_history.models import HistoricalRecords
 from south.modelsinspector import add_introspection_rules
+import request_cache
 from track import contexts
 from xmodule_django.models import CourseKeyField, NoneToEmptyManager
 
@@ -97,6 +99,48 @@ class AnonymousUserId(models.Model):
     unique_together = (user, course_id)
 
 
+# How many users to save or look up anonymous ids for in a single query. Each
+# saved row takes three parameters, and SQLite allows 999 per query.
+ANONYMOUS_ID_BATCH_SIZE = 300
+
+
+def _compute_anonymous_id(user_id, course_id):
+    """
+    Return the anonymous id of the user with `user_id` in the course.
+    """
+    # include the secret key as a salt, and to make the ids unique across different LMS installs.
+    hasher = hashlib.md5()
+    hasher.update(settings.SECRET_KEY)
+    hasher.update(unicode(user_id))
+    if course_id:
+        hasher.update(course_id.to_deprecated_string().encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def _cache_anonymous_id(user, course_id, digest):
+    """
+    Remember the user's anonymous id in the course on the user object.
+    """
+    if not hasattr(user, '_anonymous_id'):
+        user._anonymous_id = {}  # pylint: disable=protected-access
+
+    user._anonymous_id[course_id] = digest  # pylint: disable=protected-access
+
+
+def _log_mismatched_anonymous_id(user, course_id, stored_id, digest):
+    """
+    Log that the anonymous id stored for a user doesn't match the computed one.
+    """
+    log.error(
+        u"Stored anonymous user id %r for user %r "
+        u"in course %r doesn't match computed id %r",
+        user,
+        course_id,
+        stored_id,
+        digest
+    )
+
+
 def anonymous_id_for_user(user, course_id, save=True):
     """
     Return a unique id for a (user, course) pair, suitable for inserting
@@ -115,18 +159,8 @@ def anonymous_id_for_user(user, course_id, save=True):
     if cached_id is not None:
         return cached_id
 
-    # include the secret key as a salt, and to make the ids unique across different LMS installs.
-    hasher = hashlib.md5()
-    hasher.update(settings.SECRET_KEY)
-    hasher.update(unicode(user.id))
-    if course_id:
-        hasher.update(course_id.to_deprecated_string().encode('utf-8'))
-    digest = hasher.hexdigest()
-
-    if not hasattr(user, '_anonymous_id'):
-        user._anonymous_id = {}  # pylint: disable=protected-access
-
-    user._anonymous_id[course_id] = digest  # pylint: disable=protected-access
+    digest = _compute_anonymous_id(user.id, course_id)
+    _cache_anonymous_id(user, course_id, digest)
 
     if save is False:
         return digest
@@ -138,14 +172,7 @@ def anonymous_id_for_user(user, course_id, save=True):
             course_id=course_id
         )
         if anonymous_user_id.anonymous_user_id != digest:
-            log.error(
-                u"Stored anonymous user id %r for user %r "
-                u"in course %r doesn't match computed id %r",
-                user,
-                course_id,
-                anonymous_user_id.anonymous_user_id,
-                digest
-            )
+            _log_mismatched_anonymous_id(user, course_id, anonymous_user_id.anonymous_user_id, digest)
     except IntegrityError:
         # Another thread has already created this entry, so
         # continue
@@ -154,6 +181,80 @@ def anonymous_id_for_user(user, course_id, save=True):
     return digest
 
 
+def anonymous_ids_for_users(users, course_id, save=True):
+    """
+    Return a dict mapping the id of each of `users` to their unique id for
+    the course, as `anonymous_id_for_user` would. `AnonymousUser`s are left out.
+
+    The ids are remembered on the user objects, so later calls to
+    `anonymous_id_for_user` for them don't touch the database.
+
+    Keyword arguments:
+    save -- Whether the ids should be saved in AnonymousUserId objects. The
+        missing objects are created with a single insert per
+        ANONYMOUS_ID_BATCH_SIZE users.
+    """
+    anonymous_ids = {}
+    unsaved_users = []
+    for user in users:
+        if user.is_anonymous():
+            continue
+        digest = getattr(user, '_anonymous_id', {}).get(course_id)
+        if digest is None:
+            digest = _compute_anonymous_id(user.id, course_id)
+            _cache_anonymous_id(user, course_id, digest)
+            unsaved_users.append(user)
+        anonymous_ids[user.id] = digest
+
+    if save:
+        for start in xrange(0, len(unsaved_users), ANONYMOUS_ID_BATCH_SIZE):
+            _save_anonymous_ids(unsaved_users[start:start + ANONYMOUS_ID_BATCH_SIZE], course_id, anonymous_ids)
+
+    return anonymous_ids
+
+
+def _save_anonymous_ids(users, course_id, anonymous_ids):
+    """
+    Create the AnonymousUserId objects of `users` in the course that don't
+    exist yet, with one query to find them and one to insert them.
+    """
+    users_by_id = {user.id: user for user in users}
+    stored_ids = AnonymousUserId.objects.filter(
+        user__in=users_by_id.keys(),
+        course_id=course_id,
+    ).values_list('user_id', 'anonymous_user_id')
+
+    missing_user_ids = set(users_by_id)
+    for user_id, stored_id in stored_ids:
+        missing_user_ids.discard(user_id)
+        if stored_id != anonymous_ids[user_id]:
+            _log_mismatched_anonymous_id(users_by_id[user_id], course_id, stored_id, anonymous_ids[user_id])
+    if not missing_user_ids:
+        return
+
+    savepoint = transaction.savepoint()
+    try:
+        AnonymousUserId.objects.bulk_create([
+            AnonymousUserId(user_id=user_id, anonymous_user_id=anonymous_ids[user_id], course_id=course_id)
+            for user_id in missing_user_ids
+        ])
+    except IntegrityError:
+        # Another thread has created some of these entries, so create the
+        # rest one at a time.
+        transaction.savepoint_rollback(savepoint)
+        for user_id in missing_user_ids:
+            try:
+                AnonymousUserId.objects.get_or_create(
+                    defaults={'anonymous_user_id': anonymous_ids[user_id]},
+                    user_id=user_id,
+                    course_id=course_id
+                )
+            except IntegrityError:
+                pass
+    else:
+        transaction.savepoint_commit(savepoint)
+
+
 def user_by_anonymous_id(uid):
     """
     Return user by anonymous_user_id using AnonymousUserId lookup table.
@@ -172,6 +273,24 @@ def user_by_anonymous_id(uid):
         return None
 
 
+def users_by_anonymous_ids(uids):
+    """
+    Return a dict mapping each of the anonymous ids in `uids` to its user, as
+    `user_by_anonymous_id` would, with a query per ANONYMOUS_ID_BATCH_SIZE ids.
+
+    Ids that don't belong to any user are left out.
+    """
+    uids = list(set(uid for uid in uids if uid is not None))
+    users = {}
+    for start in xrange(0, len(uids), ANONYMOUS_ID_BATCH_SIZE):
+        anonymous_user_ids = AnonymousUserId.objects.filter(
+            anonymous_user_id__in=uids[start:start + ANONYMOUS_ID_BATCH_SIZE]
+        ).select_related('user')
+        for anonymous_user_id in anonymous_user_ids:
+            users[anonymous_user_id.anonymous_user_id] = anonymous_user_id.user
+    return users
+
+
 class UserStanding(models.Model):
     """
     This table contains a student's account's status.
@@ -1206,11 +1325,8 @@ class CourseEnrollment(models.Model):
         if isinstance(course_key, CCXLocator):
             course_key = course_key.to_course_locator()
 
-        try:
-            record = CourseEnrollment.objects.get(user=user, course_id=course_key)
-            return record.is_active
-        except cls.DoesNotExist:
-            return False
+        __, is_active = cls._enrollment_state(user, course_key)
+        return bool(is_active)
 
     @classmethod
     def is_enrolled_by_partial(cls, user, course_id_partial):
@@ -1252,21 +1368,83 @@ class CourseEnrollment(models.Model):
             and is_active is whether the enrollment is active.
         Returns (None, None) if the courseenrollment record does not exist.
         """
-        try:
-            record = CourseEnrollment.objects.get(user=user, course_id=course_id)
-            return (record.mode, record.is_active)
-        except cls.DoesNotExist:
-            return (None, None)
+        return cls._enrollment_state(user, course_id)
+
+    @classmethod
+    def _enrollment_state(cls, user, course_key):
+        """
+        Returns the (mode, is_active) state of the user's enrollment in the
+        course, as enrollment_mode_for_user does, using the caches.
+        """
+        return cls.enrollment_states([user.id], [course_key])[(user.id, course_key)]
+
+    @classmethod
+    def enrollment_states(cls, user_ids, course_keys):
+        """
+        Returns the state of the enrollment of each of the users with the
+        `user_ids` in each of the `course_keys`, as a dict mapping (user id, course key) pairs to the
+        (mode, is_active) pairs that enrollment_mode_for_user returns.
+
+        States are looked up in the request cache first, then in the cache
+        (where they are kept for settings.ENROLLMENT_STATE_CACHE_TIMEOUT
+        seconds, and dropped whenever an enrollment is saved), and those that
+        are still missing are fetched with a single query.  The states of
+        enrollments saved in this request's transaction aren't cached, since
+        it may not be committed yet.
+        """
+        user_ids = set(user_ids)
+        course_keys_by_id = {unicode(course_key): course_key for course_key in course_keys}
+        pairs = [(user_id, course_id) for user_id in user_ids for course_id in course_keys_by_id]
+
+        request_states = _get_enrollment_state_request_cache()
+        states = {pair: request_states[pair] for pair in pairs if pair in request_states}
+        missing = [pair for pair in pairs if pair not in states]
+
+        timeout = getattr(settings, 'ENROLLMENT_STATE_CACHE_TIMEOUT', None)
+        if missing and timeout:
+            cache_keys = {_enrollment_state_cache_key(*pair): pair for pair in missing}
+            for cache_key, state in cache.get_many(cache_keys.keys()).iteritems():
+                states[cache_keys[cache_key]] = state
+            missing = [pair for pair in missing if pair not in states]
+
+        if missing:
+            fetched = dict.fromkeys(missing, (None, None))
+            enrollments = cls.objects.filter(
+                user__in=set(user_id for user_id, __ in missing),
+                course_id__in=[course_keys_by_id[course_id] for __, course_id in missing],
+            )
+            for enrollment in enrollments:
+                pair = (enrollment.user_id, unicode(enrollment.course_id))
+                if pair in fetched:
+                    fetched[pair] = (enrollment.mode, enrollment.is_active)
+            if timeout:
+                uncommitted = _get_uncommitted_enrollment_states()
+                cache.set_many(
+                    {
+                        _enrollment_state_cache_key(*pair): state
+                        for pair, state in fetched.iteritems() if pair not in uncommitted
+                    },
+                    timeout
+                )
+            states.update(fetched)
+
+        request_states.update(states)
+        return {
+            (user_id, course_keys_by_id[course_id]): state
+            for (user_id, course_id), state in states.iteritems()
+        }
 
     @classmethod
     def enrollments_for_user(cls, user):
         return CourseEnrollment.objects.filter(user=user, is_active=1)
 
-    def is_paid_course(self):
+    def is_paid_course(self, modes_dict=None):
         """
         Returns True, if course is paid
+
+        `modes_dict` (see CourseMode.modes_for_course_dict) saves looking up the course's modes.
         """
-        paid_course = CourseMode.is_white_label(self.course_id)
+        paid_course = CourseMode.is_white_label(self.course_id, modes_dict=modes_dict)
         if paid_course or CourseMode.is_professional_slug(self.mode):
             return True
 
@@ -1286,10 +1464,14 @@ class CourseEnrollment(models.Model):
         """Changes this `CourseEnrollment` record's mode to `mode`.  Saves immediately."""
         self.update_enrollment(mode=mode)
 
-    def refundable(self):
+    def refundable(self, user_already_has_certs_for=None, modes=None):
         """
         For paid/verified certificates, students may receive a refund if they have
         a verified certificate and the deadline for refunds has not yet passed.
+
+        Callers checking many enrollments can save queries by passing the set
+        of course ids the user has a certificate in (`user_already_has_certs_for`),
+        and the course's unexpired modes (`modes`).
         """
         # In order to support manual refunds past the deadline, set can_refund on this object.
         # On unenrolling, the "UNENROLL_DONE" signal calls CertificateItem.refund_cert_callback(),
@@ -1300,12 +1482,16 @@ class CourseEnrollment(models.Model):
             return True
 
         # If the student has already been given a certificate they should not be refunded
-        if GeneratedCertificate.certificate_for_student(self.user, self.course_id) is not None:
+        if user_already_has_certs_for is None:
+            has_certificate = GeneratedCertificate.certificate_for_student(self.user, self.course_id) is not None
+        else:
+            has_certificate = self.course_id in user_already_has_certs_for
+        if has_certificate:
             return False
 
         #TODO - When Course administrators to define a refund period for paid courses then refundable will be supported. # pylint: disable=fixme
 
-        course_mode = CourseMode.mode_for_course(self.course_id, 'verified')
+        course_mode = CourseMode.mode_for_course(self.course_id, 'verified', modes=modes)
         if course_mode is None:
             return False
         else:
@@ -1345,6 +1531,85 @@ class CourseEnrollment(models.Model):
         return CourseMode.is_verified_slug(self.mode)
 
 
+def _enrollment_state_cache_key(user_id, course_id):
+    """
+    Returns the cache key of the state of a user's enrollment in a course.
+    """
+    return u'student.enrollment_state.{}.{}'.format(user_id, course_id)
+
+
+def _get_enrollment_state_request_cache():
+    """
+    Returns the request cache of enrollment states, keyed by (user id, course
+    id string) pairs.
+
+    Outside of requests, where nothing would ever clear it, a new dict is returned.
+    """
+    if request_cache.get_request() is None:
+        return {}
+    return request_cache.get_cache('student.enrollment_state')
+
+
+def _get_uncommitted_enrollment_states():
+    """
+    Returns the (user id, course id string) pairs of the enrollments saved in
+    this request's transaction, as the keys of a dict.
+
+    Outside of requests, a new dict is returned.
+    """
+    if request_cache.get_request() is None:
+        return {}
+    return request_cache.get_cache('student.uncommitted_enrollment_state')
+
+
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+def invalidate_enrollment_state_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the state of a saved or deleted enrollment from the caches.
+
+    The state isn't written through, since the transaction saving it may
+    still be rolled back. The cache is shared with processes (e.g. Studio's)
+    that don't use it themselves, so it's cleared whatever the timeout here.
+
+    Until a managed transaction is committed, other requests still read, and
+    may cache, the old state, so it's dropped again once the request is over
+    (see `invalidate_uncommitted_enrollment_states`).
+    """
+    pair = (instance.user_id, unicode(instance.course_id))
+    _get_enrollment_state_request_cache().pop(pair, None)
+    cache.delete(_enrollment_state_cache_key(*pair))
+    if transaction.is_managed():
+        _get_uncommitted_enrollment_states()[pair] = True
+
+
+def invalidate_uncommitted_enrollment_states():
+    """
+    Drop the states of the enrollments saved in this request from the cache,
+    once the request's transaction is committed or rolled back.
+    """
+    uncommitted = _get_uncommitted_enrollment_states()
+    if uncommitted:
+        cache.delete_many([_enrollment_state_cache_key(*pair) for pair in uncommitted])
+        uncommitted.clear()
+
+
+# Cache key of a user's records in student.dashboard_data.DashboardData.
+DASHBOARD_DATA_CACHE_KEY = u'student.dashboard_data.{user_id}'
+
+
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+@receiver(post_save, sender=GeneratedCertificate)
+@receiver(post_delete, sender=GeneratedCertificate)
+def invalidate_dashboard_data(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the cached dashboard records of a user when one of their enrollments
+    or certificates changes.
+    """
+    cache.delete(DASHBOARD_DATA_CACHE_KEY.format(user_id=instance.user_id))
+
+
 class ManualEnrollmentAudit(models.Model):
     """
     Table for tracking which enrollments were performed through manual enrollment.
@@ -0,0 +1,97 @@
+"""
+Tests for the records fetched for the student dashboard.
+"""
+import unittest
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test.utils import override_settings
+from mock import patch
+
+from certificates.models import CertificateStatuses
+from certificates.tests.factories import GeneratedCertificateFactory  # pylint: disable=import-error
+from course_modes.tests.factories import CourseModeFactory
+from student.dashboard_data import DashboardData
+from student.models import CourseEnrollment
+from student.tests.factories import UserFactory
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+
+@unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+class DashboardDataTest(ModuleStoreTestCase):
+    """
+    Tests for DashboardData.
+    """
+    def setUp(self):
+        super(DashboardDataTest, self).setUp()
+        self.user = UserFactory.create()
+        self.courses = [CourseFactory.create() for __ in range(3)]
+        for course in self.courses:
+            CourseEnrollment.enroll(self.user, course.id)
+        cache.clear()
+
+    def test_records(self):
+        CourseModeFactory.create(course_id=self.courses[0].id, mode_slug='verified')
+        GeneratedCertificateFactory.create(
+            user=self.user,
+            course_id=self.courses[1].id,
+            status=CertificateStatuses.downloadable,
+            download_url='http://www.example.com/certificate.pdf',
+        )
+
+        dashboard_data = DashboardData(self.user)
+
+        self.assertEqual(
+            set(enrollment.course_id for enrollment in dashboard_data.enrollments),
+            set(course.id for course in self.courses)
+        )
+        for enrollment in dashboard_data.enrollments:
+            self.assertEqual(enrollment.course_overview.id, enrollment.course_id)
+        self.assertEqual(
+            dashboard_data.certificate_status(self.courses[1].id)['status'], CertificateStatuses.downloadable
+        )
+        self.assertEqual(
+            dashboard_data.certificate_status(self.courses[2].id)['status'], CertificateStatuses.unavailable
+        )
+        self.assertEqual(
+            [mode.slug for mode in dashboard_data.selectable_modes(self.courses[0].id)], ['verified']
+        )
+        self.assertEqual(
+            [mode.slug for mode in dashboard_data.selectable_modes(self.courses[1].id)], ['honor']
+        )
+
+
+@unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+@override_settings(DASHBOARD_DATA_CACHE_TIMEOUT=60)
+class DashboardDataCacheTest(ModuleStoreTestCase):
+    """
+    Tests for the caching of a user's enrollments and certificate statuses.
+    """
+    def setUp(self):
+        super(DashboardDataCacheTest, self).setUp()
+        self.user = UserFactory.create()
+        self.course = CourseFactory.create()
+        CourseEnrollment.enroll(self.user, self.course.id)
+        cache.clear()
+
+    def test_cached(self):
+        DashboardData(self.user)
+        with patch.object(CourseEnrollment, 'enrollments_for_user') as enrollments_for_user:
+            dashboard_data = DashboardData(self.user)
+        self.assertFalse(enrollments_for_user.called)
+        self.assertEqual([enrollment.course_id for enrollment in dashboard_data.enrollments], [self.course.id])
+
+    def test_invalidated_by_enrollment(self):
+        DashboardData(self.user)
+        CourseEnrollment.unenroll(self.user, self.course.id)
+        self.assertEqual(DashboardData(self.user).enrollments, [])
+
+    def test_invalidated_by_certificate(self):
+        DashboardData(self.user)
+        GeneratedCertificateFactory.create(
+            user=self.user, course_id=self.course.id, status=CertificateStatuses.notpassing
+        )
+        self.assertEqual(
+            DashboardData(self.user).certificate_status(self.course.id)['status'], CertificateStatuses.notpassing
+        )
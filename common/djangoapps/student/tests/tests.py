@@ -10,20 +10,26 @@ import ddt
 
 from django.conf import settings
 from django.contrib.auth.models import User, AnonymousUser
+from django.core.cache import cache as django_cache
 from django.core.urlresolvers import reverse
+from django.http import HttpResponse
 from django.test import TestCase
-from django.test.client import Client
+from django.test.client import Client, RequestFactory
+from django.test.utils import override_settings
 from mock import Mock, patch
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
+from request_cache.middleware import RequestCache
 from student.models import (
-    anonymous_id_for_user, user_by_anonymous_id, CourseEnrollment, unique_id_for_user, LinkedInAddToProfileConfiguration
+    anonymous_id_for_user, anonymous_ids_for_users, user_by_anonymous_id, users_by_anonymous_ids, CourseEnrollment,
+    unique_id_for_user, LinkedInAddToProfileConfiguration, _enrollment_state_cache_key
 )
 from student.views import (
     process_survey_link,
     _cert_info,
     complete_course_mode_info,
 )
+from student.middleware import EnrollmentStateCacheMiddleware
 from student.tests.factories import UserFactory, CourseModeFactory
 from util.testing import EventTestMixin
 from util.model_utils import USER_SETTINGS_CHANGED_EVENT_NAME
@@ -790,6 +796,77 @@ class EnrollInCourseTest(EnrollmentEventTestMixin, TestCase):
         self.assert_enrollment_mode_change_event_was_emitted(user, course_id, "honor")
 
 
+class EnrollmentStateTest(TestCase):
+    """Tests looking up the state of enrollments, and caching it."""
+
+    def setUp(self):
+        super(EnrollmentStateTest, self).setUp()
+        self.users = [UserFactory.create(), UserFactory.create()]
+        self.course_ids = [
+            SlashSeparatedCourseKey("edX", "Test101", "2013"),
+            SlashSeparatedCourseKey("edX", "Test102", "2013"),
+        ]
+        CourseEnrollment.enroll(self.users[0], self.course_ids[0], "verified")
+        CourseEnrollment.enroll(self.users[1], self.course_ids[0])
+        CourseEnrollment.unenroll(self.users[1], self.course_ids[0])
+        django_cache.clear()
+
+    def test_enrollment_states(self):
+        with self.assertNumQueries(1):
+            states = CourseEnrollment.enrollment_states([user.id for user in self.users], self.course_ids)
+        self.assertEqual(states, {
+            (self.users[0].id, self.course_ids[0]): ("verified", True),
+            (self.users[0].id, self.course_ids[1]): (None, None),
+            (self.users[1].id, self.course_ids[0]): ("honor", False),
+            (self.users[1].id, self.course_ids[1]): (None, None),
+        })
+
+    @override_settings(ENROLLMENT_STATE_CACHE_TIMEOUT=60)
+    def test_cached(self):
+        user, course_id = self.users[0], self.course_ids[0]
+        self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
+        with self.assertNumQueries(0):
+            self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
+            self.assertEqual(CourseEnrollment.enrollment_mode_for_user(user, course_id), ("verified", True))
+
+        # Saving the enrollment drops it from the cache.
+        CourseEnrollment.unenroll(user, course_id)
+        self.assertIsNone(django_cache.get(_enrollment_state_cache_key(user.id, course_id)))
+        self.assertFalse(CourseEnrollment.is_enrolled(user, course_id))
+        with self.assertNumQueries(0):
+            self.assertFalse(CourseEnrollment.is_enrolled(user, course_id))
+        CourseEnrollment.enroll(user, self.course_ids[1])
+        self.assertEqual(CourseEnrollment.enrollment_mode_for_user(user, self.course_ids[1]), ("honor", True))
+
+    def test_invalidated_without_timeout(self):
+        # Processes without the cache enabled must still drop the states others cached.
+        user, course_id = self.users[0], self.course_ids[0]
+        cache_key = _enrollment_state_cache_key(user.id, course_id)
+        django_cache.set(cache_key, (None, None), 60)
+        with override_settings(ENROLLMENT_STATE_CACHE_TIMEOUT=None):
+            CourseEnrollment.unenroll(user, course_id)
+        self.assertIsNone(django_cache.get(cache_key))
+
+    @override_settings(ENROLLMENT_STATE_CACHE_TIMEOUT=60)
+    def test_invalidated_after_transaction(self):
+        user, course_id = self.users[0], self.course_ids[0]
+        cache_key = _enrollment_state_cache_key(user.id, course_id)
+        request = RequestFactory().get('/')
+        RequestCache().process_request(request)
+        self.addCleanup(RequestCache.clear_request_cache)
+
+        # Tests run in a transaction, as requests do.
+        CourseEnrollment.unenroll(user, course_id)
+        self.assertFalse(CourseEnrollment.is_enrolled(user, course_id))
+        # The uncommitted state isn't shared.
+        self.assertIsNone(django_cache.get(cache_key))
+
+        # Another request cached the old, committed state meanwhile.
+        django_cache.set(cache_key, ("verified", True), 60)
+        EnrollmentStateCacheMiddleware().process_response(request, HttpResponse())
+        self.assertIsNone(django_cache.get(cache_key))
+
+
 @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
 class ChangeEnrollmentViewTest(ModuleStoreTestCase):
     """Tests the student.views.change_enrollment view"""
@@ -907,3 +984,21 @@ class AnonymousLookupTable(ModuleStoreTestCase):
         real_user = user_by_anonymous_id(anonymous_id)
         self.assertEqual(self.user, real_user)
         self.assertEqual(anonymous_id, anonymous_id_for_user(self.user, course2.id, save=False))
+
+    def test_bulk_roundtrip(self):
+        users = [self.user, UserFactory(), UserFactory()]
+        # One of the ids is already saved.
+        saved_id = anonymous_id_for_user(users[0], self.course.id)
+        fresh_users = [User.objects.get(id=user.id) for user in users]
+        with self.assertNumQueries(2):
+            anonymous_ids = anonymous_ids_for_users(fresh_users + [AnonymousUser()], self.course.id)
+        self.assertEqual(anonymous_ids[users[0].id], saved_id)
+        for user in users:
+            self.assertEqual(anonymous_ids[user.id], anonymous_id_for_user(user, self.course.id, save=False))
+        # The ids are remembered on the users.
+        with self.assertNumQueries(0):
+            self.assertEqual(anonymous_ids[users[1].id], anonymous_id_for_user(fresh_users[1], self.course.id))
+
+        with self.assertNumQueries(1):
+            users_by_id = users_by_anonymous_ids(anonymous_ids.values() + ['unknown', None])
+        self.assertEqual(users_by_id, {anonymous_ids[user.id]: user for user in users})
@@ -52,6 +52,7 @@ from student.models import (
     CourseEnrollmentAllowed, UserStanding, LoginFailures,
     create_comments_service_user, PasswordHistory, UserSignupSource,
     DashboardConfiguration, LinkedInAddToProfileConfiguration, ManualEnrollmentAudit, ALLOWEDTOENROLL_TO_ENROLLED)
+from student.dashboard_data import DashboardData
 from student.forms import AccountCreationForm, PasswordResetFormNoActive
 
 from verify_student.models import SoftwareSecurePhotoVerification  # pylint: disable=import-error
@@ -82,7 +83,7 @@ from external_auth.login_and_register import (
     register as external_auth_register
 )
 
-from bulk_email.models import Optout, CourseAuthorization
+from bulk_email.models import Optout
 from lang_pref import LANGUAGE_KEY
 
 import track.views
@@ -110,7 +111,7 @@ from student.helpers import (
 )
 from student.cookies import set_logged_in_cookies, delete_logged_in_cookies
 from student.models import anonymous_id_for_user
-from shoppingcart.models import DonationConfiguration, CourseRegistrationCode
+from shoppingcart.models import DonationConfiguration
 
 from embargo import api as embargo_api
 
@@ -179,7 +180,7 @@ def process_survey_link(survey_link, user):
     return survey_link.format(UNIQUE_ID=unique_id_for_user(user))
 
 
-def cert_info(user, course_overview, course_mode):
+def cert_info(user, course_overview, course_mode, cert_status=None):
     """
     Get the certificate info needed to render the dashboard section for the given
     student and course.
@@ -188,6 +189,8 @@ def cert_info(user, course_overview, course_mode):
         user (User): A user.
         course_overview (CourseOverview): A course.
         course_mode (str): The enrollment mode (honor, verified, audit, etc.)
+        cert_status (dict): The student's certificate status in the course, if
+            it has already been looked up (see certificate_status_for_student).
 
     Returns:
         dict: A dictionary with keys:
@@ -201,12 +204,9 @@ def cert_info(user, course_overview, course_mode):
     """
     if not course_overview.may_certify():
         return {}
-    return _cert_info(
-        user,
-        course_overview,
-        certificate_status_for_student(user, course_overview.id),
-        course_mode
-    )
+    if cert_status is None:
+        cert_status = certificate_status_for_student(user, course_overview.id)
+    return _cert_info(user, course_overview, cert_status, course_mode)
 
 
 def reverification_info(statuses):
@@ -232,7 +232,7 @@ def reverification_info(statuses):
     return reverifications
 
 
-def get_course_enrollments(user, org_to_include, orgs_to_exclude):
+def get_course_enrollments(user, org_to_include, orgs_to_exclude, dashboard_data=None):
     """
     Given a user, return a filtered set of his or her course enrollments.
 
@@ -242,12 +242,17 @@ def get_course_enrollments(user, org_to_include, orgs_to_exclude):
             of this org will be returned.
         orgs_to_exclude (list[str]): If org_to_include is not None, this
             argument is ignored. Else, courses of this org will be excluded.
+        dashboard_data (DashboardData): the user's dashboard records, if they
+            have already been fetched.
 
     Returns:
         generator[CourseEnrollment]: a sequence of enrollments to be displayed
         on the user's dashboard.
     """
-    for enrollment in CourseEnrollment.enrollments_for_user(user):
+    if dashboard_data is None:
+        dashboard_data = DashboardData(user)
+
+    for enrollment in dashboard_data.enrollments:
 
         # If the course is missing or broken, log an error and skip it.
         course_overview = enrollment.course_overview
@@ -523,23 +528,26 @@ def dashboard(request):
     if course_org_filter:
         org_filter_out_set.remove(course_org_filter)
 
+    # Fetch the records shown for all of the user's enrollments at once.
+    dashboard_data = DashboardData(user)
+
     # Build our (course, enrollment) list for the user, but ignore any courses that no
     # longer exist (because the course IDs have changed). Still, we don't delete those
     # enrollments, because it could have been a data push snafu.
-    course_enrollments = list(get_course_enrollments(user, course_org_filter, org_filter_out_set))
+    course_enrollments = list(
+        get_course_enrollments(user, course_org_filter, org_filter_out_set, dashboard_data=dashboard_data)
+    )
 
     # sort the enrollment pairs by the enrollment date
     course_enrollments.sort(key=lambda x: x.created, reverse=True)
 
     # Retrieve the course modes for each course
-    enrolled_course_ids = [enrollment.course_id for enrollment in course_enrollments]
-    __, unexpired_course_modes = CourseMode.all_and_unexpired_modes_for_courses(enrolled_course_ids)
     course_modes_by_course = {
         course_id: {
             mode.slug: mode
             for mode in modes
         }
-        for course_id, modes in unexpired_course_modes.iteritems()
+        for course_id, modes in dashboard_data.unexpired_course_modes.iteritems()
     }
 
     # Check to see if the student has recently enrolled in a course.
@@ -598,7 +606,12 @@ def dashboard(request):
     # there is no verification messaging to display.
     verify_status_by_course = check_verify_status_by_course(user, course_enrollments)
     cert_statuses = {
-        enrollment.course_id: cert_info(request.user, enrollment.course_overview, enrollment.mode)
+        enrollment.course_id: cert_info(
+            request.user,
+            enrollment.course_overview,
+            enrollment.mode,
+            cert_status=dashboard_data.certificate_status(enrollment.course_id)
+        )
         for enrollment in course_enrollments
     }
 
@@ -607,7 +620,7 @@ def dashboard(request):
         enrollment.course_id for enrollment in course_enrollments if (
             settings.FEATURES['ENABLE_INSTRUCTOR_EMAIL'] and
             modulestore().get_modulestore_type(enrollment.course_id) != ModuleStoreEnum.Type.xml and
-            CourseAuthorization.instructor_email_enabled(enrollment.course_id)
+            enrollment.course_id in dashboard_data.email_enabled_courses
         )
     )
 
@@ -621,24 +634,28 @@ def dashboard(request):
 
     show_refund_option_for = frozenset(
         enrollment.course_id for enrollment in course_enrollments
-        if enrollment.refundable()
+        if enrollment.refundable(
+            user_already_has_certs_for=dashboard_data.certificate_statuses,
+            modes=dashboard_data.selectable_modes(enrollment.course_id)
+        )
     )
 
     block_courses = frozenset(
         enrollment.course_id for enrollment in course_enrollments
         if is_course_blocked(
             request,
-            CourseRegistrationCode.objects.filter(
-                course_id=enrollment.course_id,
-                registrationcoderedemption__redeemed_by=request.user
-            ),
+            dashboard_data.redeemed_registration_codes[enrollment.course_id],
             enrollment.course_id
         )
     )
 
     enrolled_courses_either_paid = frozenset(
         enrollment.course_id for enrollment in course_enrollments
-        if enrollment.is_paid_course()
+        if enrollment.is_paid_course(
+            modes_dict=CourseMode.modes_for_course_dict(
+                enrollment.course_id, modes=dashboard_data.selectable_modes(enrollment.course_id)
+            )
+        )
     )
 
     # If there are *any* denied reverifications that have not been toggled off,
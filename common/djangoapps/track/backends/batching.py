@@ -0,0 +1,191 @@
+"""Event tracker backend that sends events to another backend in batches."""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import Queue
+import threading
+import time
+
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+from track.tracker import _instantiate_backend_from_name
+
+
+log = logging.getLogger(__name__)
+
+# Put on the queue to stop the background thread.
+_STOP = object()
+
+
+class BatchingBackend(BaseBackend):
+    """
+    Event tracker backend that queues events in memory and hands them to
+    another backend in batches, from a background thread.
+
+    Events are flushed when `batch_size` of them are queued, or when the
+    oldest queued event has waited `flush_interval` seconds, and when the
+    process exits.  If the wrapped backend has a `send_many(events)` method,
+    each batch is sent with one call to it; otherwise the events are sent one
+    at a time, but still off the request thread.
+
+    Example configuration::
+
+      TRACKING_BACKENDS = {
+          'mongo': {
+              'ENGINE': 'track.backends.batching.BatchingBackend',
+              'OPTIONS': {
+                  'backend': {
+                      'ENGINE': 'track.backends.mongodb.MongoBackend',
+                      'OPTIONS': {'database': 'track'},
+                  },
+                  'batch_size': 100,
+              }
+          }
+      }
+
+    """
+
+    def __init__(self, backend, batch_size=100, flush_interval=1.0,
+                 max_queue_size=10000, block_timeout=0, **kwargs):
+        """
+        Event tracker backend that sends events in batches.
+
+        :Parameters:
+
+          - `backend`: dict with the 'ENGINE' and 'OPTIONS' of the backend
+            to send batches to
+          - `batch_size`: most events to send at once
+          - `flush_interval`: most seconds an event waits to be sent
+          - `max_queue_size`: most events to hold in memory
+          - `block_timeout`: how many seconds `send` may wait for room in a
+            full queue before dropping the event; 0 drops it immediately
+
+        """
+        super(BatchingBackend, self).__init__(**kwargs)
+
+        self.backend = _instantiate_backend_from_name(backend['ENGINE'], backend.get('OPTIONS', {}))
+        self.name = backend['ENGINE'].split('.')[-1]
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.queue = Queue.Queue(max_queue_size)
+        self.dropped = 0
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        atexit.register(self.close)
+
+    def _ensure_thread(self):
+        """
+        Start the background thread, if this process hasn't started it yet.
+
+        Threads don't survive a fork, so check the process too.  A forked
+        process starts with an empty queue: what's queued belongs to the
+        parent, which sends it.
+        """
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                if self._pid is not None and self._pid != os.getpid():
+                    self.queue = Queue.Queue(self.queue.maxsize)
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='track-batching-{}'.format(self.name))
+                self._thread.daemon = True
+                self._thread.start()
+
+    def send(self, event):
+        """Queue the event to be sent with the next batch."""
+        self._ensure_thread()
+        try:
+            if self.block_timeout:
+                self.queue.put(event, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(event)
+        except Queue.Full:
+            self.dropped += 1
+            dog_stats_api.increment('track.batching.dropped', tags=['backend:{}'.format(self.name)])
+
+    def _next_batch(self):
+        """
+        Wait for events, and return a batch of them.
+
+        The batch ends early with `_STOP` if that was queued.
+        """
+        batch = [self.queue.get()]
+        deadline = time.time() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except Queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """
+        Send batches of events until told to stop.
+        """
+        while True:
+            batch = self._next_batch()
+            stop = batch[-1] is _STOP
+            if stop:
+                batch.pop()
+            if batch:
+                self._send_batch(batch)
+            if stop:
+                return
+
+    def _send_batch(self, batch):
+        """
+        Send a batch of events to the wrapped backend.
+        """
+        dog_stats_api.histogram('track.batching.batch_size', len(batch), tags=['backend:{}'.format(self.name)])
+        send_many = getattr(self.backend, 'send_many', None)
+        try:
+            if send_many is not None:
+                send_many(batch)
+            else:
+                for event in batch:
+                    self.backend.send(event)
+        except Exception:  # pylint: disable=broad-except
+            # Don't let one bad batch stop the thread; the events are lost.
+            log.exception('Error sending a batch of %d events to %s', len(batch), self.name)
+
+    def close(self, timeout=5):
+        """
+        Send everything queued so far, and stop the background thread.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None or self._pid != os.getpid():
+                return
+
+        if thread.is_alive():
+            try:
+                self.queue.put(_STOP, timeout=timeout)
+            except Queue.Full:
+                pass
+            thread.join(timeout)
+        if thread.is_alive():
+            return
+
+        # The thread has stopped: send anything it left behind right here.
+        batch = []
+        while True:
+            try:
+                event = self.queue.get_nowait()
+            except Queue.Empty:
+                break
+            if event is not _STOP:
+                batch.append(event)
+        if batch:
+            self._send_batch(batch)
@@ -97,3 +97,12 @@ class MongoBackend(BaseBackend):
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+
+    def send_many(self, events):
+        """Insert a batch of events in to the Mongo collection"""
+        try:
+            self.collection.insert(events, manipulate=False, continue_on_error=True)
+        except (PyMongoError, BSONError):
+            # As in `send`, the events which didn't make it in are lost.
+            msg = 'Error inserting a batch of events to MongoDB event tracker backend'
+            log.exception(msg)
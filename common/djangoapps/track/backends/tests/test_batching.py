@@ -0,0 +1,78 @@
+from __future__ import absolute_import
+
+from django.test import TestCase
+
+from track.backends import BaseBackend
+from track.backends.batching import BatchingBackend
+
+
+class InMemoryBackend(BaseBackend):
+    """A backend that remembers what it was sent."""
+
+    def __init__(self, **kwargs):
+        super(InMemoryBackend, self).__init__(**kwargs)
+        self.events = []
+
+    def send(self, event):
+        self.events.append(event)
+
+
+class InMemoryBatchBackend(InMemoryBackend):
+    """A backend that remembers the batches it was sent."""
+
+    def __init__(self, **kwargs):
+        super(InMemoryBatchBackend, self).__init__(**kwargs)
+        self.batches = []
+
+    def send_many(self, events):
+        self.batches.append(list(events))
+
+
+class TestBatchingBackend(TestCase):
+    """Tests for the BatchingBackend."""
+
+    def make_backend(self, engine='InMemoryBatchBackend', **options):
+        """Return a BatchingBackend wrapping the `engine` backend of this module."""
+        backend = BatchingBackend(
+            backend={'ENGINE': 'track.backends.tests.test_batching.' + engine},
+            **options
+        )
+        self.addCleanup(backend.close)
+        return backend
+
+    def test_batches_by_size(self):
+        """Events are sent in batches of batch_size, and the rest when closed."""
+        backend = self.make_backend(batch_size=2, flush_interval=60)
+        for i in range(5):
+            backend.send({'test': i})
+        backend.close()
+
+        self.assertEqual(
+            backend.backend.batches,
+            [[{'test': 0}, {'test': 1}], [{'test': 2}, {'test': 3}], [{'test': 4}]]
+        )
+
+    def test_send_one_at_a_time(self):
+        """Backends without send_many still get every event."""
+        backend = self.make_backend(engine='InMemoryBackend', batch_size=10)
+        for i in range(3):
+            backend.send({'test': i})
+        backend.close()
+
+        self.assertEqual(backend.backend.events, [{'test': 0}, {'test': 1}, {'test': 2}])
+
+    def test_drops_when_full(self):
+        """Events are dropped, and counted, when the queue is full."""
+        backend = self.make_backend(max_queue_size=2)
+        # Hold the queue full, as if the background thread were stuck.
+        backend._ensure_thread = lambda: None  # pylint: disable=protected-access
+        for i in range(5):
+            backend.send({'test': i})
+
+        self.assertEqual(backend.dropped, 3)
+        self.assertEqual(backend.queue.qsize(), 2)
+
+    def test_backend_must_be_a_backend(self):
+        """The wrapped engine must be a BaseBackend, as for the tracker itself."""
+        with self.assertRaises(ValueError):
+            self.make_backend(engine='TestBatchingBackend')
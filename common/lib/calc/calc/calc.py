@@ -7,6 +7,9 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+import threading
+from collections import OrderedDict
+
 import numpy
 import scipy.constants
 import functions
@@ -61,6 +64,11 @@ DEFAULT_VARIABLES = {
     'q': scipy.constants.e  # Fund. Charge: 1.602176565e-19 (Coulombs)
 }
 
+# How many parsed expressions `compile_expression` keeps around. Problems
+# re-evaluate the same handful of answers and tolerances over and over, and
+# building the pyparsing grammar dominates the cost of a single evaluation.
+COMPILED_EXPRESSION_CACHE_SIZE = 512
+
 # We eliminated the following extreme suffixes:
 #   P (1e15), E (1e18), Z (1e21), Y (1e24),
 #   f (1e-15), a (1e-18), z (1e-21), y (1e-24)
@@ -115,6 +123,16 @@ def eval_number(parse_result):
     return super_float("".join(parse_result))
 
 
+def is_value(token):
+    """
+    Return whether `token` is an evaluated value rather than an operator.
+
+    Values are plain numbers, or NumPy arrays when evaluating many samples
+    at once (see `CompiledExpression.evaluate_samples`).
+    """
+    return isinstance(token, (numbers.Number, numpy.ndarray))
+
+
 def eval_atom(parse_result):
     """
     Return the value wrapped by the atom.
@@ -122,7 +140,7 @@ def eval_atom(parse_result):
     In the case of parenthesis, ignore them.
     """
     # Find first number in the list
-    result = next(k for k in parse_result if isinstance(k, numbers.Number))
+    result = next(k for k in parse_result if is_value(k))
     return result
 
 
@@ -136,7 +154,7 @@ def eval_power(parse_result):
     # `reduce` will go from left to right; reverse the list.
     parse_result = reversed(
         [k for k in parse_result
-         if isinstance(k, numbers.Number)]  # Ignore the '^' marks.
+         if is_value(k)]  # Ignore the '^' marks.
     )
     # Having reversed it, raise `b` to the power of `a`.
     power = reduce(lambda a, b: b ** a, parse_result)
@@ -162,6 +180,20 @@ def eval_parallel(parse_result):
     return 1. / sum(reciprocals)
 
 
+def eval_parallel_samples(parse_result):
+    """
+    Like `eval_parallel`, but for arrays holding one value per sample.
+
+    Samples with a zero among their inputs come out as NaN.
+    """
+    if len(parse_result) == 1:
+        return parse_result[0]
+    values = [e for e in parse_result if is_value(e)]
+    has_zero = reduce(numpy.logical_or, [numpy.equal(e, 0) for e in values])
+    reciprocals = [1. / e for e in values]
+    return numpy.where(has_zero, float('nan'), 1. / sum(reciprocals))
+
+
 def eval_sum(parse_result):
     """
     Add the inputs, keeping in mind their sign.
@@ -173,12 +205,12 @@ def eval_sum(parse_result):
     total = 0.0
     current_op = operator.add
     for token in parse_result:
-        if token == '+':
+        if is_value(token):
+            total = current_op(total, token)
+        elif token == '+':
             current_op = operator.add
         elif token == '-':
             current_op = operator.sub
-        else:
-            total = current_op(total, token)
     return total
 
 
@@ -191,12 +223,12 @@ def eval_product(parse_result):
     prod = 1.0
     current_op = operator.mul
     for token in parse_result:
-        if token == '*':
+        if is_value(token):
+            prod = current_op(prod, token)
+        elif token == '*':
             current_op = operator.mul
         elif token == '/':
             current_op = operator.truediv
-        else:
-            prod = current_op(prod, token)
     return prod
 
 
@@ -224,38 +256,144 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
      python numbers.
     -Unary functions are passed as a dictionary from string to function.
     """
-    # No need to go further.
-    if math_expr.strip() == "":
-        return float('nan')
+    return compile_expression(math_expr, case_sensitive).evaluate(variables, functions)
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+_COMPILED_EXPRESSIONS = OrderedDict()
+_COMPILED_EXPRESSIONS_LOCK = threading.Lock()
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
-
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
-
-    return math_interpreter.reduce_tree(evaluate_actions)
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return a `CompiledExpression` for `math_expr`, parsing it only once.
+
+    Parsed expressions are kept in a bounded cache keyed by the expression
+    and its case sensitivity. Raises the same parse errors as `evaluator`.
+    """
+    key = (math_expr, case_sensitive)
+    with _COMPILED_EXPRESSIONS_LOCK:
+        compiled = _COMPILED_EXPRESSIONS.pop(key, None)
+        if compiled is not None:
+            # Re-insert to mark it as the most recently used.
+            _COMPILED_EXPRESSIONS[key] = compiled
+            return compiled
+
+    compiled = CompiledExpression(math_expr, case_sensitive)
+
+    with _COMPILED_EXPRESSIONS_LOCK:
+        _COMPILED_EXPRESSIONS[key] = compiled
+        while len(_COMPILED_EXPRESSIONS) > COMPILED_EXPRESSION_CACHE_SIZE:
+            _COMPILED_EXPRESSIONS.popitem(last=False)
+    return compiled
+
+
+class CompiledExpression(object):
+    """
+    A parsed math expression which can be evaluated repeatedly.
+
+    Use `compile_expression` rather than instantiating this directly, so that
+    parses get shared.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
+
+        # No need to go further.
+        if math_expr.strip() == "":
+            self.math_interpreter = None
+        else:
+            self.math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+            self.math_interpreter.parse_algebra()
+
+    def _evaluate_actions(self, all_variables, all_functions):
+        """
+        Return the `reduce_tree` actions that evaluate the tree.
+        """
+        if self.case_sensitive:
+            casify = lambda x: x
+        else:
+            casify = lambda x: x.lower()  # Lowercase for case insens.
+
+        return {
+            'number': eval_number,
+            'variable': lambda x: all_variables[casify(x[0])],
+            'function': lambda x: all_functions[casify(x[0])](x[1]),
+            'atom': eval_atom,
+            'power': eval_power,
+            'parallel': eval_parallel,
+            'product': eval_product,
+            'sum': eval_sum
+        }
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression for one set of variables, as `evaluator` does.
+        """
+        if self.math_interpreter is None:
+            return float('nan')
+
+        # Get our variables together.
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+
+        # ...and check them
+        self.math_interpreter.check_variables(all_variables, all_functions)
+
+        evaluate_actions = self._evaluate_actions(all_variables, all_functions)
+        return self.math_interpreter.reduce_tree(evaluate_actions)
+
+    def evaluate_samples(self, variables_list, functions):
+        """
+        Evaluate the expression for each dict of variables in `variables_list`.
+
+        Return a list with one result per dict, the same as calling `evaluate`
+        on each of them. All the samples are evaluated in one pass over the
+        tree using NumPy arrays. Expressions which don't vectorize (e.g. they
+        use `factorial`), or whose results include NaNs or infinities, are
+        evaluated one sample at a time instead, so that errors get raised
+        exactly as `evaluate` would raise them.
+        """
+        if not variables_list:
+            return []
+        if self.math_interpreter is None:
+            return [float('nan')] * len(variables_list)
+
+        results = None
+        names = set(variables_list[0])
+        if all(set(variables) == names for variables in variables_list):
+            columns = {
+                name: numpy.array([variables[name] for variables in variables_list])
+                for name in names
+            }
+            all_variables, all_functions = add_defaults(columns, functions, self.case_sensitive)
+            self.math_interpreter.check_variables(all_variables, all_functions)
+
+            evaluate_actions = self._evaluate_actions(all_variables, all_functions)
+            evaluate_actions['parallel'] = eval_parallel_samples
+            try:
+                with numpy.errstate(all='ignore'):
+                    results = self._vectorized_results(
+                        self.math_interpreter.reduce_tree(evaluate_actions),
+                        len(variables_list)
+                    )
+            except Exception:  # pylint: disable=broad-except
+                results = None
+
+        if results is None:
+            return [self.evaluate(variables, functions) for variables in variables_list]
+        return list(results)
+
+    @staticmethod
+    def _vectorized_results(value, num_samples):
+        """
+        Return `value` as an array of `num_samples` finite results, or None.
+        """
+        results = numpy.asarray(value)
+        if results.shape == ():
+            # The expression didn't depend on the samples.
+            results = numpy.repeat(results, num_samples)
+        if results.shape != (num_samples,) or not numpy.all(numpy.isfinite(results)):
+            return None
+        return results
 
 
 class ParseAugmenter(object):
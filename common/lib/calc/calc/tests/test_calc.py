@@ -559,3 +559,91 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Run tests for calc.compile_expression and the evaluation of many samples
+    at once.
+    """
+
+    def setUp(self):
+        super(CompiledExpressionTest, self).setUp()
+        self.samples = [{'x': 0.5 * i, 'y': 3.5 - i} for i in range(1, 6)]
+
+    def assert_samples_match(self, expr, functions=None, case_sensitive=False):
+        """
+        Check that `evaluate_samples` agrees with `evaluator` on each sample.
+        """
+        functions = functions or {}
+        compiled = calc.compile_expression(expr, case_sensitive)
+        results = compiled.evaluate_samples(self.samples, functions)
+        self.assertEqual(len(results), len(self.samples))
+        for variables, result in zip(self.samples, results):
+            expected = calc.evaluator(variables, functions, expr, case_sensitive)
+            self.assertAlmostEqual(expected, result, delta=1e-9, msg=expr)
+
+    def test_parse_is_cached(self):
+        """
+        Compiling the same expression twice should reuse the parse
+        """
+        compiled = calc.compile_expression('x^2 + 1')
+        self.assertIs(compiled, calc.compile_expression('x^2 + 1'))
+        self.assertIsNot(compiled, calc.compile_expression('x^2 + 1', case_sensitive=True))
+
+    def test_cache_is_bounded(self):
+        """
+        The least recently used parses should be dropped once the cache is full
+        """
+        original_size = calc.COMPILED_EXPRESSION_CACHE_SIZE
+        calc.COMPILED_EXPRESSION_CACHE_SIZE = 2
+        self.addCleanup(setattr, calc, 'COMPILED_EXPRESSION_CACHE_SIZE', original_size)
+
+        first = calc.compile_expression('1+x')
+        calc.compile_expression('2+x')
+        calc.compile_expression('3+x')
+        self.assertIsNot(first, calc.compile_expression('1+x'))
+
+    def test_evaluate_samples(self):
+        """
+        Vectorized evaluation should match evaluating each sample on its own
+        """
+        for expr in ['x', 'x*y - 2/x', '-x^y^2', 'sin(x) + cos(y)*j',
+                     'x||y', 'sqrt(x) * e^(i*y)', '5', '3k * x/y']:
+            self.assert_samples_match(expr)
+
+    def test_evaluate_samples_fallback(self):
+        """
+        Expressions which don't vectorize still give per-sample results
+        """
+        self.assert_samples_match('fact(3) * x')
+        self.assert_samples_match('arccot(y)')
+        self.assert_samples_match('f(x)', functions={'f': lambda v: float(v) + 1})
+
+    def test_evaluate_samples_nan(self):
+        """
+        Samples where the parallel operator sees a zero come out as NaN
+        """
+        self.samples = [{'x': 1.0}, {'x': 0.0}]
+        results = calc.compile_expression('x||1').evaluate_samples(self.samples, {})
+        self.assertEqual(results[0], 0.5)
+        self.assertTrue(numpy.isnan(results[1]))
+
+    def test_evaluate_samples_errors(self):
+        """
+        Errors should be raised just as `evaluator` raises them
+        """
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.compile_expression('x+z').evaluate_samples(self.samples, {})
+        with self.assertRaisesRegexp(ValueError, 'factorial'):
+            calc.compile_expression('fact(x)').evaluate_samples(self.samples, {})
+        with self.assertRaises(ParseException):
+            calc.compile_expression('x+')
+
+    def test_empty_expression(self):
+        """
+        An empty expression evaluates to NaN for every sample
+        """
+        results = calc.compile_expression(' ').evaluate_samples(self.samples, {})
+        self.assertEqual(len(results), len(self.samples))
+        self.assertTrue(all(numpy.isnan(result) for result in results))
@@ -13,11 +13,14 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
+import threading
 
 from lxml import etree
 from pytz import UTC
@@ -58,6 +61,152 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+
+class ProblemTreeCache(object):
+    """
+    Keeps the parsed XML trees of the last `max_size` problems instantiated in
+    this process, keyed by a digest of their text.
+
+    Parsing a problem, and making its XML compatible, gives the same tree for
+    every student, so a problem that's instantiated again only has to copy
+    its tree.  Trees are copied both on the way in and on the way out, since
+    LoncapaProblem changes its tree in place.  A `max_size` of 0 turns the
+    cache off.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(problem_text):
+        """
+        Return the cache key of the tree of `problem_text`.
+        """
+        if isinstance(problem_text, unicode):
+            problem_text = problem_text.encode('utf-8')
+        return hashlib.md5(problem_text).hexdigest()
+
+    def get(self, key):
+        """
+        Return a (problem_text, tree) pair with a copy of the tree cached for
+        `key`, or None if it isn't cached.
+        """
+        with self._lock:
+            cached = self._trees.pop(key, None)
+            if cached is None:
+                return None
+            # Re-insert to mark it as the most recently used.
+            self._trees[key] = cached
+        problem_text, tree = cached
+        return problem_text, deepcopy(tree)
+
+    def set(self, key, problem_text, tree):
+        """
+        Cache a copy of `tree`, parsed from (the converted) `problem_text`.
+        """
+        if not self.max_size:
+            return
+        tree = deepcopy(tree)
+        with self._lock:
+            self._trees.pop(key, None)
+            self._trees[key] = (problem_text, tree)
+            while len(self._trees) > self.max_size:
+                self._trees.popitem(last=False)
+
+    def clear(self):
+        """
+        Forget all cached trees.
+        """
+        with self._lock:
+            self._trees.clear()
+
+
+problem_tree_cache = ProblemTreeCache(0)
+
+
+def configure_problem_tree_cache(max_size):
+    """
+    Keep the parsed trees of up to `max_size` problems in this process.  A
+    `max_size` of 0 turns the cache off.
+    """
+    problem_tree_cache.max_size = max_size
+    problem_tree_cache.clear()
+
+
+def _convert_outtext(problem_text):
+    """
+    Convert startouttext and endouttext in `problem_text` to proper <text></text>.
+    """
+    problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
+    return re.sub(r"endouttext\s*/", "/text", problem_text)
+
+
+# The number of problems whose static max score is remembered in this process.
+STATIC_MAX_SCORES_SIZE = 1000
+
+_static_max_scores = OrderedDict()
+_static_max_scores_lock = threading.Lock()
+
+
+def get_static_max_score(problem_text):
+    """
+    Return the maximum score of the problem in `problem_text`, as
+    LoncapaProblem.get_max_score would, reading it from the problem's XML
+    instead of instantiating the problem.
+
+    Returns None if the max score can't be read from the XML alone: the
+    problem has <include>s or scripts, uses response types that don't
+    support it (see LoncapaResponse.static_scoring), or is broken.
+
+    The last STATIC_MAX_SCORES_SIZE results are remembered, so each problem
+    is parsed once per process.
+    """
+    key = ProblemTreeCache.key(problem_text)
+    with _static_max_scores_lock:
+        if key in _static_max_scores:
+            # Re-insert to mark it as the most recently used.
+            max_score = _static_max_scores.pop(key)
+            _static_max_scores[key] = max_score
+            return max_score
+
+    max_score = _read_static_max_score(problem_text)
+    with _static_max_scores_lock:
+        _static_max_scores[key] = max_score
+        while len(_static_max_scores) > STATIC_MAX_SCORES_SIZE:
+            _static_max_scores.popitem(last=False)
+    return max_score
+
+
+def _read_static_max_score(problem_text):
+    """
+    Return the static max score of `problem_text` (see `get_static_max_score`).
+    """
+    try:
+        tree = etree.XML(_convert_outtext(problem_text))
+    except (etree.XMLSyntaxError, ValueError):
+        return None
+    if tree.find('.//include') is not None:
+        return None
+    # The same scripts as LoncapaProblem._extract_context runs, which can
+    # fail, or define what the responses read.
+    for script in tree.findall('.//script'):
+        script_type = script.get('type') or ''
+        if 'javascript' not in script_type and 'perl' not in script_type:
+            return None
+
+    # The same answer fields as LoncapaProblem._preprocess_problem finds.
+    inputfields_xpath = "|".join('.//' + tag for tag in inputtypes.registry.registered_tags() + solution_tags)
+    max_score = 0
+    for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
+        responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
+        points = responsetype_cls.static_max_points(response, response.xpath(inputfields_xpath))
+        if points is None:
+            return None
+        max_score += points
+    return max_score
+
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -156,18 +305,28 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
+        tree_cache_key = problem_tree_cache.key(problem_text) if problem_tree_cache.max_size else None
+        cached = problem_tree_cache.get(tree_cache_key) if tree_cache_key else None
+        if cached is not None:
+            self.problem_text, self.tree = cached
+        else:
+            self.problem_text = problem_text = _convert_outtext(problem_text)
+
+            # parse problem XML file into an element tree
+            self.tree = etree.XML(problem_text)
+
+            self.make_xml_compatible(self.tree)
 
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
+            # Included files can change without the problem text changing, so
+            # only trees without includes are cached.
+            if self.tree.find('.//include') is not None:
+                tree_cache_key = None
 
-        self.make_xml_compatible(self.tree)
+            # handle any <include file="foo"> tags
+            self._process_includes()
 
-        # handle any <include file="foo"> tags
-        self._process_includes()
+            if tree_cache_key:
+                problem_tree_cache.set(tree_cache_key, self.problem_text, self.tree)
 
         # construct script processor context (eg for customresponse problems)
         self.context = self._extract_context(self.tree)
@@ -36,7 +36,7 @@ from shapely.geometry import Point, MultiPoint
 import dogstats_wrapper as dog_stats_api
 
 # specific library imports
-from calc import evaluator, UndefinedVariable
+from calc import compile_expression, evaluator, UndefinedVariable
 from . import correctmap
 from .registry import TagRegistry
 from datetime import datetime
@@ -151,6 +151,11 @@ class LoncapaResponse(object):
     # By default, we set this to False, allowing subclasses to override as appropriate.
     multi_device_support = False
 
+    # Whether static_max_points can tell from the XML alone that a response of
+    # this type can be set up.  Response types whose setup can fail for other
+    # reasons leave it off, so that their problems are instantiated instead.
+    static_scoring = False
+
     def __init__(self, xml, inputfields, context, system, capa_module):
         """
         Init is passed the following arguments:
@@ -236,6 +241,29 @@ class LoncapaResponse(object):
         """
         return sum(self.maxpoints.values())
 
+    @classmethod
+    def static_max_points(cls, xml, inputfields):
+        """
+        Return the total maximum points of the answer fields `inputfields` of
+        the Response in `xml`, as get_max_score would, without instantiating
+        the Response.
+
+        Returns None if the Response couldn't be instantiated, or if that
+        can't be told without instantiating it (see `static_scoring`).
+        """
+        if not cls.static_scoring:
+            return None
+        if any(inputfield.tag not in cls.allowed_inputfields for inputfield in inputfields):
+            return None
+        if cls.max_inputfields and len(inputfields) > cls.max_inputfields:
+            return None
+        if any(not xml.get(prop) for prop in cls.required_attributes):
+            return None
+        try:
+            return sum(int(inputfield.get('points', '1')) for inputfield in inputfields)
+        except ValueError:
+            return None
+
     def render_html(self, renderer, response_msg=''):
         """
         Return XHTML Element tree representation of this Response.
@@ -822,6 +850,7 @@ class ChoiceResponse(LoncapaResponse):
     allowed_inputfields = ['checkboxgroup', 'radiogroup']
     correct_choices = None
     multi_device_support = True
+    static_scoring = True
 
     def setup_response(self):
         self.assign_choice_names()
@@ -1147,6 +1176,7 @@ class MultipleChoiceResponse(LoncapaResponse):
     allowed_inputfields = ['choicegroup']
     correct_choices = None
     multi_device_support = True
+    static_scoring = True
 
     def setup_response(self):
         """
@@ -1185,6 +1215,24 @@ class MultipleChoiceResponse(LoncapaResponse):
                 if contextualize_text(choice.get('correct'), self.context).lower() == 'partial'
             ]
 
+    @classmethod
+    def static_max_points(cls, xml, inputfields):
+        # setup_response needs every choice to say whether it's correct, and
+        # the answer pool, set up by late_transforms, has its own checks.
+        choices = xml.findall('.//choice')
+        if any(choice.get('correct') is None for choice in choices):
+            return None
+        if xml.find('choicegroup[@answer-pool]') is not None:
+            return None
+        if str(xml.get('partial_credit', default=False)).lower().strip() != 'false':
+            try:
+                for choice in choices:
+                    if choice.get('correct').lower() == 'partial':
+                        float(choice.get('point_value', default='0.5'))
+            except ValueError:
+                return None
+        return super(MultipleChoiceResponse, cls).static_max_points(xml, inputfields)
+
     def get_extended_hints(self, student_answer_dict, new_cmap):
         """
         Extract any hints in a <choicegroup> matching the student's answers
@@ -1583,10 +1631,32 @@ class OptionResponse(LoncapaResponse):
     allowed_inputfields = ['optioninput']
     answer_fields = None
     multi_device_support = True
+    static_scoring = True
 
     def setup_response(self):
         self.answer_fields = self.inputfields
 
+    @classmethod
+    def static_max_points(cls, xml, inputfields):
+        # get_answers, called on instantiation, converts the answers of each
+        # field, including the correct answer that LoncapaProblem's
+        # make_xml_compatible reads from <option> tags.
+        try:
+            for inputfield in inputfields:
+                correct = inputfield.get('correct')
+                for option in inputfield.findall('./option'):
+                    option_name = option.text.strip()
+                    if option.get('correct').upper() == 'TRUE':
+                        correct = option_name
+                for value, convert in [(correct, str), (inputfield.get('partial'), str),
+                                       (inputfield.get('point_values'), float)]:
+                    if value is not None:
+                        for word in value.split(','):
+                            convert(word.strip())
+        except (AttributeError, UnicodeError, ValueError):
+            return None
+        return super(OptionResponse, cls).static_max_points(xml, inputfields)
+
     def grade_via_points(self, problem_map, student_answers):
         """
         Grades dropdown problems with "points"-style partial credit.
@@ -2106,6 +2176,7 @@ class StringResponse(LoncapaResponse):
     max_inputfields = 1
     correct_answer = []
     multi_device_support = True
+    static_scoring = True
 
     def setup_response_backward(self):
         self.correct_answer = [
@@ -2326,6 +2397,7 @@ class CustomResponse(LoncapaResponse):
                            'annotationinput', 'jsinput', 'formulaequationinput']
     code = None
     expect = None
+    static_scoring = True
 
     # Standard amount for partial credit if not otherwise specified:
     default_pc = 0.5
@@ -2399,6 +2471,14 @@ class CustomResponse(LoncapaResponse):
                 else:
                     self.code = answer.text
 
+    @classmethod
+    def static_max_points(cls, xml, inputfields):
+        # setup_response reads an <answer src="..."> from the filesystem.
+        answer = xml.find('.//answer')
+        if answer is not None and answer.get('src') is not None:
+            return None
+        return super(CustomResponse, cls).static_max_points(xml, inputfields)
+
     def get_score(self, student_answers):
         """
         student_answers is a dict with everything from request.POST, but with the first part
@@ -3323,56 +3403,51 @@ class FormulaResponse(LoncapaResponse):
         """
         _ = self.capa_system.i18n.ugettext
 
-        out = []
-        for var_dict in var_dict_list:
-            try:
-                out.append(evaluator(
-                    var_dict,
-                    dict(),
-                    answer,
-                    case_sensitive=self.case_sensitive,
-                ))
-            except UndefinedVariable as err:
+        try:
+            return compile_expression(
+                answer,
+                case_sensitive=self.case_sensitive,
+            ).evaluate_samples(var_dict_list, dict())
+        except UndefinedVariable as err:
+            log.debug(
+                'formularesponse: undefined variable in formula=%s',
+                cgi.escape(answer)
+            )
+            raise StudentInputError(
+                _("Invalid input: {bad_input} not permitted in answer.").format(bad_input=err.message)
+            )
+        except ValueError as err:
+            if 'factorial' in err.message:
+                # This is thrown when fact() or factorial() is used in a formularesponse answer
+                #   that tests on negative and/or non-integer inputs
+                # err.message will be: `factorial() only accepts integral values` or
+                # `factorial() not defined for negative values`
                 log.debug(
-                    'formularesponse: undefined variable in formula=%s',
+                    ('formularesponse: factorial function used in response '
+                     'that tests negative and/or non-integer inputs. '
+                     'Provided answer was: %s'),
                     cgi.escape(answer)
                 )
                 raise StudentInputError(
-                    _("Invalid input: {bad_input} not permitted in answer.").format(bad_input=err.message)
+                    _("factorial function not permitted in answer "
+                      "for this problem. Provided answer was: "
+                      "{bad_input}").format(bad_input=cgi.escape(answer))
                 )
-            except ValueError as err:
-                if 'factorial' in err.message:
-                    # This is thrown when fact() or factorial() is used in a formularesponse answer
-                    #   that tests on negative and/or non-integer inputs
-                    # err.message will be: `factorial() only accepts integral values` or
-                    # `factorial() not defined for negative values`
-                    log.debug(
-                        ('formularesponse: factorial function used in response '
-                         'that tests negative and/or non-integer inputs. '
-                         'Provided answer was: %s'),
-                        cgi.escape(answer)
-                    )
-                    raise StudentInputError(
-                        _("factorial function not permitted in answer "
-                          "for this problem. Provided answer was: "
-                          "{bad_input}").format(bad_input=cgi.escape(answer))
-                    )
-                # If non-factorial related ValueError thrown, handle it the same as any other Exception
-                log.debug('formularesponse: error %s in formula', err)
-                raise StudentInputError(
-                    _("Invalid input: Could not parse '{bad_input}' as a formula.").format(
-                        bad_input=cgi.escape(answer)
-                    )
+            # If non-factorial related ValueError thrown, handle it the same as any other Exception
+            log.debug('formularesponse: error %s in formula', err)
+            raise StudentInputError(
+                _("Invalid input: Could not parse '{bad_input}' as a formula.").format(
+                    bad_input=cgi.escape(answer)
                 )
-            except Exception as err:
-                # traceback.print_exc()
-                log.debug('formularesponse: error %s in formula', err)
-                raise StudentInputError(
-                    _("Invalid input: Could not parse '{bad_input}' as a formula").format(
-                        bad_input=cgi.escape(answer)
-                    )
+            )
+        except Exception as err:
+            # traceback.print_exc()
+            log.debug('formularesponse: error %s in formula', err)
+            raise StudentInputError(
+                _("Invalid input: Could not parse '{bad_input}' as a formula").format(
+                    bad_input=cgi.escape(answer)
                 )
-        return out
+            )
 
     def randomize_variables(self, samples):
         """
@@ -3678,6 +3753,7 @@ class AnnotationResponse(LoncapaResponse):
     allowed_inputfields = ['annotationinput']
     max_inputfields = 1
     default_scoring = {'incorrect': 0, 'partially-correct': 1, 'correct': 2}
+    static_scoring = True
 
     def __init__(self, *args, **kwargs):
         self.scoring_map = {}
@@ -3747,6 +3823,12 @@ class AnnotationResponse(LoncapaResponse):
         correct_points = scoring.get('correct')
         return dict([(inputfield.get('id'), correct_points) for inputfield in self.inputfields])
 
+    @classmethod
+    def static_max_points(cls, xml, inputfields):
+        if super(AnnotationResponse, cls).static_max_points(xml, inputfields) is None:
+            return None
+        return cls.default_scoring.get('correct') * len(inputfields)
+
     def _find_options(self, inputfield):
         """Returns an array of dicts where each dict represents an option. """
         elements = inputfield.findall('./options/option')
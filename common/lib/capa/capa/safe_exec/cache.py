@@ -0,0 +1,99 @@
+"""
+A two-tier cache for safe_exec results.
+
+Problems with the same code and seed produce the same results for every
+student, so results are worth keeping close: a size-bounded LRU in this
+process sits in front of a shared cache (e.g. memcache) that all processes
+use.
+"""
+
+import cPickle as pickle
+import threading
+from collections import OrderedDict
+
+from dogapi import dog_stats_api
+
+
+class SafeExecCache(object):
+    """
+    Cache safe_exec results in this process, in front of a shared `backend`.
+
+    `backend` is an object with .get(key) and .set(key, value) methods, such
+    as a Django cache.  Values are kept locally in pickled form, both to count
+    their size and so that callers can't change what's cached.  At most
+    `max_bytes` of pickled values are kept locally, and values over
+    `max_item_bytes` aren't cached at all.
+    """
+    def __init__(self, backend, max_bytes, max_item_bytes):
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self._local = OrderedDict()
+        self._local_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hit_local': 0, 'hit_shared': 0, 'miss': 0, 'too_large': 0}
+
+    def _count(self, result):
+        """
+        Record a cache lookup or store, by its result.
+        """
+        self.stats[result] += 1
+        dog_stats_api.increment('capa.safe_exec.cache', tags=['result:{}'.format(result)])
+
+    def _store_local(self, key, data):
+        """
+        Keep pickled `data` locally, evicting the least recently used values.
+        """
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old_data = self._local.pop(key, None)
+            if old_data is not None:
+                self._local_bytes -= len(old_data)
+            self._local[key] = data
+            self._local_bytes += len(data)
+            while self._local_bytes > self.max_bytes:
+                _, evicted = self._local.popitem(last=False)
+                self._local_bytes -= len(evicted)
+            local_bytes = self._local_bytes
+        dog_stats_api.gauge('capa.safe_exec.cache.local_bytes', local_bytes)
+
+    def get(self, key):
+        """
+        Return the value for `key`, or None if it isn't cached.
+        """
+        with self._lock:
+            data = self._local.pop(key, None)
+            if data is not None:
+                # Re-insert to mark it as the most recently used.
+                self._local[key] = data
+        if data is not None:
+            self._count('hit_local')
+            return pickle.loads(data)
+
+        value = self.backend.get(key)
+        if value is None:
+            self._count('miss')
+            return None
+        self._count('hit_shared')
+        self._store_local(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        return value
+
+    def set(self, key, value):
+        """
+        Cache `value` for `key` locally and in the shared backend.
+        """
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_item_bytes:
+            self._count('too_large')
+            return
+        self._store_local(key, data)
+        self.backend.set(key, value)
+
+    def clear(self):
+        """
+        Forget everything cached in this process.
+        """
+        with self._lock:
+            self._local.clear()
+            self._local_bytes = 0
@@ -4,6 +4,7 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from . import worker_pool
 from dogapi import dog_stats_api
 
 import hashlib
@@ -46,6 +47,22 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# Globals which differ for every student, but which most code never looks at.
+# They're left out of the cache key for code that doesn't mention them, so
+# that students with the same random seed share cached results.
+UNKEYED_GLOBALS = ("anonymous_student_id",)
+
+
+def configure_worker_pool(size):
+    """
+    Run sandboxed code in a pool of warm codejail workers.
+
+    Up to `size` idle workers are kept with the assumed imports already
+    loaded; each runs a single execution.  A `size` of 0 goes back to starting
+    a new sandbox for every execution.
+    """
+    worker_pool.configure(size, preload=[modname for _, modname in ASSUMED_IMPORTS])
+
 
 def update_hash(hasher, obj):
     """
@@ -99,7 +116,8 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    and the random seed.  Globals in `UNKEYED_GLOBALS` are only taken into account
+    if the code mentions them.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -109,7 +127,10 @@ def safe_exec(
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
+        unkeyed = [name for name in UNKEYED_GLOBALS if name in globals_dict and name not in code]
+        safe_globals = json_safe(dict(
+            (name, value) for name, value in globals_dict.iteritems() if name not in unkeyed
+        ))
         md5er = hashlib.md5()
         md5er.update(repr(code))
         update_hash(md5er, safe_globals)
@@ -131,7 +152,8 @@ def safe_exec(
     if unsafely:
         exec_fn = codejail_not_safe_exec
     else:
-        exec_fn = codejail_safe_exec
+        pool = worker_pool.get_pool()
+        exec_fn = pool.safe_exec if pool is not None else codejail_safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
     try:
@@ -148,6 +170,8 @@ def safe_exec(
     # the globals dict might not be entirely serializable.
     if cache:
         cleaned_results = json_safe(globals_dict)
+        for name in unkeyed:
+            cleaned_results.pop(name, None)
         cache.set(key, (emsg, cleaned_results))
 
     # If an exception happened, raise it now.
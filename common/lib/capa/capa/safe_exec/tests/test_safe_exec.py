@@ -4,12 +4,15 @@ import hashlib
 import os
 import os.path
 import random
+import subprocess
 import textwrap
 import unittest
 
+from mock import patch
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, update_hash, configure_worker_pool, SafeExecCache
+from capa.safe_exec import worker_pool
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -90,6 +93,83 @@ class TestSafeOrNot(unittest.TestCase):
         self.assertEqual(g['files'], os.listdir('/'))
 
 
+class TestWorkerPool(unittest.TestCase):
+    """Test running code in the pool of warm codejail workers."""
+
+    def setUp(self):
+        super(TestWorkerPool, self).setUp()
+        configure_worker_pool(1)
+        self.addCleanup(configure_worker_pool, 0)
+
+    def test_pool_is_used_when_configured(self):
+        with patch.object(worker_pool.jail_code, 'is_configured', return_value=True):
+            with patch.object(worker_pool.WorkerPool, 'safe_exec') as pooled_exec:
+                safe_exec("a = 17", {})
+        self.assertEqual(pooled_exec.call_count, 1)
+
+    def test_pool_not_used_unsafely(self):
+        with patch.object(worker_pool.jail_code, 'is_configured', return_value=True):
+            with patch.object(worker_pool.WorkerPool, 'safe_exec') as pooled_exec:
+                g = {}
+                safe_exec("a = 17", g, unsafely=True)
+        self.assertFalse(pooled_exec.called)
+        self.assertEqual(g['a'], 17)
+
+    def test_pooled_execution(self):
+        # Can't start workers if CodeJail isn't configured for python.
+        if not is_configured("python"):
+            raise SkipTest
+
+        pool = worker_pool.get_pool()
+        pool.warm()
+        worker = pool._idle[0]  # pylint: disable=protected-access
+        g = {}
+        safe_exec("import tempfile\na = int(math.pi)\nf = tempfile.NamedTemporaryFile()\ntmp = f.name", g)
+        self.assertEqual(g['a'], 3)
+        # Temporary files go in the worker's own directory.
+        self.assertTrue(g['tmp'].startswith(worker.tmpdir + os.sep))
+
+        # The worker has been replaced after its job.
+        self.assertNotIn(worker, pool._idle)  # pylint: disable=protected-access
+        self.assertEqual(len(pool._idle), 1)  # pylint: disable=protected-access
+
+        # Nothing from one execution leaks into the next.
+        g = {}
+        safe_exec("import math\nmath.pi = 3\na = 1/2", g)
+        g = {}
+        safe_exec("b = 'a' in globals()\nc = math.pi", g)
+        self.assertEqual(g['b'], False)
+        self.assertNotEqual(g['c'], 3)
+
+    def test_pooled_exceptions_retire_worker(self):
+        if not is_configured("python"):
+            raise SkipTest
+
+        pool = worker_pool.get_pool()
+        pool.warm()
+        worker = pool._idle[0]  # pylint: disable=protected-access
+        with self.assertRaises(SafeExecException) as cm:
+            safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+        self.assertNotIn(worker, pool._idle)  # pylint: disable=protected-access
+
+    def test_hung_job_killed(self):
+        if not is_configured("python"):
+            raise SkipTest
+
+        pool = worker_pool.get_pool()
+        pool.warm()
+        worker = pool._idle[0]  # pylint: disable=protected-access
+        with patch.dict(worker_pool.jail_code.LIMITS, {'REALTIME': 1}):
+            with self.assertRaises(SafeExecException) as cm:
+                safe_exec("import time\ntime.sleep(60)", {})
+        self.assertIn("timed out", cm.exception.message)
+
+        # The worker, and the sandboxed Python under it, are gone.
+        self.assertIsNotNone(worker.process.returncode)
+        self.assertEqual(subprocess.call(["pgrep", "-g", str(worker.process.pid)]), 1)
+
+
 class DictCache(object):
     """A cache implementation over a simple dict, for testing."""
 
@@ -176,6 +256,64 @@ class TestSafeExecCaching(unittest.TestCase):
             except UnicodeEncodeError:
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
+    def test_anonymous_student_id_not_keyed(self):
+        # Code that doesn't use the student's id shares results between students.
+        cache = {}
+        g = {'anonymous_student_id': 'student1'}
+        safe_exec("a = 17", g, cache=DictCache(cache))
+        self.assertEqual(cache.values()[0], (None, {'a': 17}))
+
+        g = {'anonymous_student_id': 'student2'}
+        safe_exec("a = 17", g, cache=DictCache(cache))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(g, {'anonymous_student_id': 'student2', 'a': 17})
+
+        # Code that does use it gets cached per student.
+        safe_exec("a = anonymous_student_id", g, cache=DictCache(cache))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(g['a'], 'student2')
+
+
+class TestSafeExecCache(unittest.TestCase):
+    """Test the two-tier SafeExecCache."""
+
+    def setUp(self):
+        super(TestSafeExecCache, self).setUp()
+        self.shared = {}
+        self.cache = SafeExecCache(DictCache(self.shared), max_bytes=1000, max_item_bytes=500)
+
+    def test_local_then_shared(self):
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.set('key', (None, {'a': [1, 2]}))
+        self.assertEqual(self.shared['key'], (None, {'a': [1, 2]}))
+        self.assertEqual(self.cache.get('key'), (None, {'a': [1, 2]}))
+        self.assertEqual(self.cache.stats['hit_local'], 1)
+
+        # Another process only finds it in the shared cache, then keeps it.
+        other = SafeExecCache(DictCache(self.shared), max_bytes=1000, max_item_bytes=500)
+        self.assertEqual(other.get('key'), (None, {'a': [1, 2]}))
+        self.assertEqual(other.get('key'), (None, {'a': [1, 2]}))
+        self.assertEqual(other.stats, {'hit_local': 1, 'hit_shared': 1, 'miss': 0, 'too_large': 0})
+
+    def test_cached_values_are_copies(self):
+        self.cache.set('key', (None, {'a': [1, 2]}))
+        self.cache.get('key')[1]['a'].append(3)
+        self.assertEqual(self.cache.get('key'), (None, {'a': [1, 2]}))
+
+    def test_size_limits(self):
+        # Too big to cache at all.
+        self.cache.set('huge', (None, {'a': 'x' * 600}))
+        self.assertNotIn('huge', self.shared)
+        self.assertEqual(self.cache.stats['too_large'], 1)
+
+        # The least recently used values are dropped locally to make room.
+        for key in ['one', 'two', 'three']:
+            self.cache.set(key, (None, {'a': 'x' * 400}))
+        self.shared.clear()
+        self.assertIsNone(self.cache.get('one'))
+        self.assertIsNotNone(self.cache.get('two'))
+        self.assertIsNotNone(self.cache.get('three'))
+
 
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
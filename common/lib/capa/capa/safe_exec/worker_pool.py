@@ -0,0 +1,391 @@
+"""
+A pool of warm, sandboxed Python interpreters for running capa code.
+
+`codejail.safe_exec` starts a fresh sandboxed Python for every execution,
+which then has to import numpy, scipy and friends before running a single
+line of course code.  The workers here are started through the same
+configured codejail Python command, user and resource limits, and import the
+assumed modules while they wait for a job sent to them over a pipe.
+
+Jobs and results are JSON, exactly as with `codejail.safe_exec`: the code and
+its JSON-safe globals go in, the JSON-safe globals come back out.
+
+Each worker runs a single job and then exits, so course code can't leave
+anything behind (module state, files) for other courses' or students' code:
+executions are as isolated as with `codejail.safe_exec`.  What the pool saves
+is the wait for the imports, which the replacement workers do while idle.
+"""
+
+import atexit
+import json
+import logging
+import os
+import os.path
+import resource
+import select
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+from codejail import jail_code
+from codejail.safe_exec import json_safe, SafeExecException
+
+log = logging.getLogger(__name__)
+
+# The program each worker runs.  Its arguments are the modules to import
+# before accepting its job.
+WORKER_CODE = """\
+import os
+import resource
+import sys
+import traceback
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+for modname in sys.argv[1:]:
+    try:
+        __import__(modname)
+    except Exception:
+        pass
+
+class DevNull(object):
+    def write(self, *args, **kwargs):
+        pass
+
+requests, results = sys.stdin, sys.stdout
+sys.stdin, sys.stdout = None, DevNull()
+
+ok_types = (type(None), int, long, float, str, unicode, list, tuple, dict)
+bad_keys = ("__builtins__",)
+
+def jsonable(v):
+    if not isinstance(v, ok_types):
+        return False
+    try:
+        json.dumps(v)
+    except Exception:
+        return False
+    return True
+
+line = requests.readline()
+if not line:
+    sys.exit()
+job = json.loads(line)
+
+os.chdir(job["dir"])
+sys.path.extend(job["python_path"])
+if job["cpu"]:
+    # Don't count the time spent importing against the job.
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + 1 + job["cpu"]
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+g_dict = job["globals"]
+error = None
+try:
+    exec job["code"] in g_dict
+except BaseException:
+    error = traceback.format_exc()
+
+g_dict = dict((k, v) for k, v in g_dict.iteritems() if jsonable(v) and k not in bad_keys)
+results.write(json.dumps({"nonce": job["nonce"], "error": error, "globals": g_dict}) + "\\n")
+results.flush()
+"""
+
+# How many CPU seconds a worker may spend importing the assumed modules.
+STARTUP_CPU_SECONDS = 5
+
+
+class WorkerError(Exception):
+    """
+    A worker died, timed out, or sent back something other than a result.
+    """
+    pass
+
+
+class SandboxWorker(object):
+    """
+    One sandboxed Python process, which runs a single job, and the directory
+    it runs in.
+    """
+    def __init__(self, preload):
+        self.homedir = tempfile.mkdtemp(prefix="codejail-pool-")
+        os.chmod(self.homedir, 0755)
+        # The only directory the sandbox user can write to.
+        self.tmpdir = os.path.join(self.homedir, "tmp")
+        os.mkdir(self.tmpdir)
+        os.chmod(self.tmpdir, 0777)
+        with open(os.path.join(self.homedir, "pool_worker"), "w") as worker_file:
+            worker_file.write(WORKER_CODE)
+
+        cmd = []
+        self.user = jail_code.COMMANDS["python"]["user"]
+        if self.user:
+            # sudo resets the environment, so TMPDIR is passed through it.
+            cmd.extend(["sudo", "-u", self.user, "TMPDIR={}".format(self.tmpdir)])
+        cmd.extend(jail_code.COMMANDS["python"]["cmdline_start"])
+        cmd.append("pool_worker")
+        cmd.extend(preload)
+
+        with open(os.devnull, "w") as devnull:
+            self.process = subprocess.Popen(
+                cmd, preexec_fn=self._set_process_limits, cwd=self.homedir,
+                env={"TMPDIR": self.tmpdir}, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=devnull,
+            )
+
+    def _set_process_limits(self):
+        """
+        Set the limits for the worker, as `jail_code` does for one execution.
+
+        The CPU limit covers the imports as well as the job; the job is
+        further limited to `LIMITS["CPU"]` seconds by the worker itself.  The
+        worker gets its own process group, so that `stop` can kill it.
+        """
+        os.setsid()
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+        cpu = jail_code.LIMITS.get("CPU")
+        if cpu:
+            lifetime_cpu = STARTUP_CPU_SECONDS + cpu
+            resource.setrlimit(resource.RLIMIT_CPU, (lifetime_cpu, lifetime_cpu))
+        vmem = jail_code.LIMITS.get("VMEM")
+        if vmem:
+            resource.setrlimit(resource.RLIMIT_AS, (vmem, vmem))
+
+    def execute(self, code, globals_dict, python_path=None, extra_files=None):
+        """
+        Run `code` with `globals_dict` in the worker.
+
+        Return a pair: the traceback if the code raised an exception, else
+        None; and the resulting JSON-safe globals.  Raise `WorkerError` if the
+        worker doesn't produce a result.
+        """
+        jobdir = tempfile.mkdtemp(prefix="job-", dir=self.homedir)
+        try:
+            os.chmod(jobdir, 0755)
+            extra_names = set(name for name, contents in extra_files or ())
+            for name, contents in extra_files or ():
+                with open(os.path.join(jobdir, name), "wb") as extra_file:
+                    extra_file.write(contents)
+
+            # Copy python_path entries in, as `codejail.safe_exec` does, since
+            # the sandbox can only be trusted to read its own directory.
+            job_path = []
+            for pydir in python_path or ():
+                pybase = os.path.basename(pydir)
+                job_path.append(pybase)
+                if pybase in extra_names:
+                    continue
+                dest = os.path.join(jobdir, pybase)
+                if os.path.islink(pydir):
+                    os.symlink(os.readlink(pydir), dest)
+                elif os.path.isfile(pydir):
+                    shutil.copy(pydir, dest)
+                else:
+                    shutil.copytree(pydir, dest, symlinks=True)
+
+            nonce = uuid.uuid4().hex
+            job = {
+                "nonce": nonce,
+                "dir": jobdir,
+                "python_path": job_path,
+                "cpu": jail_code.LIMITS.get("CPU"),
+                "code": code,
+                "globals": json_safe(globals_dict),
+            }
+            try:
+                self.process.stdin.write(json.dumps(job) + "\n")
+                self.process.stdin.flush()
+            except (IOError, OSError) as err:
+                raise WorkerError("Couldn't send job to worker: {}".format(err))
+
+            result = self._read_result(jail_code.LIMITS.get("REALTIME"))
+            if result.get("nonce") != nonce:
+                raise WorkerError("Worker sent back a result for another job")
+            return result["error"], result["globals"]
+        finally:
+            shutil.rmtree(jobdir, ignore_errors=True)
+
+    def _read_result(self, timeout):
+        """
+        Read one line of JSON from the worker, waiting at most `timeout` seconds.
+        """
+        stdout = self.process.stdout.fileno()
+        deadline = time.time() + timeout if timeout else None
+        chunks = []
+        while True:
+            remaining = max(deadline - time.time(), 0) if deadline else None
+            ready, _, _ = select.select([stdout], [], [], remaining)
+            if not ready:
+                raise WorkerError("Worker timed out")
+            chunk = os.read(stdout, 65536)
+            if not chunk:
+                raise WorkerError("Worker exited unexpectedly")
+            chunks.append(chunk)
+            if chunk.endswith("\n"):
+                break
+        try:
+            return json.loads("".join(chunks))
+        except ValueError:
+            raise WorkerError("Worker sent back something other than a result")
+
+    def stop(self):
+        """
+        Kill the worker and remove its directory.
+        """
+        if self.process.poll() is None:
+            try:
+                pgid = os.getpgid(self.process.pid)
+            except OSError:
+                # It exited in the meantime.
+                pgid = None
+            if pgid is not None and pgid != os.getpgrp():
+                if self.user:
+                    # Can't signal it ourselves, since it runs as the sandbox user.
+                    subprocess.call(["sudo", "pkill", "-9", "-g", str(pgid)])
+                else:
+                    try:
+                        os.killpg(pgid, signal.SIGKILL)
+                    except OSError:
+                        pass
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process.wait()
+        shutil.rmtree(self.homedir, ignore_errors=True)
+
+
+class WorkerPool(object):
+    """
+    Idle `SandboxWorker`s, ready to run code.
+
+    Up to `size` idle workers are kept.  When there is no idle worker a new
+    one is started, so executions never wait on each other.  Every worker is
+    retired after its job, and a replacement started straight away so it can
+    import while idle.
+    """
+    def __init__(self, size, preload=()):
+        self.size = size
+        self.preload = list(preload)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._pid = os.getpid()
+
+    def _acquire(self):
+        """
+        Take an idle worker, or start one.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # We were forked: the idle workers belong to the parent.
+                self._idle = []
+                self._pid = os.getpid()
+            if self._idle:
+                return self._idle.pop()
+        return SandboxWorker(self.preload)
+
+    def _retire(self, worker):
+        """
+        Stop `worker`, which has run its job, and start a replacement.
+        """
+        worker.stop()
+        self._replenish()
+
+    def _replenish(self):
+        """
+        Start one worker, if fewer than `size` are idle.
+        """
+        with self._lock:
+            if len(self._idle) >= self.size:
+                return
+        worker = SandboxWorker(self.preload)
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(worker)
+                return
+        worker.stop()
+
+    def warm(self):
+        """
+        Start workers until `size` of them are idle.
+        """
+        with self._lock:
+            missing = self.size - len(self._idle)
+        for _ in xrange(missing):
+            self._replenish()
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        A drop-in replacement for `codejail.safe_exec.safe_exec`.
+
+        Execute `code` in a pooled worker, updating `globals_dict` with the
+        results.  Raise `SafeExecException` if the code fails.
+        """
+        worker = self._acquire()
+        try:
+            error, results = worker.execute(
+                code, globals_dict, python_path=python_path, extra_files=extra_files,
+            )
+        except WorkerError as err:
+            log.warning("Sandbox worker failed running %s: %s", slug, err)
+            raise SafeExecException("Couldn't execute jailed code: {}".format(err))
+        finally:
+            self._retire(worker)
+
+        if error is not None:
+            raise SafeExecException("Couldn't execute jailed code: {}".format(error))
+        globals_dict.update(results)
+
+    def close(self):
+        """
+        Stop all the idle workers.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+            if self._pid != os.getpid():
+                return
+        for worker in idle:
+            worker.stop()
+
+
+_POOL = None
+
+
+def configure(size, preload=()):
+    """
+    Run sandboxed code in a pool of up to `size` idle workers from now on.
+
+    A `size` of 0 turns the pool off again.
+    """
+    global _POOL  # pylint: disable=global-statement
+    if _POOL is not None:
+        _POOL.close()
+    _POOL = WorkerPool(size, preload) if size else None
+
+
+def get_pool():
+    """
+    Return the configured `WorkerPool`, or None if there isn't one.
+
+    The pool is only used once codejail itself is configured for Python.
+    """
+    if _POOL is not None and jail_code.is_configured("python"):
+        return _POOL
+    return None
+
+
+@atexit.register
+def _close_pool():
+    """
+    Don't leave workers behind when the process exits.
+    """
+    if _POOL is not None:
+        _POOL.close()
@@ -0,0 +1,53 @@
+"""
+Tests for the cache of parsed problem trees.
+"""
+import textwrap
+import unittest
+
+from capa.capa_problem import configure_problem_tree_cache, problem_tree_cache
+from .response_xml_factory import StringResponseXMLFactory
+from . import new_loncapa_problem
+
+
+class ProblemTreeCacheTest(unittest.TestCase):
+    """
+    Tests that problems reuse the parsed trees of problems with the same text.
+    """
+    def setUp(self):
+        super(ProblemTreeCacheTest, self).setUp()
+        configure_problem_tree_cache(2)
+        self.addCleanup(configure_problem_tree_cache, 0)
+
+    def test_same_problem(self):
+        xml = StringResponseXMLFactory().build_xml(answer='Michigan')
+        first = new_loncapa_problem(xml)
+        self.assertIsNotNone(problem_tree_cache.get(problem_tree_cache.key(xml)))
+
+        second = new_loncapa_problem(xml)
+        self.assertIsNot(first.tree, second.tree)
+        self.assertEqual(first.problem_text, second.problem_text)
+        self.assertEqual(first.get_html(), second.get_html())
+        self.assertEqual(first.grade_answers({'1_2_1': 'Michigan'}).get_correctness('1_2_1'), 'correct')
+        self.assertEqual(second.grade_answers({'1_2_1': 'Ohio'}).get_correctness('1_2_1'), 'incorrect')
+
+    def test_least_recently_used_evicted(self):
+        xmls = [StringResponseXMLFactory().build_xml(answer=answer) for answer in ('a', 'b', 'c')]
+        for xml in xmls:
+            new_loncapa_problem(xml)
+        self.assertIsNone(problem_tree_cache.get(problem_tree_cache.key(xmls[0])))
+        self.assertIsNotNone(problem_tree_cache.get(problem_tree_cache.key(xmls[2])))
+
+    def test_includes_not_cached(self):
+        xml = textwrap.dedent("""
+            <problem>
+                <include file="does_not_exist.xml"/>
+            </problem>
+        """)
+        new_loncapa_problem(xml)
+        self.assertIsNone(problem_tree_cache.get(problem_tree_cache.key(xml)))
+
+    def test_disabled(self):
+        configure_problem_tree_cache(0)
+        xml = StringResponseXMLFactory().build_xml(answer='Michigan')
+        new_loncapa_problem(xml)
+        self.assertIsNone(problem_tree_cache.get(problem_tree_cache.key(xml)))
@@ -0,0 +1,119 @@
+"""
+Tests for reading the max score of problems from their XML.
+"""
+import textwrap
+import unittest
+
+from mock import patch
+
+from capa import capa_problem
+from capa.capa_problem import get_static_max_score
+from .response_xml_factory import (
+    AnnotationResponseXMLFactory,
+    CustomResponseXMLFactory,
+    MultipleChoiceResponseXMLFactory,
+    NumericalResponseXMLFactory,
+    OptionResponseXMLFactory,
+    StringResponseXMLFactory,
+)
+from . import new_loncapa_problem
+
+
+class StaticMaxScoreTest(unittest.TestCase):
+    """
+    The max score read from a problem's XML must be the one the instantiated
+    problem has.
+    """
+    def assert_max_score(self, xml, expected):
+        """
+        Assert that the static max score of `xml` and that of the problem are `expected`.
+        """
+        self.assertEqual(get_static_max_score(xml), expected)
+        self.assertEqual(new_loncapa_problem(xml).get_max_score(), expected)
+
+    def test_string_responses(self):
+        self.assert_max_score(StringResponseXMLFactory().build_xml(answer='foo', num_responses=3), 3)
+
+    def test_multiple_inputs(self):
+        xml = CustomResponseXMLFactory().build_xml(answer='correct = True', num_inputs=2)
+        self.assert_max_score(xml, 2)
+
+    def test_choice_and_option_responses(self):
+        xml = MultipleChoiceResponseXMLFactory().build_xml(choices=[True, False])
+        self.assert_max_score(xml, 1)
+        xml = OptionResponseXMLFactory().build_xml(options=['a', 'b'], correct_option='a')
+        self.assert_max_score(xml, 1)
+
+    def test_points(self):
+        xml = textwrap.dedent("""
+            <problem>
+                <stringresponse answer="foo">
+                    <textline points="3"/>
+                </stringresponse>
+            </problem>
+        """)
+        self.assert_max_score(xml, 3)
+
+    def test_annotation_response(self):
+        self.assert_max_score(AnnotationResponseXMLFactory().build_xml(), 2)
+
+    def test_no_responses(self):
+        self.assert_max_score("<problem><p>Just text</p></problem>", 0)
+
+    def test_dynamic(self):
+        # Includes can change without the problem changing.
+        self.assertIsNone(get_static_max_score('<problem><include file="problem.xml"/></problem>'))
+        # Broken problems have to be instantiated to find out how they fail.
+        self.assertIsNone(get_static_max_score('<problem><stringresponse>'))
+        self.assertIsNone(get_static_max_score(
+            '<problem><stringresponse answer="foo"><textline points="x"/></stringresponse></problem>'
+        ))
+        self.assertIsNone(get_static_max_score(
+            '<problem><stringresponse><textline/></stringresponse></problem>'
+        ))
+
+    def test_broken_setup(self):
+        # Responses that fail to set up make the problem fail to load, so
+        # they can't be counted.
+        broken = [
+            '<problem><multiplechoiceresponse><choicegroup>'
+            '<choice>No correct attribute</choice>'
+            '</choicegroup></multiplechoiceresponse></problem>',
+            '<problem><optionresponse>'
+            '<optioninput options="(\'a\',\'b\')" correct="a" partial="b" point_values="x"/>'
+            '</optionresponse></problem>',
+            '<problem><optionresponse><optioninput>'
+            '<option>No correct attribute</option>'
+            '</optioninput></optionresponse></problem>',
+        ]
+        for xml in broken:
+            self.assertIsNone(get_static_max_score(xml))
+            with self.assertRaises(Exception):
+                new_loncapa_problem(xml)
+
+    def test_unsupported(self):
+        # Scripts, and response types that can fail to set up for reasons the
+        # XML doesn't show, need the problem to be instantiated.
+        xml = StringResponseXMLFactory().build_xml(answer='$answer')
+        self.assertIsNone(get_static_max_score(
+            xml.replace('<problem>', '<problem><script type="loncapa/python">answer = "foo"</script>')
+        ))
+        self.assertIsNone(get_static_max_score(NumericalResponseXMLFactory().build_xml(answer=5)))
+        self.assertIsNone(get_static_max_score(
+            MultipleChoiceResponseXMLFactory().build_xml(choices=[True, False]).replace(
+                '<choicegroup', '<choicegroup answer-pool="2"'
+            )
+        ))
+        self.assertIsNone(get_static_max_score(
+            '<problem><customresponse><textline/><answer src="check.py"/></customresponse></problem>'
+        ))
+
+    def test_remembered(self):
+        xml = StringResponseXMLFactory().build_xml(answer='foo', num_responses=2)
+        # pylint: disable=protected-access
+        read_static_max_score = capa_problem._read_static_max_score
+        with patch.dict(capa_problem._static_max_scores, clear=True):
+            with patch('capa.capa_problem._read_static_max_score', wraps=read_static_max_score) as read:
+                self.assertEqual(get_static_max_score(xml), 2)
+                self.assertEqual(get_static_max_score(xml), 2)
+        self.assertEqual(read.call_count, 1)
@@ -9,6 +9,7 @@ from pkg_resources import resource_string
 import dogstats_wrapper as dog_stats_api
 from .capa_base import CapaMixin, CapaFields, ComplexEncoder
 from capa import responsetypes
+from capa.capa_problem import get_static_max_score
 from .progress import Progress
 from xmodule.x_module import XModule, module_attr, DEPRECATION_VSCOMPAT_EVENT
 from xmodule.raw_module import RawDescriptor
@@ -189,6 +190,14 @@ class CapaDescriptor(CapaFields, RawDescriptor):
         registered_tags = responsetypes.registry.registered_tags()
         return set([node.tag for node in tree.iter() if node.tag in registered_tags])
 
+    def static_max_score(self):
+        """
+        Return the problem's max score, read from its XML without
+        instantiating it, or None if the problem has to be instantiated to
+        find it.
+        """
+        return get_static_max_score(self.data)
+
     def index_dictionary(self):
         """
         Return dictionary prepared with module content and type for indexing.
@@ -177,9 +177,24 @@ class StaticContentStream(StaticContent):
                                                   length=length, locked=locked)
         self._stream = stream
 
+    def _read_chunk(self):
+        """
+        Read the next chunk of the stream.
+
+        GridFS files are read a whole GridFS chunk at a time (or the rest of the
+        current one, after a seek): one query per chunk, and no copying the data
+        into a buffer to split it up again.  Other streams are read
+        STREAM_DATA_CHUNK_SIZE bytes at a time.
+        """
+        readchunk = getattr(self._stream, 'readchunk', None)
+        if readchunk is not None:
+            return readchunk()
+        return self._stream.read(STREAM_DATA_CHUNK_SIZE)
+
     def stream_data(self):
+        self._stream.seek(0)
         while True:
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
+            chunk = self._read_chunk()
             if len(chunk) == 0:
                 break
             yield chunk
@@ -189,14 +204,14 @@ class StaticContentStream(StaticContent):
         Stream the data between first_byte and last_byte (included)
         """
         self._stream.seek(first_byte)
-        position = first_byte
-        while True:
-            if last_byte < position + STREAM_DATA_CHUNK_SIZE - 1:
-                chunk = self._stream.read(last_byte - position + 1)
-                yield chunk
+        remaining = last_byte - first_byte + 1
+        while remaining > 0:
+            chunk = self._read_chunk()
+            if len(chunk) == 0:
                 break
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
-            position += STREAM_DATA_CHUNK_SIZE
+            if len(chunk) > remaining:
+                chunk = chunk[:remaining]
+            remaining -= len(chunk)
             yield chunk
 
     def close(self):
@@ -554,6 +554,19 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         except NotImplementedError:
             return None, None
 
+    def get_structure_changes(self, course_key, from_version):
+        """
+        Compare the course's structure on course_key's branch with the
+        version from_version, returning the current version and the blocks
+        added, removed and changed since (see
+        SplitMongoModuleStore.get_structure_changes).
+
+        Raises NotImplementedError if the course isn't in a store with
+        versioned structures.
+        """
+        store = self._verify_modulestore_support(course_key, 'get_structure_changes')
+        return store.get_structure_changes(course_key, from_version)
+
     def get_modulestore_type(self, course_id):
         """
         Returns a type which identifies which modulestore is servicing the given course_id.
@@ -2,7 +2,7 @@
 General utilities
 """
 
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 from contracts import contract, check
 from opaque_keys.edx.locator import BlockUsageLocator
 
@@ -21,3 +21,32 @@ class BlockKey(namedtuple('BlockKey', 'type id')):
 
 
 CourseEnvelope = namedtuple('CourseEnvelope', 'course_key structure')
+
+
+class StructureIndex(object):
+    """
+    Secondary indexes over the blocks of a structure, so that queries for
+    blocks of a given type or id, or for the parents of a block, don't have to
+    scan every block.
+    """
+    def __init__(self, blocks):
+        self.keys_by_type = defaultdict(list)
+        self.keys_by_id = defaultdict(list)
+        for block_key in blocks:
+            self.keys_by_type[block_key.type].append(block_key)
+            self.keys_by_id[block_key.id].append(block_key)
+        self._parent_map = None
+
+    def parents_of(self, block_key, blocks):
+        """
+        Return the keys of the parents of `block_key`. `blocks` must be the
+        blocks this index was built from; the parent map is built from their
+        children the first time it is needed.
+        """
+        if self._parent_map is None:
+            parent_map = defaultdict(list)
+            for parent_key, block in blocks.iteritems():
+                for child in block.fields.get('children', []):
+                    parent_map[child].append(parent_key)
+            self._parent_map = dict(parent_map)
+        return list(self._parent_map.get(block_key, []))
@@ -1,6 +1,7 @@
 """
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
+import copy
 import datetime
 import cPickle as pickle
 import math
@@ -8,11 +9,14 @@ import zlib
 import pymongo
 import pytz
 import re
+import threading
+from collections import OrderedDict
 from contextlib import contextmanager
 from time import time
 
 # Import this just to export it
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
+from django.conf import settings
 from django.core.cache import get_cache, InvalidCacheBackendError
 import dogstats_wrapper as dog_stats_api
 
@@ -207,28 +211,158 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+class LazyBlockData(BlockData):
+    """
+    A :class:`BlockData` read out of the :class:`CourseStructureCache`. Only
+    its `block_type` is known up front; the rest of the block is unpickled the
+    first time any of it is used, since most requests only touch a handful of
+    the blocks in a structure.
+    """
+    def __init__(self, block_type, pickled_block):  # pylint: disable=super-init-not-called
+        self.definition_loaded = False
+        self.block_type = block_type
+        self._pickled_block = pickled_block
+
+    def _decode(self):
+        """
+        Unpickle the block, if it hasn't been already.
+        """
+        if '_pickled_block' in self.__dict__:
+            self.from_storable(pickle.loads(self.__dict__.pop('_pickled_block')))
+
+    def __getattr__(self, name):
+        # This is only called for attributes that haven't been set, i.e. the
+        # ones that are still pickled. Special names are looked up by copy and
+        # pickle, which don't need the block to be decoded.
+        if name.startswith('__') or '_pickled_block' not in self.__dict__:
+            raise AttributeError(name)
+        self._decode()
+        return getattr(self, name)
+
+    def __setattr__(self, name, value):
+        # Decode the block before changing it, or decoding it later would
+        # overwrite the change with the stored value.
+        if name not in ('definition_loaded', '_pickled_block'):
+            self._decode()
+        super(LazyBlockData, self).__setattr__(name, value)
+
+    def __deepcopy__(self, memo):
+        copied = LazyBlockData.__new__(LazyBlockData)
+        memo[id(self)] = copied
+        # The pickled block is never changed, so an undecoded copy can share
+        # it and decode it on its own.
+        for name, value in self.__dict__.iteritems():
+            object.__setattr__(copied, name, copy.deepcopy(value, memo))
+        return copied
+
+
+def compile_structure(structure):
+    """
+    Convert a structure (as returned by :func:`structure_from_mongo`) into the
+    form kept by the :class:`CourseStructureCache`: a tuple of the pickled
+    top-level fields and an index of `(block_type, block_id, pickled_block)`
+    for every block.
+    """
+    header = dict(structure)
+    blocks = header.pop('blocks')
+    return (
+        pickle.dumps(header, pickle.HIGHEST_PROTOCOL),
+        [
+            (block_key.type, block_key.id, pickle.dumps(block.to_storable(), pickle.HIGHEST_PROTOCOL))
+            for block_key, block in blocks.iteritems()
+        ],
+    )
+
+
+def structure_from_compiled(compiled_structure):
+    """
+    Build a new structure from the output of :func:`compile_structure`. Its
+    blocks are :class:`LazyBlockData` which are only unpickled when used.
+    """
+    pickled_header, block_index = compiled_structure
+    structure = pickle.loads(pickled_header)
+    structure['blocks'] = {
+        BlockKey(block_type, block_id): LazyBlockData(block_type, pickled_block)
+        for block_type, block_id, pickled_block in block_index
+    }
+    return structure
+
+
+class StructureLRU(object):
+    """
+    A process-local, least-recently-used cache of data derived from
+    structures (such as compiled structures, see :func:`compile_structure`),
+    keyed by structure id. Structures are immutable once saved, so entries
+    never need to be invalidated.
+    """
+    def __init__(self):
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the value cached for `key`, or None."""
+        with self._lock:
+            value = self._values.pop(key, None)
+            if value is not None:
+                self._values[key] = value
+            return value
+
+    def set(self, key, value, max_size):
+        """Cache `value`, keeping at most `max_size` values."""
+        with self._lock:
+            self._values.pop(key, None)
+            self._values[key] = value
+            while len(self._values) > max_size:
+                self._values.popitem(last=False)
+
+    def clear(self):
+        """Remove every value from the cache."""
+        with self._lock:
+            self._values.clear()
+
+
+STRUCTURE_LRU = StructureLRU()
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
-    The course structures are pickled and compressed when cached.
+    The course structures are compiled (see :func:`compile_structure`),
+    pickled and compressed when cached.
+
+    Compiled structures are also kept in a process-local LRU cache of
+    `settings.COURSE_STRUCTURE_LRU_SIZE` structures in front of the django
+    cache, which saves the round trip and the decompression.
 
     If the 'course_structure_cache' doesn't exist, then don't do anything for
     for set and get.
     """
+    # Bump this whenever the format of the cached data changes.
+    CACHE_VERSION = 2
+
     def __init__(self):
         self.no_cache_found = False
         try:
             self.cache = get_cache('course_structure_cache')
         except InvalidCacheBackendError:
             self.no_cache_found = True
+        self.lru_size = getattr(settings, 'COURSE_STRUCTURE_LRU_SIZE', 0)
 
     def get(self, key, course_context=None):
-        """Pull the compressed, pickled struct data from cache and deserialize."""
+        """
+        Return the structure cached under `key`, or None. Its blocks are only
+        unpickled as they are used.
+        """
+        if self.lru_size:
+            compiled_structure = STRUCTURE_LRU.get(key)
+            if compiled_structure is not None:
+                return structure_from_compiled(compiled_structure)
+
         if self.no_cache_found:
             return None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
-            compressed_pickled_data = self.cache.get(key)
+            compressed_pickled_data = self.cache.get(key, version=self.CACHE_VERSION)
             tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
 
             if compressed_pickled_data is None:
@@ -241,15 +375,24 @@ class CourseStructureCache(object):
             pickled_data = zlib.decompress(compressed_pickled_data)
             tagger.measure('uncompressed_size', len(pickled_data))
 
-            return pickle.loads(pickled_data)
+            compiled_structure = pickle.loads(pickled_data)
+            if self.lru_size:
+                STRUCTURE_LRU.set(key, compiled_structure, self.lru_size)
+            return structure_from_compiled(compiled_structure)
 
     def set(self, key, structure, course_context=None):
-        """Given a structure, will pickle, compress, and write to cache."""
-        if self.no_cache_found:
+        """Given a structure, will compile, pickle, compress, and write to cache."""
+        if self.no_cache_found and not self.lru_size:
             return None
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
-            pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
+            compiled_structure = compile_structure(structure)
+            if self.lru_size:
+                STRUCTURE_LRU.set(key, compiled_structure, self.lru_size)
+            if self.no_cache_found:
+                return None
+
+            pickled_data = pickle.dumps(compiled_structure, pickle.HIGHEST_PROTOCOL)
             tagger.measure('uncompressed_size', len(pickled_data))
 
             # 1 = Fastest (slightly larger results)
@@ -257,7 +400,7 @@ class CourseStructureCache(object):
             tagger.measure('compressed_size', len(compressed_pickled_data))
 
             # Stuctures are immutable, so we set a timeout of "never"
-            self.cache.set(key, compressed_pickled_data, None)
+            self.cache.set(key, compressed_pickled_data, None, version=self.CACHE_VERSION)
 
 
 class MongoConnection(object):
@@ -79,8 +79,8 @@ from xmodule.modulestore import (
 
 from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
-from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError, StructureLRU
+from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope, StructureIndex
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
 from types import NoneType
@@ -110,6 +110,11 @@ log = logging.getLogger(__name__)
 # When blacklists are this, all children should be excluded
 EXCLUDE_ALL = '*'
 
+# Indexes of the blocks of recently queried structures (see
+# SplitMongoModuleStore._get_structure_index), and how many to keep.
+STRUCTURE_INDEXES = StructureLRU()
+STRUCTURE_INDEXES_SIZE = 64
+
 
 new_contract('BlockUsageLocator', BlockUsageLocator)
 new_contract('BlockKey', BlockKey)
@@ -427,8 +432,9 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
                     definitions.append(definition)
 
         if len(ids):
-            # Query the db for the definitions.
-            defs_from_db = self.db_connection.get_definitions(list(ids), course_key)
+            # Query the db for the definitions. The result is read twice below,
+            # so it can't be left as a cursor.
+            defs_from_db = list(self.db_connection.get_definitions(list(ids), course_key))
             # Add the retrieved definitions to the cache.
             bulk_write_record.definitions.update({d.get('_id'): d for d in defs_from_db})
             definitions.extend(defs_from_db)
@@ -1075,35 +1081,48 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return []
 
         course = self._lookup_course(course_locator)
-        items = []
+        blocks = course.structure['blocks']
+        index = self._get_structure_index(course)
         qualifiers = qualifiers.copy() if qualifiers else {}  # copy the qualifiers (destructively manipulated here)
 
         def _block_matches_all(block_data):
             """
-            Check that the block matches all the criteria
+            Check that the block matches all the criteria which don't require loading any additional data
             """
-            # do the checks which don't require loading any additional data
-            if (  # pylint: disable=bad-continuation
-                self._block_matches(block_data, qualifiers) and
-                self._block_matches(block_data.fields, settings)
-            ):
-                if content:
-                    definition_block = self.get_definition(course_locator, block_data.definition)
-                    return self._block_matches(definition_block['fields'], content)
-                else:
-                    return True
+            # Check the settings first: reading the fields decodes the whole block
+            # (see LazyBlockData), which the qualifiers are matched against.
+            return (  # pylint: disable=bad-continuation
+                self._block_matches(block_data.fields, settings) and
+                self._block_matches(block_data, qualifiers)
+            )
+
+        def _matching_block_keys(candidates):
+            """
+            Return the keys of those `candidates` whose blocks match all the criteria
+            """
+            block_keys = [block_key for block_key in candidates if _block_matches_all(blocks[block_key])]
+            if content and block_keys:
+                # Load all of the remaining definitions at once
+                definitions = {
+                    definition['_id']: definition
+                    for definition in self.get_definitions(
+                        course_locator, [blocks[block_key].definition for block_key in block_keys]
+                    )
+                }
+                block_keys = [
+                    block_key for block_key in block_keys
+                    if blocks[block_key].definition in definitions and
+                    self._block_matches(definitions[blocks[block_key].definition]['fields'], content)
+                ]
+            return block_keys
 
         if settings is None:
             settings = {}
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
-            block_ids = []
-            for block_id, block in course.structure['blocks'].iteritems():
-                if block_name == block_id.id and _block_matches_all(block):
-                    block_ids.append(block_id)
-
-            return self._load_items(course, block_ids, **kwargs)
+            candidates = index.keys_by_id.get(block_name, []) if isinstance(block_name, basestring) else []
+            return self._load_items(course, _matching_block_keys(candidates), **kwargs)
 
         if 'category' in qualifiers:
             qualifiers['block_type'] = qualifiers.pop('category')
@@ -1111,15 +1130,54 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # don't expect caller to know that children are in fields
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
-                items.append(block_id)
 
+        # Only look at the blocks of the right type, if we can tell what that is
+        block_type = qualifiers.get('block_type')
+        if isinstance(block_type, basestring):
+            candidates = index.keys_by_type.get(block_type, [])
+        elif (  # pylint: disable=bad-continuation
+            isinstance(block_type, dict) and block_type.keys() == ['$in'] and
+            all(isinstance(value, basestring) for value in block_type['$in'])
+        ):
+            candidates = [
+                block_key
+                for value in set(block_type['$in'])
+                for block_key in index.keys_by_type.get(value, [])
+            ]
+        else:
+            candidates = blocks.keys()
+
+        items = _matching_block_keys(candidates)
         if len(items) > 0:
             return self._load_items(course, items, depth=0, **kwargs)
         else:
             return []
 
+    def _get_structure_index(self, course_entry):
+        """
+        Return the :class:`StructureIndex` of the blocks of the structure in
+        `course_entry`.
+
+        Saved structures never change, so their indexes are cached across
+        requests. Structures which are still being built by the current bulk
+        operation are indexed afresh every time.
+        """
+        structure = course_entry.structure
+        structure_id = structure['_id']
+        bulk_write_record = self._get_bulk_ops_record(course_entry.course_key)
+        if (  # pylint: disable=bad-continuation
+            bulk_write_record.active and
+            structure_id in bulk_write_record.structures and
+            structure_id not in bulk_write_record.structures_in_db
+        ):
+            return StructureIndex(structure['blocks'])
+
+        index = STRUCTURE_INDEXES.get(structure_id)
+        if index is None:
+            index = StructureIndex(structure['blocks'])
+            STRUCTURE_INDEXES.set(structure_id, index, STRUCTURE_INDEXES_SIZE)
+        return index
+
     def get_parent_location(self, locator, **kwargs):
         """
         Return the location (Locators w/ block_ids) for the parent of this location in this
@@ -1133,7 +1191,9 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        parent_ids = self._get_structure_index(course).parents_of(
+            BlockKey.from_usage_key(locator), course.structure['blocks']
+        )
         if len(parent_ids) == 0:
             return None
         # find alphabetically least
@@ -1342,6 +1402,51 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return usage_key, block.edit_info.original_usage_version
         return None, None
 
+    def get_structure_changes(self, course_key, from_version):
+        """
+        Compare the blocks of the structure on course_key's branch with those
+        of the structure whose version guid is from_version.
+
+        Returns the version guid of the current structure, and a dict of lists
+        of the usage keys of the blocks 'added' since from_version, 'removed'
+        since it, and 'changed' since it (those with a different update_version,
+        which includes every block of a republished subtree; note that the
+        parent of a newly published subtree keeps its update_version).  The dict
+        is None if from_version is None or can't be found, since there's nothing
+        to compare with.
+        """
+        course = self._lookup_course(course_key)
+        version_guid = course.course_key.version_guid
+        if from_version is None:
+            return version_guid, None
+        old_structures = self.db_connection.find_structures_by_id(
+            [course_key.as_object_id(from_version)], course_context=course_key
+        )
+        if not old_structures:
+            return version_guid, None
+
+        new_blocks = course.structure['blocks']
+        old_blocks = old_structures[0]['blocks']
+        course_locator = course_key.version_agnostic().for_branch(None)
+
+        def usage_keys(block_keys):
+            """
+            The usage keys of block_keys, in a stable order.
+            """
+            return [
+                course_locator.make_usage_key(block_key.type, block_key.id) for block_key in sorted(block_keys)
+            ]
+
+        return version_guid, {
+            'added': usage_keys(set(new_blocks) - set(old_blocks)),
+            'removed': usage_keys(set(old_blocks) - set(new_blocks)),
+            'changed': usage_keys(
+                block_key for block_key, block in new_blocks.iteritems()
+                if block_key in old_blocks and
+                block.edit_info.update_version != old_blocks[block_key].edit_info.update_version
+            ),
+        }
+
     def create_definition_from_data(self, course_key, new_def_data, category, user_id):
         """
         Pull the definition fields out of descriptor and save to the db as a new definition
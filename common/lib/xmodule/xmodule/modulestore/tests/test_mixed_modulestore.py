@@ -1184,6 +1184,40 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
             (child_to_delete_location, None, ModuleStoreEnum.RevisionOption.published_only),
         ])
 
+    @ddt.data('split')
+    def test_get_structure_changes(self, default_ms):
+        self.initdb(default_ms)
+        self._create_block_hierarchy()
+        published_key = self.course.id.for_branch(ModuleStoreEnum.BranchName.published)
+
+        # publish the course
+        self.store.publish(self.course.location, self.user_id)
+        from_version, changes = self.store.get_structure_changes(published_key, None)
+        self.assertIsNone(changes)
+
+        # delete one problem, and republish the vertical which held it
+        self.store.delete_item(self.problem_x1a_1, self.user_id)
+        self.store.publish(self.vertical_x1a, self.user_id)
+
+        version, changes = self.store.get_structure_changes(published_key, from_version)
+        self.assertNotEqual(version, from_version)
+        self.assertEqual(changes, {
+            'added': [],
+            'removed': [self.problem_x1a_1],
+            'changed': [self.problem_x1a_2, self.problem_x1a_3, self.vertical_x1a],
+        })
+        self.assertEqual(
+            self.store.get_structure_changes(published_key, version),
+            (version, {'added': [], 'removed': [], 'changed': []})
+        )
+
+    @ddt.data('draft')
+    def test_get_structure_changes_unsupported(self, default_ms):
+        self.initdb(default_ms)
+        self._create_block_hierarchy()
+        with self.assertRaises(NotImplementedError):
+            self.store.get_structure_changes(self.course.id, None)
+
     @ddt.data('draft')
     def test_get_parent_location_draft(self, default_ms):
         """
@@ -2,6 +2,7 @@
     Test split modulestore w/o using any django stuff.
 """
 from mock import patch
+import copy
 import datetime
 from importlib import import_module
 from path import path
@@ -13,6 +14,7 @@ import uuid
 from contracts import contract
 from nose.plugins.attrib import attr
 from django.core.cache import get_cache, InvalidCacheBackendError
+from django.test.utils import override_settings
 
 from openedx.core.lib import tempdir
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict
@@ -27,6 +29,7 @@ from opaque_keys.edx.locator import CourseLocator, BlockUsageLocator, VersionTre
 from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.x_module import XModuleMixin
 from xmodule.fields import Date, Timedelta
+from xmodule.modulestore.split_mongo.mongo_connection import LazyBlockData, STRUCTURE_LRU
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
 from xmodule.modulestore.split_mongo import BlockKey
@@ -837,6 +840,70 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_cached_blocks_decoded_lazily(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+
+        not_cached_structure = self._get_structure(self.new_course)
+        cached_structure = self._get_structure(self.new_course)
+
+        block_key = cached_structure['root']
+        cached_block = cached_structure['blocks'][block_key]
+        self.assertIsInstance(cached_block, LazyBlockData)
+        self.assertEqual(cached_block.block_type, 'course')
+        self.assertIn('_pickled_block', cached_block.__dict__)
+
+        # The block is only decoded once it is used.
+        self.assertEqual(cached_block.fields, not_cached_structure['blocks'][block_key].fields)
+        self.assertNotIn('_pickled_block', cached_block.__dict__)
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_cached_block_changes_kept(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+
+        self._get_structure(self.new_course)
+        cached_structure = copy.deepcopy(self._get_structure(self.new_course))
+
+        # Changes made before the block is decoded must survive decoding.
+        cached_block = cached_structure['blocks'][cached_structure['root']]
+        self.assertIn('_pickled_block', cached_block.__dict__)
+        cached_block.fields = {'display_name': 'changed'}
+        cached_block.definition = 'new definition'
+        self.assertEqual(cached_block.fields, {'display_name': 'changed'})
+        self.assertEqual(cached_block.definition, 'new definition')
+        self.assertEqual(cached_block.block_type, 'course')
+
+        # The cached structure itself is left unchanged.
+        other_block = self._get_structure(self.new_course)['blocks'][cached_structure['root']]
+        self.assertNotEqual(other_block.fields, {'display_name': 'changed'})
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_process_local_cache(self, mock_get_cache):
+        mock_get_cache.side_effect = InvalidCacheBackendError
+        STRUCTURE_LRU.clear()
+        self.addCleanup(STRUCTURE_LRU.clear)
+
+        with override_settings(COURSE_STRUCTURE_LRU_SIZE=1):
+            with check_mongo_calls(1):
+                not_cached_structure = self._get_structure(self.new_course)
+
+            # The structure is kept in the process, even with no
+            # course_structure_cache configured.
+            with check_mongo_calls(0):
+                cached_structure = self._get_structure(self.new_course)
+            self.assertEqual(cached_structure, not_cached_structure)
+
+            # Each caller gets its own copy of the structure.
+            self.assertIsNot(self._get_structure(self.new_course), cached_structure)
+
+            # Fetching another structure pushes this one out.
+            other_course = modulestore().create_course(
+                'org', 'other_course', 'test_run', self.user, BRANCH_NAME_DRAFT,
+            )
+            self._get_structure(other_course)
+            with check_mongo_calls(1):
+                self._get_structure(self.new_course)
+
     def _get_structure(self, course):
         """
         Helper function to get a structure from a course.
@@ -1054,6 +1121,31 @@ class SplitModuleItemTests(SplitModuleTest):
         matches = modulestore().get_items(locator, settings={'group_access': {'$exists': False}})
         self.assertEqual(len(matches), 6)
 
+    def test_get_items_indexed(self):
+        """
+        get_items queries answered from the structure's indexes
+        """
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        matches = modulestore().get_items(locator, qualifiers={'category': {'$in': ['chapter', 'course']}})
+        self.assertEqual(len(matches), 4)
+        matches = modulestore().get_items(locator, qualifiers={'name': 'chapter1'})
+        self.assertEqual([match.location.block_id for match in matches], ['chapter1'])
+        matches = modulestore().get_items(locator, qualifiers={'name': 'chapter1', 'category': 'garbage'})
+        self.assertEqual(len(matches), 0)
+
+        # The definitions needed to match content are loaded in one query
+        db_connection = modulestore().db_connection
+        with patch.object(db_connection, 'get_definitions', wraps=db_connection.get_definitions) as get_definitions:
+            with patch.object(db_connection, 'get_definition') as get_definition:
+                matches = modulestore().get_items(
+                    locator,
+                    qualifiers={'category': 'chapter'},
+                    content={'no_such_field': {'$exists': False}},
+                )
+        self.assertEqual(len(matches), 3)
+        self.assertEqual(get_definitions.call_count, 1)
+        self.assertFalse(get_definition.called)
+
     def test_get_parents(self):
         '''
         get_parent_location(locator): BlockUsageLocator
@@ -83,6 +83,19 @@ class FakeGridFsItem(object):
         return chunk
 
 
+class FakeChunkedGridFsItem(FakeGridFsItem):
+    """
+    A GridFS item which, like GridOut, can be read one GridFS chunk at a time
+    """
+    chunk_size = 700
+
+    def readchunk(self):
+        """
+        Read the rest of the chunk at position cursor and move the cursor
+        """
+        return self.read(self.chunk_size - self.cursor % self.chunk_size)
+
+
 @ddt.ddt
 class ContentTest(unittest.TestCase):
     def test_thumbnail_none(self):
@@ -164,6 +177,26 @@ class ContentTest(unittest.TestCase):
 
         self.assertEqual(total_length, last_byte - first_byte + 1)
 
+    @ddt.data((0, None), (100, 1500), (700, 1399), (5, 5))
+    @ddt.unpack
+    def test_static_content_stream_gridfs_chunks(self, first_byte, last_byte):
+        """
+        Test that StaticContentStream reads GridFS items a GridFS chunk at a
+        time, and still returns exactly the requested bytes
+        """
+        item = FakeChunkedGridFsItem(SAMPLE_STRING)
+        static_content_stream = StaticContentStream('loc', 'name', 'type', item, length=item.length)
+
+        if last_byte is None:
+            chunks = list(static_content_stream.stream_data())
+            expected = SAMPLE_STRING
+        else:
+            chunks = list(static_content_stream.stream_data_in_range(first_byte, last_byte))
+            expected = SAMPLE_STRING[first_byte:last_byte + 1]
+
+        self.assertEqual(''.join(chunks), expected)
+        self.assertTrue(all(len(chunk) <= FakeChunkedGridFsItem.chunk_size for chunk in chunks))
+
     def test_static_content_write_js(self):
         """
         Test that only one filename starts with 000.
@@ -151,6 +151,65 @@ class Optout(models.Model):
 COURSE_EMAIL_MESSAGE_BODY_TAG = '{{message_body}}'
 
 
+# Fields of the email context which are different for each recipient.
+RECIPIENT_CONTEXT_FIELDS = ('name', 'email', 'user_id')
+
+
+class CourseEmailRenderer(object):
+    """
+    Renders one message (plain text or HTML) of a course email for each of
+    its recipients, as CourseEmailTemplate would.
+
+    The template is formatted with the context shared by all recipients, and
+    the lines which are the same for all of them are wrapped, once, when the
+    renderer is created.  Rendering the message for a recipient only fills in
+    their values, and wraps the lines which contain them.
+    """
+    # Stands in for a recipient's value, until it's filled in.
+    SLOT = u'\x00{}\x00'
+
+    def __init__(self, format_string, message_body, context):
+        self.message_body = message_body
+        # Keywords in the message body have to be substituted for each recipient.
+        self.body_has_keywords = '%%' in message_body
+
+        self.fields = [field for field in RECIPIENT_CONTEXT_FIELDS if field in context]
+        slot_context = dict(context)
+        for field in self.fields:
+            slot_context[field] = self.SLOT.format(field)
+        result = format_string.format(**slot_context)
+        body = self.SLOT.format('message_body') if self.body_has_keywords else message_body
+        result = result.replace(COURSE_EMAIL_MESSAGE_BODY_TAG.format(), body, 1)
+
+        # Lines with slots are kept to be filled in and wrapped for each recipient.
+        self.lines = [
+            (line, True) if u'\x00' in line else (wrap_message(line), False)
+            for line in result.split('\n')
+        ]
+
+    def render(self, context):
+        """
+        Render the message for the recipient whose values are in `context`,
+        which is the context the renderer was created with, updated for them.
+        """
+        if self.body_has_keywords and 'user_id' in context and 'course_id' in context:
+            body = substitute_keywords_with_data(self.message_body, context)
+        else:
+            body = self.message_body
+        values = [(self.SLOT.format(field), u'{}'.format(context[field])) for field in self.fields]
+        # The message body goes in last, so that nothing is substituted in it.
+        values.append((self.SLOT.format('message_body'), body))
+
+        lines = []
+        for line, has_slots in self.lines:
+            if has_slots:
+                for slot, value in values:
+                    line = line.replace(slot, value)
+                line = wrap_message(line)
+            lines.append(line)
+        return u'\n'.join(lines)
+
+
 class CourseEmailTemplate(models.Model):
     """
     Stores templates for all emails to a course to use.
@@ -228,6 +287,20 @@ class CourseEmailTemplate(models.Model):
         """
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
 
+    def get_plaintext_renderer(self, plaintext, context):
+        """
+        Return a CourseEmailRenderer of the plain text message for the plain
+        text body (`plaintext`), for recipients sharing the `context` dict.
+        """
+        return CourseEmailRenderer(self.plain_template, plaintext, context)
+
+    def get_htmltext_renderer(self, htmltext, context):
+        """
+        Return a CourseEmailRenderer of the HTML message for the HTML body
+        (`htmltext`), for recipients sharing the `context` dict.
+        """
+        return CourseEmailRenderer(self.html_template, htmltext, context)
+
 
 class CourseAuthorization(models.Model):
     """
@@ -257,6 +330,20 @@ class CourseAuthorization(models.Model):
         except cls.DoesNotExist:
             return False
 
+    @classmethod
+    def instructor_email_enabled_courses(cls, course_ids):
+        """
+        Returns the set of the given course ids for which email is enabled,
+        as instructor_email_enabled would, from a single query.
+        """
+        if not settings.FEATURES['REQUIRE_COURSE_EMAIL_AUTH']:
+            return set(course_ids)
+
+        return {
+            authorization.course_id
+            for authorization in cls.objects.filter(course_id__in=course_ids, email_enabled=True)
+        }
+
     def __unicode__(self):
         not_en = "Not "
         if self.email_enabled:
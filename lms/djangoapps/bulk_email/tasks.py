@@ -6,8 +6,12 @@ to a course.
 import re
 import random
 import json
-from time import sleep
+import sys
+import threading
+from time import sleep, time
 from collections import Counter
+from functools import partial
+from multiprocessing.pool import ThreadPool
 import logging
 
 import dogstats_wrapper as dog_stats_api
@@ -483,51 +487,56 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
 
     # use the CourseEmailTemplate that was associated with the CourseEmail
     course_email_template = course_email.get_template()
+    # Recipients at the end of the list are emailed at once, each over a
+    # connection of their own.
+    connections = []
+    thread_pool = None
     try:
-        connection = get_connection()
-        connection.open()
+        for _ in range(max(1, min(settings.BULK_EMAIL_CONNECTIONS_PER_TASK, len(to_list)))):
+            connection = get_connection()
+            connection.open()
+            connections.append(connection)
+        if len(connections) > 1:
+            thread_pool = ThreadPool(len(connections))
+        send_rate_limiter = _get_send_rate_limiter()
 
         # Define context values to use in all course emails:
         email_context = {'name': '', 'email': ''}
         email_context.update(global_email_context)
+        email_context['course_id'] = course_email.course_id
+
+        # The templates are filled in with the values shared by all recipients once, up front.
+        plaintext_renderer = course_email_template.get_plaintext_renderer(course_email.text_message, email_context)
+        html_renderer = course_email_template.get_htmltext_renderer(course_email.html_message, email_context)
 
         while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
+            # Update context with user-specific values from the users at the end of the list.
+            # At the end of processing these users, they will be removed from the to_list.
             # That way, the to_list will always contain the recipients remaining to be emailed.
             # This is convenient for retries, which will need to send to those who haven't
             # yet been emailed, but not send to those who have already been sent to.
-            recipient_num += 1
-            current_recipient = to_list[-1]
-            email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-            email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
-
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
-
-            # Create email:
-            email_msg = EmailMultiAlternatives(
-                course_email.subject,
-                plaintext_msg,
-                from_addr,
-                [email],
-                connection=connection
-            )
-            email_msg.attach_alternative(html_msg, 'text/html')
-
-            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
-            # the value depends on the number of workers that might be sending email in
-            # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
-                sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+            batch = []
+            for connection, current_recipient in zip(connections, reversed(to_list)):
+                recipient_num += 1
+                email = current_recipient['email']
+                email_context['email'] = email
+                email_context['name'] = current_recipient['profile__name']
+                email_context['user_id'] = current_recipient['pk']
+
+                # Construct message content using templates and context:
+                plaintext_msg = plaintext_renderer.render(email_context)
+                html_msg = html_renderer.render(email_context)
+
+                # Create email:
+                email_msg = EmailMultiAlternatives(
+                    course_email.subject,
+                    plaintext_msg,
+                    from_addr,
+                    [email],
+                    connection=connection
+                )
+                email_msg.attach_alternative(html_msg, 'text/html')
 
-            try:
                 log.info(
                     "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
                     Recipient name: %s, Email address: %s",
@@ -539,82 +548,117 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                     current_recipient['profile__name'],
                     email
                 )
-                with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
-                    connection.send_messages([email_msg])
-
-            except SMTPDataError as exc:
-                # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                total_recipients_failed += 1
-                log.error(
-                    "BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
-                    Recipient num: %s/%s, Email address: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email
-                )
-                if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
-                else:
+                batch.append((recipient_num, current_recipient, email_msg))
+
+            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
+            # but if a task has been retried for rate-limiting reasons, then we sleep
+            # for a period of time between all emails within this task.  Choice of
+            # the value depends on the number of workers that might be sending email in
+            # parallel, and what the SES throttle rate is.
+            send = partial(
+                _send_email,
+                course_title=course_title,
+                throttle=subtask_status.retried_nomax > 0,
+                send_rate_limiter=send_rate_limiter,
+            )
+            if thread_pool is None:
+                send_errors = [send(email_msg) for _, _, email_msg in batch]
+            else:
+                send_errors = thread_pool.map(send, [email_msg for _, _, email_msg in batch])
+
+            # Recipients whose emails should be retried stay on the list, and the
+            # first of their errors causes the rest of the list to be retried.
+            unsent = []
+            retry_error = None
+            for (recipient_num, current_recipient, _), send_error in zip(batch, send_errors):
+                email = current_recipient['email']
+                exc = send_error[1] if send_error else None
+
+                if isinstance(exc, SMTPDataError):
+                    # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
+                    total_recipients_failed += 1
+                    log.error(
+                        "BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
+                        Recipient num: %s/%s, Email address: %s",
+                        parent_task_id,
+                        task_id,
+                        email_id,
+                        recipient_num,
+                        total_recipients,
+                        email
+                    )
+                    if exc.smtp_code >= 400 and exc.smtp_code < 500:
+                        # This will cause the outer handler to catch the exception and retry the entire task.
+                        unsent.append(current_recipient)
+                        retry_error = retry_error or send_error
+                        continue
+                    else:
+                        # This will fall through and not retry the message.
+                        log.warning(
+                            'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
+                            Email not delivered to %s due to error %s',
+                            parent_task_id,
+                            task_id,
+                            email_id,
+                            recipient_num,
+                            total_recipients,
+                            email,
+                            exc.smtp_error
+                        )
+                        dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
+                        subtask_status.increment(failed=1)
+
+                elif isinstance(exc, SINGLE_EMAIL_FAILURE_ERRORS):
                     # This will fall through and not retry the message.
-                    log.warning(
-                        'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
-                        Email not delivered to %s due to error %s',
+                    total_recipients_failed += 1
+                    log.error(
+                        "BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
+                        EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
                         parent_task_id,
                         task_id,
                         email_id,
                         recipient_num,
                         total_recipients,
                         email,
-                        exc.smtp_error
+                        exc
                     )
                     dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
                     subtask_status.increment(failed=1)
 
-            except SINGLE_EMAIL_FAILURE_ERRORS as exc:
-                # This will fall through and not retry the message.
-                total_recipients_failed += 1
-                log.error(
-                    "BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
-                    EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email,
-                    exc
-                )
-                dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                subtask_status.increment(failed=1)
+                elif exc is not None:
+                    # Any other error is handled by the outer handlers.
+                    unsent.append(current_recipient)
+                    retry_error = retry_error or send_error
+                    continue
 
-            else:
-                total_recipients_successful += 1
-                log.info(
-                    "BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
-                    Recipient num: %s/%s, Email address: %s,",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email
-                )
-                dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
-                if settings.BULK_EMAIL_LOG_SENT_EMAILS:
-                    log.info('Email with id %s sent to %s', email_id, email)
                 else:
-                    log.debug('Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
+                    total_recipients_successful += 1
+                    log.info(
+                        "BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
+                        Recipient num: %s/%s, Email address: %s,",
+                        parent_task_id,
+                        task_id,
+                        email_id,
+                        recipient_num,
+                        total_recipients,
+                        email
+                    )
+                    dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
+                    if settings.BULK_EMAIL_LOG_SENT_EMAILS:
+                        log.info('Email with id %s sent to %s', email_id, email)
+                    else:
+                        log.debug('Email with id %s sent to %s', email_id, email)
+                    subtask_status.increment(succeeded=1)
+
+                recipients_info[email] += 1
 
-            # Pop the user that was emailed off the end of the list only once they have
-            # successfully been processed.  (That way, if there were a failure that
+            # Remove the users that were emailed from the end of the list only once they have
+            # been processed.  (That way, if there were a failure that
             # needed to be retried, the user is still on the list.)
-            recipients_info[email] += 1
-            to_list.pop()
+            del to_list[-len(batch):]
+            to_list.extend(reversed(unsent))
+            if retry_error is not None:
+                raise retry_error[0], retry_error[1], retry_error[2]
 
         log.info(
             "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Total Successful Recipients: %s/%s, \
@@ -693,7 +737,76 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         return subtask_status, None
     finally:
         # Clean up at the end.
-        connection.close()
+        if thread_pool is not None:
+            thread_pool.close()
+        for connection in connections:
+            connection.close()
+
+
+def _send_email(email_msg, course_title, throttle, send_rate_limiter):
+    """
+    Send `email_msg` over its connection, once `send_rate_limiter` (if any) allows it.
+
+    If `throttle` is set, wait BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS first as well.
+
+    Returns the `sys.exc_info()` of the error sending the email, or None if it was sent.
+    """
+    if throttle:
+        sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+    if send_rate_limiter is not None:
+        send_rate_limiter.wait()
+    try:
+        with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
+            email_msg.connection.send_messages([email_msg])
+    except Exception:  # pylint: disable=broad-except
+        return sys.exc_info()
+    return None
+
+
+class SendRateLimiter(object):
+    """
+    Limits the rate at which emails are sent to `rate` per second, allowing
+    bursts of up to `burst` emails (a token bucket).  Thread-safe.
+    """
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """
+        Wait until another email may be sent.
+        """
+        with self.lock:
+            now = time()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # A negative count reserves the tokens to come for the threads already waiting.
+            self.tokens -= 1
+            delay = -self.tokens / self.rate
+        if delay > 0:
+            sleep(delay)
+
+
+_send_rate_limiter = None
+
+
+def _get_send_rate_limiter():
+    """
+    Return the SendRateLimiter of this process, or None if BULK_EMAIL_MAX_SENDS_PER_SECOND isn't set.
+
+    Each worker process has its own, so the setting should be the provider's
+    maximum send rate divided by the number of processes sending emails.
+    """
+    global _send_rate_limiter  # pylint: disable=global-statement
+    rate = settings.BULK_EMAIL_MAX_SENDS_PER_SECOND
+    if not rate:
+        return None
+    if _send_rate_limiter is None or _send_rate_limiter.rate != rate:
+        _send_rate_limiter = SendRateLimiter(rate, max(1, int(rate)))
+    return _send_rate_limiter
 
 
 def _get_current_task():
@@ -137,6 +137,20 @@ class CourseEmailTemplateTest(TestCase):
         context = self._get_sample_plain_context()
         template.render_plaintext("My new plain text.", context)
 
+    def test_renderers_match_render(self):
+        template = CourseEmailTemplate.get_template()
+        base_context = self._get_sample_html_context()
+        base_context['course_id'] = 'Bogus/Course/Id'
+        users = [UserFactory.create(), UserFactory.create()]
+        long_line = u"A line long enough to be wrapped. " * 40
+        for body in (u"My new text.\n" + long_line, u"Dear %%USER_FULLNAME%%,\n" + long_line):
+            html_renderer = template.get_htmltext_renderer(body, base_context)
+            plain_renderer = template.get_plaintext_renderer(body, base_context)
+            for user in users:
+                context = dict(base_context, user_id=user.id, name=user.profile.name, email=user.email)
+                self.assertEquals(html_renderer.render(context), template.render_htmltext(body, context))
+                self.assertEquals(plain_renderer.render(context), template.render_plaintext(body, context))
+
 
 @attr('shard_1')
 class CourseAuthorizationTest(TestCase):
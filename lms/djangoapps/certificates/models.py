@@ -188,19 +188,39 @@ def certificate_status_for_student(student, course_id):
     try:
         generated_certificate = GeneratedCertificate.objects.get(
             user=student, course_id=course_id)
-        d = {'status': generated_certificate.status,
-             'mode': generated_certificate.mode}
-        if generated_certificate.grade:
-            d['grade'] = generated_certificate.grade
-        if generated_certificate.status == CertificateStatuses.downloadable:
-            d['download_url'] = generated_certificate.download_url
-
-        return d
+        return _certificate_status(generated_certificate)
     except GeneratedCertificate.DoesNotExist:
         pass
     return {'status': CertificateStatuses.unavailable, 'mode': GeneratedCertificate.MODES.honor}
 
 
+def certificate_statuses_for_student(student, course_ids):
+    """
+    Returns a dictionary mapping those of the `course_ids` in which the
+    student has a certificate to their certificate status, as
+    certificate_status_for_student would, from a single query.
+
+    Courses in which the student has no certificate are left out.
+    """
+    return {
+        generated_certificate.course_id: _certificate_status(generated_certificate)
+        for generated_certificate in GeneratedCertificate.objects.filter(user=student, course_id__in=course_ids)
+    }
+
+
+def _certificate_status(generated_certificate):
+    """
+    Returns the status dictionary of certificate_status_for_student for a GeneratedCertificate.
+    """
+    d = {'status': generated_certificate.status,
+         'mode': generated_certificate.mode}
+    if generated_certificate.grade:
+        d['grade'] = generated_certificate.grade
+    if generated_certificate.status == CertificateStatuses.downloadable:
+        d['download_url'] = generated_certificate.download_url
+    return d
+
+
 def certificate_info_for_user(user, course_id, grade, user_is_whitelisted=None):
     """
     Returns the certificate info for a user for grade report.
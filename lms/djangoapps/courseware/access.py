@@ -148,6 +148,92 @@ def has_access(user, action, obj, course_key=None):
                     .format(type(obj)))
 
 
+def get_accessible_block_keys(user, course, course_blocks):
+    """
+    Return the usage keys of the blocks in `course_blocks` (see
+    openedx.core.djangoapps.content.course_structures.course_blocks) that
+    `user` can load, including the course itself.
+
+    This applies the rules of has_access(user, 'load', block) to the whole
+    tree at once: the user's roles and partition groups are looked up once
+    for the course rather than once per block, and a block is only loadable
+    if its parent is.
+
+    Note: field overrides (e.g. CCX or individual due dates) aren't applied
+    to course_blocks, so callers shouldn't use this when they're enabled.
+    """
+    if not user:
+        user = AnonymousUser()
+    course_key = course.id
+
+    if _has_staff_access_to_descriptor(user, course, course_key):
+        return course_blocks.filter(lambda block: True)
+
+    start_dates_disabled = (
+        settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(user, course_key)
+    )
+    preview_mode = in_preview_mode()
+    now = datetime.now(UTC())
+    is_beta_tester = CourseBetaTesterRole(course_key).has_user(user)
+
+    # As in _has_group_access, partitions used by split_test modules are left to them.
+    check_group_access = len(course.user_partitions) != len(get_split_user_partitions(course.user_partitions))
+    partitions = {partition.id: partition for partition in course.user_partitions}
+    user_groups = {}
+
+    def user_group(partition):
+        """
+        The user's group in `partition`, looked up once.
+        """
+        if partition.id not in user_groups:
+            user_groups[partition.id] = partition.scheme.get_group_for_user(course_key, user, partition)
+        return user_groups[partition.id]
+
+    def has_group_access(block):
+        """
+        Whether the user is in one of the allowed groups of each partition the block restricts.
+        """
+        for partition_id, group_ids in block.group_access.items():
+            if group_ids is False:
+                # The merged rules exclude all students.
+                return False
+            if not group_ids:
+                continue
+            partition = partitions.get(partition_id)
+            if partition is None:
+                return False
+            try:
+                groups = [partition.get_group(group_id) for group_id in group_ids]
+            except NoSuchUserPartitionGroupError:
+                return False
+            if user_group(partition) not in groups:
+                return False
+        return True
+
+    def is_started(block):
+        """
+        Whether the block has started, for this user.
+        """
+        if start_dates_disabled or block.start is None or preview_mode:
+            return True
+        effective_start = block.start
+        if is_beta_tester and block.days_early_for_beta is not None:
+            effective_start -= timedelta(block.days_early_for_beta)
+        return now > effective_start
+
+    def can_load(block):
+        """
+        Whether the user can load the block, given that they can load its parent.
+        """
+        return (
+            not block.visible_to_staff_only and
+            (not check_group_access or has_group_access(block)) and
+            is_started(block)
+        )
+
+    return course_blocks.filter(can_load)
+
+
 # ================ Implementation helpers ================================
 def _can_access_descriptor_with_start_date(user, descriptor, course_key):  # pylint: disable=invalid-name
     """
@@ -0,0 +1,359 @@
+"""
+Set-based grade computation for many students at once.
+
+`courseware.grades.grade()` loads state and instantiates modules for one
+student at a time. When we need grades for a whole course (grade reports,
+`iterate_grades_for`), almost all of that work is the same for every student:
+the course tree, the weights and max scores of problems, and the grading
+policy. `BulkCourseGrader` reads those once, pulls the scores of a chunk of
+students out of StudentModule and the submissions API with a handful of
+queries, and aggregates section totals over a (student x problem) score matrix.
+
+Students whose grades genuinely depend on module instantiation (problems that
+always recalculate their grades, blocks with dynamic children, or problems
+whose max score we've never seen) are graded with `grades.grade()` instead,
+so the resulting gradesets are the same as the ones `grades._grade()` builds.
+"""
+# Compute grades using real division, with no integer truncation
+from __future__ import division
+import logging
+
+import numpy
+from django.conf import settings
+from django.test.client import RequestFactory
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import UsageKey
+
+import dogstats_wrapper as dog_stats_api
+from courseware import grades
+from courseware.models import StudentModule
+from openedx.core.djangoapps.signals.signals import GRADES_UPDATED
+from student.models import anonymous_ids_for_users
+from submissions.models import ScoreSummary  # installed from the edx-submissions repository
+from xmodule.graders import Score
+
+
+log = logging.getLogger("edx.courseware")
+
+# How many students to load scores for at a time
+DEFAULT_CHUNK_SIZE = 200
+
+
+class _Section(object):
+    """
+    A graded section of the course, as seen by the bulk grader.
+    """
+    def __init__(self, section_format, descriptor, columns, attempt_columns, dynamic):
+        self.format = section_format
+        self.name = descriptor.display_name_with_default
+        self.location = descriptor.location
+        # Problem columns in the order `grades._grade()` visits them
+        self.columns = columns
+        # Columns whose state means the student has started the section
+        self.attempt_columns = attempt_columns
+        # True if grading this section requires instantiating modules
+        self.dynamic = dynamic
+
+
+class BulkCourseGrader(object):
+    """
+    Computes gradesets for many students of a single course.
+
+    Instantiate once per course and call `iter_grades` with an iterable of
+    students.
+    """
+    def __init__(self, course, keep_raw_scores=False, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.course = course
+        self.keep_raw_scores = keep_raw_scores
+        self.chunk_size = chunk_size
+
+        self.problems = []
+        self._columns_by_location = {}
+        self.sections = []
+        self._build_grading_context()
+
+        num_problems = len(self.problems)
+        num_sections = len(self.sections)
+        # membership[j, k] is True if problem j counts towards section k
+        self._membership = numpy.zeros((num_problems, num_sections), dtype=bool)
+        self._attempt_membership = numpy.zeros((num_problems, num_sections), dtype=bool)
+        for section_index, section in enumerate(self.sections):
+            self._membership[section.columns, section_index] = True
+            self._attempt_membership[section.attempt_columns, section_index] = True
+        self._dynamic_sections = numpy.array([section.dynamic for section in self.sections], dtype=bool)
+        self._weights = [problem.weight for problem in self.problems]
+        self._descriptor_graded = numpy.array([bool(problem.graded) for problem in self.problems], dtype=bool)
+
+        # Max scores read from the problems' definitions, for problems that
+        # aren't in the max scores cache.
+        self._static_max_scores = {}
+        for problem in self.problems:
+            max_score = grades.static_max_score(problem)
+            if max_score is not None:
+                self._static_max_scores[problem.location] = max_score
+
+        self.max_scores_cache = grades.MaxScoresCache.create_for_course(course)
+        self._refresh_max_scores()
+
+        # We make a fake request because grading code expects to be able to look at
+        # the request. See `grades.iterate_grades_for`.
+        self._request = RequestFactory().get('/')
+
+    def _build_grading_context(self):
+        """
+        Walk the graded sections of the course once and assign a matrix column
+        to every scored block in them.
+        """
+        for section_format, sections in self.course.grading_context['graded_sections'].iteritems():
+            for section in sections:
+                section_descriptor = section['section_descriptor']
+                dynamic = any(
+                    descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
+                )
+                columns = []
+                # Mirror the traversal order of `yield_dynamic_descriptor_descendants`
+                stack = [section_descriptor]
+                while stack:
+                    descriptor = stack.pop()
+                    if descriptor.has_dynamic_children():
+                        dynamic = True
+                    else:
+                        stack.extend(descriptor.get_children())
+                    if descriptor.has_score:
+                        columns.append(self._column_for(descriptor))
+
+                attempt_columns = [self._column_for(descriptor) for descriptor in section['xmoduledescriptors']]
+                self.sections.append(_Section(section_format, section_descriptor, columns, attempt_columns, dynamic))
+
+    def _column_for(self, descriptor):
+        """Return the matrix column for `descriptor`, allocating one if necessary."""
+        location = descriptor.location
+        if location not in self._columns_by_location:
+            self._columns_by_location[location] = len(self.problems)
+            self.problems.append(descriptor)
+        return self._columns_by_location[location]
+
+    def _refresh_max_scores(self):
+        """
+        (Re)load max scores from the remote cache. Grading a student the slow
+        way pushes newly learned max scores there, so calling this afterwards
+        lets the remaining students be graded in bulk.
+        """
+        self.max_scores_cache.fetch_from_remote([problem.location for problem in self.problems])
+        use_cache = settings.FEATURES.get("ENABLE_MAX_SCORE_CACHE")
+        self._default_earned = numpy.zeros(len(self.problems))
+        self._default_possible = numpy.zeros(len(self.problems))
+        self._default_known = numpy.zeros(len(self.problems), dtype=bool)
+        for column, problem in enumerate(self.problems):
+            max_score = self.max_scores_cache.get(problem.location) if use_cache else None
+            if max_score is None:
+                max_score = self._static_max_scores.get(problem.location)
+            if max_score is not None:
+                earned, possible = grades.weighted_score(0.0, max_score, problem.weight)
+                self._default_earned[column] = earned
+                self._default_possible[column] = possible
+                self._default_known[column] = True
+
+    def iter_grades(self, students):
+        """
+        Yield a (student, gradeset, err_msg) tuple for every student, with the
+        same semantics as `grades.iterate_grades_for`.
+        """
+        chunk = []
+        for student in students:
+            chunk.append(student)
+            if len(chunk) >= self.chunk_size:
+                for result in self._grade_chunk(chunk):
+                    yield result
+                chunk = []
+        if chunk:
+            for result in self._grade_chunk(chunk):
+                yield result
+
+    def _grade_chunk(self, students):
+        """
+        Grade a list of students, loading all of their scores with a fixed
+        number of queries.
+        """
+        with dog_stats_api.timer('lms.grades.bulk_grade_chunk', tags=[u'action:{}'.format(self.course.id)]):
+            try:
+                matrices = self._score_matrices(students)
+            except Exception as exc:  # pylint: disable=broad-except
+                log.exception('Cannot bulk load scores in course %s: %s', self.course.id, exc)
+                matrices = None
+
+        for row, student in enumerate(students):
+            try:
+                gradeset = None
+                if matrices is not None:
+                    gradeset = self._gradeset_from_matrices(row, matrices)
+                if gradeset is None:
+                    gradeset = self._grade_individually(student)
+                else:
+                    self._send_grades_updated(student, gradeset)
+                yield student, gradeset, ""
+            except Exception as exc:  # pylint: disable=broad-except
+                # Keep marching on even if this student couldn't be graded for
+                # some reason, but log it for future reference.
+                log.exception(
+                    'Cannot grade student %s (%s) in course %s because of exception: %s',
+                    student.username,
+                    student.id,
+                    self.course.id,
+                    exc.message
+                )
+                yield student, {}, exc.message
+
+    def _score_matrices(self, students):
+        """
+        Return (earned, possible, known, touched) matrices of shape
+        (len(students), len(self.problems)).
+
+        `known` is True where we know the student's score on the problem, and
+        `touched` where the student has any state or submissions score for it.
+        """
+        num_students = len(students)
+        rows_by_user_id = {student.id: row for row, student in enumerate(students)}
+
+        earned = numpy.tile(self._default_earned, (num_students, 1))
+        possible = numpy.tile(self._default_possible, (num_students, 1))
+        known = numpy.tile(self._default_known, (num_students, 1))
+        touched = numpy.zeros((num_students, len(self.problems)), dtype=bool)
+
+        student_modules = StudentModule.objects.chunked_filter(
+            'student_id__in',
+            rows_by_user_id.keys(),
+            course_id=self.course.id,
+            module_type__in=self.course.block_types_affecting_grading,
+        )
+        for student_module in student_modules:
+            location = student_module.module_state_key.map_into_course(self.course.id)
+            column = self._columns_by_location.get(location)
+            if column is None:
+                continue
+            row = rows_by_user_id[student_module.student_id]
+            touched[row, column] = True
+            if student_module.max_grade is not None:
+                correct = student_module.grade if student_module.grade is not None else 0.0
+                earned[row, column], possible[row, column] = grades.weighted_score(
+                    correct, student_module.max_grade, self._weights[column]
+                )
+                known[row, column] = True
+
+        # Scores registered with the submissions API take precedence, and are
+        # not weighted (see `grades.get_score`).
+        anonymous_ids = anonymous_ids_for_users(students, self.course.id)
+        rows_by_anonymous_id = {anonymous_ids[student.id]: row for row, student in enumerate(students)}
+        score_summaries = ScoreSummary.objects.filter(
+            student_item__course_id=self.course.id.to_deprecated_string(),
+            student_item__student_id__in=rows_by_anonymous_id.keys(),
+        ).select_related('latest', 'student_item')
+        for summary in score_summaries:
+            if summary.latest.is_hidden():
+                continue
+            try:
+                location = UsageKey.from_string(summary.student_item.item_id).map_into_course(self.course.id)
+            except InvalidKeyError:
+                continue
+            column = self._columns_by_location.get(location)
+            if column is None:
+                continue
+            row = rows_by_anonymous_id[summary.student_item.student_id]
+            touched[row, column] = True
+            earned[row, column] = summary.latest.points_earned
+            possible[row, column] = summary.latest.points_possible
+            known[row, column] = True
+
+        return earned, possible, known, touched
+
+    def _gradeset_from_matrices(self, row, matrices):
+        """
+        Build the gradeset for the student in `row` of the score matrices, or
+        return None if this student has to be graded individually.
+        """
+        earned, possible, known, touched = matrices
+        student_known = known[row]
+        attempted = numpy.dot(touched[row], self._attempt_membership) > 0
+        unknown_in_section = numpy.dot(~student_known, self._membership) > 0
+        if numpy.any(attempted & (self._dynamic_sections | unknown_in_section)):
+            return None
+
+        graded_mask = student_known & self._descriptor_graded & (possible[row] > 0)
+        section_earned = numpy.dot(numpy.where(graded_mask, earned[row], 0.0), self._membership)
+        section_possible = numpy.dot(numpy.where(graded_mask, possible[row], 0.0), self._membership)
+
+        totaled_scores = {}
+        raw_scores = []
+        for section_index, section in enumerate(self.sections):
+            format_scores = totaled_scores.setdefault(section.format, [])
+            if attempted[section_index]:
+                graded_total = Score(
+                    float(section_earned[section_index]),
+                    float(section_possible[section_index]),
+                    True,
+                    section.name,
+                    None,
+                )
+                if self.keep_raw_scores:
+                    raw_scores.extend(
+                        Score(
+                            float(earned[row, column]),
+                            float(possible[row, column]),
+                            bool(graded_mask[column]),
+                            self.problems[column].display_name_with_default,
+                            self.problems[column].location,
+                        )
+                        for column in section.columns
+                    )
+            else:
+                graded_total = Score(0.0, 1.0, True, section.name, None)
+
+            if graded_total.possible > 0:
+                format_scores.append(graded_total)
+            else:
+                log.info(
+                    "Unable to grade a section with a total possible score of zero. " +
+                    str(section.location)
+                )
+
+        grade_summary = self.course.grader.grade(totaled_scores, generate_random_scores=False)
+        # We round the grade here, to make sure that the grade is an whole percentage and
+        # doesn't get displayed differently than it gets grades
+        grade_summary['percent'] = round(grade_summary['percent'] * 100 + 0.05) / 100
+        grade_summary['grade'] = grades.grade_for_percentage(self.course.grade_cutoffs, grade_summary['percent'])
+        grade_summary['totaled_scores'] = totaled_scores
+        if self.keep_raw_scores:
+            grade_summary['raw_scores'] = raw_scores
+        return grade_summary
+
+    def _grade_individually(self, student):
+        """
+        Grade a student with the regular, per-module grading code and pick up
+        any max scores that it learned.
+        """
+        self._request.user = student
+        self._request.session = {}
+        gradeset = grades.grade(student, self._request, self.course, self.keep_raw_scores)
+        self._refresh_max_scores()
+        return gradeset
+
+    def _send_grades_updated(self, student, grade_summary):
+        """Send the same signal that `grades.grade()` sends for each student."""
+        GRADES_UPDATED.send_robust(
+            sender=None,
+            username=student.username,
+            grade_summary=grade_summary,
+            course_key=self.course.id,
+            deadline=self.course.end
+        )
+
+
+def iterate_bulk_grades_for(course, students, keep_raw_scores=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Set-based equivalent of `grades.iterate_grades_for`; `course` must be a
+    CourseDescriptor.
+    """
+    # Grading policy might be overriden by a CCX, need to reset it
+    course.set_grading_policy(course.grading_policy)
+    grader = BulkCourseGrader(course, keep_raw_scores=keep_raw_scores, chunk_size=chunk_size)
+    return grader.iter_grades(students)
@@ -7,8 +7,10 @@ import random
 import logging
 
 from contextlib import contextmanager
+from datetime import datetime
+from pytz import UTC
 from django.conf import settings
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.test.client import RequestFactory
 from django.core.cache import cache
 
@@ -16,17 +18,17 @@ import dogstats_wrapper as dog_stats_api
 
 from courseware import courses
 from courseware.model_data import FieldDataCache, ScoresClient
-from student.models import anonymous_id_for_user
+from student.models import anonymous_id_for_user, anonymous_ids_for_users, ANONYMOUS_ID_BATCH_SIZE
 from util.module_utils import yield_dynamic_descriptor_descendants
 from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from .models import PersistentSubsectionGrade, StudentModule
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from openedx.core.djangoapps.signals.signals import GRADES_UPDATED
 
 
@@ -127,6 +129,134 @@ class MaxScoresCache(object):
         return max_score
 
 
+class SubsectionGradeStore(object):
+    """
+    Reads and writes the persisted per-subsection scores of one student in one
+    course (see `PersistentSubsectionGrade`).
+
+    Like `MaxScoresCache`, stored values are tied to the last time the course
+    was published, so content changes never produce stale grades. Score
+    changes delete the affected rows as they happen, so anything we read back
+    for the current course version can be trusted as is.
+    """
+    def __init__(self, student, course):
+        self.student = student
+        self.course_key = course.id
+        if course.subtree_edited_on is None:
+            # old XML courses don't have this attribute
+            self.course_version = u""
+        else:
+            self.course_version = course.subtree_edited_on.isoformat()
+        self._stored = {}
+        self._updates = {}
+        self._fetched_at = None
+
+    @classmethod
+    def is_enabled(cls):
+        """Are persisted subsection grades turned on for this environment?"""
+        return (
+            settings.FEATURES.get("ENABLE_PERSISTENT_SUBSECTION_GRADES", False) and
+            not settings.GENERATE_PROFILE_SCORES
+        )
+
+    def fetch(self):
+        """
+        Load every stored subsection grade for this student and course version
+        with a single query.
+        """
+        self._fetched_at = datetime.now(UTC)
+        rows = PersistentSubsectionGrade.objects.filter(
+            user_id=self.student.id,
+            course_id=self.course_key,
+            course_version=self.course_version,
+        )
+        for row in rows:
+            location = row.usage_key.map_into_course(self.course_key)
+            self._stored[location] = (row.attempted, self._scores_from_json(row.scores))
+
+    def num_stored(self):
+        """How many subsections did we read back from the database?"""
+        return len(self._stored)
+
+    def get(self, location):
+        """
+        Return an `(attempted, scores)` tuple for the subsection at `location`,
+        or None if nothing usable is stored. `scores` is a list of `Score`
+        tuples whose `graded` flag is that of the problem itself.
+        """
+        if location in self._updates:
+            return self._updates[location]
+        return self._stored.get(location)
+
+    def set(self, location, attempted, scores):
+        """
+        Record the scores collected for the subsection at `location`. Nothing
+        is written until `push` is called.
+        """
+        self._updates[location] = (attempted, list(scores))
+
+    def push(self):
+        """
+        Write any updated subsection grades back to the database.
+
+        If a score for this student was recorded after we started reading, the
+        values we computed may already be out of date, so we skip the write
+        and let the next grading pass fill them in.
+        """
+        if not self._updates:
+            return
+
+        if self._fetched_at is not None and StudentModule.objects.filter(
+                student_id=self.student.id,
+                course_id=self.course_key,
+                grade__isnull=False,
+                modified__gte=self._fetched_at,
+        ).exists():
+            return
+
+        rows = [
+            PersistentSubsectionGrade(
+                user_id=self.student.id,
+                course_id=self.course_key,
+                usage_key=location,
+                course_version=self.course_version,
+                attempted=attempted,
+                scores=self._scores_to_json(scores),
+            )
+            for location, (attempted, scores) in self._updates.items()
+        ]
+        savepoint = transaction.savepoint()
+        try:
+            PersistentSubsectionGrade.objects.filter(
+                user_id=self.student.id,
+                course_id=self.course_key,
+                usage_key__in=self._updates.keys(),
+            ).delete()
+            PersistentSubsectionGrade.objects.bulk_create(rows)
+        except IntegrityError:
+            # Another process graded this student at the same time; its rows
+            # are just as good as ours.
+            transaction.savepoint_rollback(savepoint)
+        else:
+            transaction.savepoint_commit(savepoint)
+        self._stored.update(self._updates)
+        self._updates = {}
+
+    def _scores_to_json(self, scores):
+        """Serialize a list of `Score` tuples for storage."""
+        return json.dumps([
+            [score.earned, score.possible, score.graded, score.section, unicode(score.module_id)]
+            for score in scores
+        ])
+
+    def _scores_from_json(self, scores_json):
+        """Deserialize a list of `Score` tuples written by `_scores_to_json`."""
+        return [
+            Score(earned, possible, graded, display_name, UsageKey.from_string(location).map_into_course(self.course_key))
+            for earned, possible, graded, display_name, location in json.loads(scores_json)
+        ]
+
+
 def descriptor_affects_grading(block_types_affecting_grading, descriptor):
     """
     Returns True if the descriptor could have any impact on grading, else False.
@@ -294,22 +424,49 @@ def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_c
 
     More information on the format is in the docstring for CourseGrader.
     """
-    if field_data_cache is None:
-        with manual_transaction():
-            field_data_cache = field_data_cache_for_grading(course, student)
-    if scores_client is None:
-        scores_client = ScoresClient.from_field_data_cache(field_data_cache)
+    grade_store = None
+    if SubsectionGradeStore.is_enabled():
+        grade_store = SubsectionGradeStore(student, course)
+        grade_store.fetch()
 
-    # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
-    # scores that were registered with the submissions API, which for the moment
-    # means only openassessment (edx-ora2)
-    submissions_scores = sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id))
-    max_scores_cache = MaxScoresCache.create_for_course(course)
-    # For the moment, we have to get scorable_locations from field_data_cache
-    # and not from scores_client, because scores_client is ignorant of things
-    # in the submissions API. As a further refactoring step, submissions should
-    # be hidden behind the ScoresClient.
-    max_scores_cache.fetch_from_remote(field_data_cache.scorable_locations)
+    # Loading student state is only necessary for sections that we can't read
+    # out of the grade store, so we defer it until the first such section.
+    scoring_state = {}
+
+    def get_scoring_state():
+        """
+        Return a dict with the FieldDataCache, ScoresClient, submissions scores
+        and MaxScoresCache used to compute section scores, building them on
+        first use.
+        """
+        if not scoring_state:
+            fd_cache = field_data_cache
+            if fd_cache is None:
+                with manual_transaction():
+                    fd_cache = field_data_cache_for_grading(course, student)
+            client = scores_client
+            if client is None:
+                client = ScoresClient.from_field_data_cache(fd_cache)
+
+            # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
+            # scores that were registered with the submissions API, which for the moment
+            # means only openassessment (edx-ora2)
+            submissions_scores = sub_api.get_scores(
+                course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
+            )
+            max_scores_cache = MaxScoresCache.create_for_course(course)
+            # For the moment, we have to get scorable_locations from field_data_cache
+            # and not from scores_client, because scores_client is ignorant of things
+            # in the submissions API. As a further refactoring step, submissions should
+            # be hidden behind the ScoresClient.
+            max_scores_cache.fetch_from_remote(fd_cache.scorable_locations)
+            scoring_state.update(
+                field_data_cache=fd_cache,
+                scores_client=client,
+                submissions_scores=submissions_scores,
+                max_scores_cache=max_scores_cache,
+            )
+        return scoring_state
 
     grading_context = course.grading_context
     raw_scores = []
@@ -326,76 +483,57 @@ def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_c
             # some problems have state that is updated independently of interaction
             # with the LMS, so they need to always be scored. (E.g. foldit.,
             # combinedopenended)
-            should_grade_section = any(
+            always_recalculate = any(
                 descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
             )
 
-            # If there are no problems that always have to be regraded, check to
-            # see if any of our locations are in the scores from the submissions
-            # API. If scores exist, we have to calculate grades for this section.
-            if not should_grade_section:
-                should_grade_section = any(
-                    descriptor.location.to_deprecated_string() in submissions_scores
-                    for descriptor in section['xmoduledescriptors']
-                )
+            # Scores of sections whose content varies per student would go
+            # stale when the student's group or library selection changes.
+            persisted = (
+                grade_store is not None and
+                not always_recalculate and
+                not _has_dynamic_descendants(section_descriptor)
+            )
+
+            stored = None
+            if persisted:
+                stored = grade_store.get(section_descriptor.location)
 
-            if not should_grade_section:
-                should_grade_section = any(
-                    descriptor.location in scores_client
-                    for descriptor in section['xmoduledescriptors']
+            if stored is not None:
+                should_grade_section, scores = stored
+            else:
+                state = get_scoring_state()
+                should_grade_section = always_recalculate or _section_attempted(
+                    section['xmoduledescriptors'], state['scores_client'], state['submissions_scores']
                 )
+                scores = []
 
             # If we haven't seen a single problem in the section, we don't have
             # to grade it at all! We can assume 0%
             if should_grade_section:
-                scores = []
-
-                def create_module(descriptor):
-                    '''creates an XModule instance given a descriptor'''
-                    # TODO: We need the request to pass into here. If we could forego that, our arguments
-                    # would be simpler
-                    return get_module_for_descriptor(
-                        student, request, descriptor, field_data_cache, course.id, course=course
+                if stored is None:
+                    scores = _compute_section_scores(
+                        student, request, course, section_descriptor, get_scoring_state()
                     )
+                    if persisted:
+                        grade_store.set(section_descriptor.location, True, scores)
 
-                descendants = yield_dynamic_descriptor_descendants(section_descriptor, student.id, create_module)
-                for module_descriptor in descendants:
-                    (correct, total) = get_score(
-                        student,
-                        module_descriptor,
-                        create_module,
-                        scores_client,
-                        submissions_scores,
-                        max_scores_cache,
-                    )
-                    if correct is None and total is None:
-                        continue
-
-                    if settings.GENERATE_PROFILE_SCORES:    # for debugging!
-                        if total > 1:
-                            correct = random.randrange(max(total - 2, 1), total + 1)
-                        else:
-                            correct = total
-
-                    graded = module_descriptor.graded
-                    if not total > 0:
-                        # We simply cannot grade a problem that is 12/0, because we might need it as a percentage
-                        graded = False
-
-                    scores.append(
-                        Score(
-                            correct,
-                            total,
-                            graded,
-                            module_descriptor.display_name_with_default,
-                            module_descriptor.location
-                        )
-                    )
+                if settings.GENERATE_PROFILE_SCORES:    # for debugging!
+                    scores = [
+                        score._replace(earned=_random_profile_score(score.possible))
+                        for score in scores
+                    ]
+
+                # We simply cannot grade a problem that is 12/0, because we might
+                # need it as a percentage
+                scores = [score._replace(graded=score.graded and score.possible > 0) for score in scores]
 
                 __, graded_total = graders.aggregate_scores(scores, section_name)
                 if keep_raw_scores:
                     raw_scores += scores
             else:
+                if stored is None and persisted:
+                    grade_store.set(section_descriptor.location, False, [])
                 graded_total = Score(0.0, 1.0, True, section_name, None)
 
             #Add the graded total to totaled_scores
@@ -425,11 +563,88 @@ def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_c
         # so grader can be double-checked
         grade_summary['raw_scores'] = raw_scores
 
-    max_scores_cache.push_to_remote()
+    if scoring_state:
+        scoring_state['max_scores_cache'].push_to_remote()
+    if grade_store is not None:
+        grade_store.push()
 
     return grade_summary
 
 
+def _section_attempted(descriptors, scores_client, submissions_scores):
+    """
+    Returns True if the student has a score or student state for any of the
+    given descriptors, either in the submissions API or in StudentModule.
+    """
+    return any(
+        descriptor.location.to_deprecated_string() in submissions_scores or descriptor.location in scores_client
+        for descriptor in descriptors
+    )
+
+
+def _has_dynamic_descendants(section_descriptor):
+    """
+    Returns True if any block in the section (e.g. a split_test or
+    library_content block) picks its children per student.
+    """
+    stack = [section_descriptor]
+    while stack:
+        descriptor = stack.pop()
+        if descriptor.has_dynamic_children():
+            return True
+        stack.extend(descriptor.get_children())
+    return False
+
+
+def _compute_section_scores(student, request, course, section_descriptor, scoring_state):
+    """
+    Instantiate the modules under `section_descriptor` for `student` and
+    return a list of `Score` tuples, one per scored problem, in traversal
+    order. The `graded` flag of each score is that of the problem descriptor.
+    """
+    field_data_cache = scoring_state['field_data_cache']
+
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        return get_module_for_descriptor(
+            student, request, descriptor, field_data_cache, course.id, course=course
+        )
+
+    scores = []
+    descendants = yield_dynamic_descriptor_descendants(section_descriptor, student.id, create_module)
+    for module_descriptor in descendants:
+        (correct, total) = get_score(
+            student,
+            module_descriptor,
+            create_module,
+            scoring_state['scores_client'],
+            scoring_state['submissions_scores'],
+            scoring_state['max_scores_cache'],
+        )
+        if correct is None and total is None:
+            continue
+
+        scores.append(
+            Score(
+                correct,
+                total,
+                module_descriptor.graded,
+                module_descriptor.display_name_with_default,
+                module_descriptor.location
+            )
+        )
+    return scores
+
+
+def _random_profile_score(total):
+    """Returns a random score out of `total`, used with GENERATE_PROFILE_SCORES."""
+    if total > 1:
+        return random.randrange(max(total - 2, 1), total + 1)
+    return total
+
+
 def grade_for_percentage(grade_cutoffs, percentage):
     """
     Returns a letter grade as defined in grading_policy (e.g. 'A' 'B' 'C' for 6.002x) or None.
@@ -508,6 +723,11 @@ def _progress_summary(student, request, course, field_data_cache=None, scores_cl
     # be hidden behind the ScoresClient.
     max_scores_cache.fetch_from_remote(field_data_cache.scorable_locations)
 
+    grade_store = None
+    if SubsectionGradeStore.is_enabled():
+        grade_store = SubsectionGradeStore(student, course)
+        grade_store.fetch()
+
     chapters = []
     # Don't include chapters that aren't displayable (e.g. due to error)
     for chapter_module in course_module.get_display_items():
@@ -524,35 +744,55 @@ def _progress_summary(student, request, course, field_data_cache=None, scores_cl
                     continue
 
                 graded = section_module.graded
-                scores = []
 
-                module_creator = section_module.xmodule_runtime.get_module
-
-                for module_descriptor in yield_dynamic_descriptor_descendants(
-                        section_module, student.id, module_creator
-                ):
-                    course_id = course.id
-                    (correct, total) = get_score(
-                        student,
-                        module_descriptor,
-                        module_creator,
-                        scores_client,
-                        submissions_scores,
-                        max_scores_cache,
-                    )
-                    if correct is None and total is None:
-                        continue
-
-                    scores.append(
-                        Score(
-                            correct,
-                            total,
-                            graded,
-                            module_descriptor.display_name_with_default,
-                            module_descriptor.location
+                persisted = grade_store is not None and not _has_dynamic_descendants(section_module)
+
+                stored = None
+                if persisted:
+                    stored = grade_store.get(section_module.location)
+                if stored is not None and stored[0]:
+                    scores = stored[1]
+                else:
+                    scores = []
+                    descriptors = []
+                    module_creator = section_module.xmodule_runtime.get_module
+
+                    for module_descriptor in yield_dynamic_descriptor_descendants(
+                            section_module, student.id, module_creator
+                    ):
+                        descriptors.append(module_descriptor)
+                        (correct, total) = get_score(
+                            student,
+                            module_descriptor,
+                            module_creator,
+                            scores_client,
+                            submissions_scores,
+                            max_scores_cache,
+                        )
+                        if correct is None and total is None:
+                            continue
+
+                        scores.append(
+                            Score(
+                                correct,
+                                total,
+                                module_descriptor.graded,
+                                module_descriptor.display_name_with_default,
+                                module_descriptor.location
+                            )
                         )
-                    )
 
+                    if persisted and not any(
+                            descriptor.always_recalculate_grades for descriptor in descriptors
+                    ):
+                        grade_store.set(
+                            section_module.location,
+                            _section_attempted(descriptors, scores_client, submissions_scores),
+                            scores,
+                        )
+
+                # Progress is reported against the section's graded flag
+                scores = [score._replace(graded=graded) for score in scores]
                 scores.reverse()
                 section_total, _ = graders.aggregate_scores(
                     scores, section_module.display_name_with_default)
@@ -576,6 +816,8 @@ def _progress_summary(student, request, course, field_data_cache=None, scores_cl
         })
 
     max_scores_cache.push_to_remote()
+    if grade_store is not None:
+        grade_store.push()
 
     return chapters
 
@@ -588,6 +830,18 @@ def weighted_score(raw_correct, raw_total, weight):
     return (float(raw_correct) * weight / raw_total, float(weight))
 
 
+def static_max_score(problem_descriptor):
+    """
+    Return the (unweighted) max score of the problem, if it can be read from
+    the problem's definition without instantiating it (only capa problems
+    can, see `CapaDescriptor.static_max_score`), else None.
+    """
+    get_max_score = getattr(problem_descriptor, 'static_max_score', None)
+    if get_max_score is None:
+        return None
+    return get_max_score()
+
+
 def get_score(user, problem_descriptor, module_creator, scores_client, submissions_scores_cache, max_scores_cache):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
@@ -648,23 +902,27 @@ def get_score(user, problem_descriptor, module_creator, scores_client, submissio
         total = cached_max_score
     else:
         # This means we don't have a valid score entry and we don't have a
-        # cached_max_score on hand. We know they've earned 0.0 points on this,
-        # but we need to instantiate the module (i.e. load student state) in
-        # order to find out how much it was worth.
-        problem = module_creator(problem_descriptor)
-        if problem is None:
-            return (None, None)
-
+        # cached_max_score on hand. We know they've earned 0.0 points on this.
+        # Problems that can tell how much they're worth from their definition
+        # (see `static_max_score`) don't need to be instantiated; for the
+        # others, we need to instantiate the module (i.e. load student state)
+        # in order to find out how much it was worth.
         correct = 0.0
-        total = problem.max_score()
-
-        # Problem may be an error module (if something in the problem builder failed)
-        # In which case total might be None
+        total = static_max_score(problem_descriptor)
         if total is None:
-            return (None, None)
-        else:
-            # add location to the max score cache
-            max_scores_cache.set(problem_descriptor.location, total)
+            problem = module_creator(problem_descriptor)
+            if problem is None:
+                return (None, None)
+
+            total = problem.max_score()
+
+            # Problem may be an error module (if something in the problem builder failed)
+            # In which case total might be None
+            if total is None:
+                return (None, None)
+
+        # add location to the max score cache
+        max_scores_cache.set(problem_descriptor.location, total)
 
     return weighted_score(correct, total, problem_descriptor.weight)
 
@@ -682,6 +940,26 @@ def manual_transaction():
         transaction.commit()
 
 
+def _with_anonymous_ids(students, course_id):
+    """
+    Yield each of `students`, after saving the anonymous ids of a batch of
+    them in the course at once, so that grading them (which passes their
+    anonymous ids to the submissions API) doesn't save them one at a time.
+    """
+    batch = []
+    for student in students:
+        batch.append(student)
+        if len(batch) >= ANONYMOUS_ID_BATCH_SIZE:
+            anonymous_ids_for_users(batch, course_id)
+            for batch_student in batch:
+                yield batch_student
+            batch = []
+    if batch:
+        anonymous_ids_for_users(batch, course_id)
+        for batch_student in batch:
+            yield batch_student
+
+
 def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
@@ -705,12 +983,19 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     else:
         course = course_or_id
 
+    if settings.FEATURES.get('ENABLE_BULK_GRADE_COMPUTATION') and not settings.GENERATE_PROFILE_SCORES:
+        # Imported here to avoid a circular import; bulk_grades builds on this module.
+        from courseware.bulk_grades import iterate_bulk_grades_for
+        for result in iterate_bulk_grades_for(course, students, keep_raw_scores):
+            yield result
+        return
+
     # We make a fake request because grading code expects to be able to look at
     # the request. We have to attach the correct user to the request before
     # grading that student.
     request = RequestFactory().get('/')
 
-    for student in students:
+    for student in _with_anonymous_ids(students, course.id):
         with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
             try:
                 request.user = student
@@ -0,0 +1,95 @@
+"""
+A Django command that fills the safe_exec cache for a course's problems.
+
+The <script> code of every problem is run for every seed the problem can be
+given, so that students loading the problems later (e.g. just before a
+deadline) get cached results instead of running sandboxed code themselves.
+The problems are loaded as <username>; code which uses the student's
+anonymous id only gets warmed for that user.
+"""
+
+import logging
+from optparse import make_option
+from textwrap import dedent
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from courseware.model_data import DjangoKeyValueStore, FieldDataCache
+from courseware.module_render import get_module_for_descriptor_internal
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey, UsageKey
+from xblock.runtime import KvsFieldData
+from xmodule.capa_base import possible_seeds
+from xmodule.modulestore.django import modulestore
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Run the scripts of a course's problems for every seed, caching the results.
+    """
+    args = "<course_id> <username>"
+    help = dedent(__doc__).strip()
+    option_list = BaseCommand.option_list + (
+        make_option('--problem',
+                    action='append',
+                    dest='problems',
+                    default=[],
+                    help='Usage key of a problem to warm (may be repeated). Defaults to all problems.'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 2:
+            raise CommandError("course_id and username must be specified")
+
+        try:
+            course_key = CourseKey.from_string(args[0])
+            usage_keys = [UsageKey.from_string(problem) for problem in options['problems']]
+        except InvalidKeyError:
+            raise CommandError("Invalid course_id or problem usage key")
+
+        try:
+            user = User.objects.get(username=args[1])
+        except User.DoesNotExist:
+            raise CommandError("Unknown user: {}".format(args[1]))
+
+        store = modulestore()
+        if usage_keys:
+            descriptors = [store.get_item(usage_key) for usage_key in usage_keys]
+        else:
+            descriptors = store.get_items(course_key, qualifiers={'category': 'problem'})
+
+        for descriptor in descriptors:
+            executions, failures = self.warm_problem(user, descriptor, course_key)
+            self.stdout.write(u"{}: {} seeds, {} failed\n".format(descriptor.location, executions, failures))
+
+    def warm_problem(self, user, descriptor, course_key):
+        """
+        Build `descriptor`'s problem for each of its possible seeds.
+
+        Returns how many seeds were tried, and how many of them failed.
+        """
+        field_data_cache = FieldDataCache([descriptor], course_key, user)
+        module = get_module_for_descriptor_internal(
+            user=user,
+            descriptor=descriptor,
+            student_data=KvsFieldData(DjangoKeyValueStore(field_data_cache)),
+            course_id=course_key,
+            track_function=lambda event_type, event: None,
+            xqueue_callback_url_prefix='',
+            request_token=None,
+        )
+        if module is None or not hasattr(module, 'new_lcp'):
+            return 0, 0
+
+        seeds = possible_seeds(module.rerandomize)
+        failures = 0
+        for seed in seeds:
+            try:
+                module.new_lcp({'seed': seed})
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Couldn't build %s with seed %d", descriptor.location, seed)
+                failures += 1
+        return len(seeds), failures
@@ -18,13 +18,17 @@ import itertools
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver, Signal
 
 from model_utils.models import TimeStampedModel
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from student.models import user_by_anonymous_id
 from submissions.models import score_set, score_reset
 
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule_django.models import CourseKeyField, LocationKeyField, BlockTypeKeyField  # pylint: disable=import-error
 log = logging.getLogger(__name__)
 
@@ -296,6 +300,47 @@ class StudentFieldOverride(TimeStampedModel):
     value = models.TextField(default='null')
 
 
+class PersistentSubsectionGrade(TimeStampedModel):
+    """
+    Stores the scores a student has earned on the problems within a single
+    subsection, so that grading does not have to instantiate every problem
+    module each time a grade or progress summary is requested.
+
+    Rows are tagged with the `course_version` (the course's
+    `subtree_edited_on`) that was live when they were computed; rows from an
+    older version of the course are ignored and overwritten. Rows are deleted
+    whenever a score changes underneath them, see
+    `invalidate_subsection_grades_on_score_change`.
+    """
+    objects = ChunkingManager()
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+
+    # The subsection (usually a sequential) these scores were collected from
+    usage_key = LocationKeyField(max_length=255, db_index=True)
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('user', 'course_id', 'usage_key'),)
+
+    course_version = models.CharField(max_length=255, blank=True)
+
+    # False if the student had not interacted with any problem in the
+    # subsection when it was graded; `scores` is empty in that case.
+    attempted = models.BooleanField(default=True)
+
+    # JSON list of [earned, possible, graded, display_name, location] entries
+    scores = models.TextField(default='[]')
+
+    def __unicode__(self):
+        return u"[PersistentSubsectionGrade] {}: {} {} ({})".format(
+            self.user_id,  # pylint: disable=no-member
+            self.course_id,
+            self.usage_key,
+            self.course_version,
+        )
+
+
 # Signal that indicates that a user's score for a problem has been updated.
 # This signal is generated when a scoring event occurs either within the core
 # platform or in the Submissions module. Note that this signal will be triggered
@@ -392,3 +437,68 @@ def submissions_score_reset_handler(sender, **kwargs):  # pylint: disable=unused
             u"Failed to process score_reset signal from Submissions API. "
             "user: %s, course_id: %s, usage_id: %s", user, course_id, usage_id
         )
+
+
+def invalidate_subsection_grades(user_id, usage_key):
+    """
+    Delete any PersistentSubsectionGrade rows for `user_id` that could include
+    the score for `usage_key`, i.e. the rows for all of its ancestors.
+    """
+    ancestors = []
+    location = usage_key
+    store = modulestore()
+    while location is not None:
+        ancestors.append(location)
+        try:
+            location = store.get_parent_location(location)
+        except ItemNotFoundError:
+            break
+
+    PersistentSubsectionGrade.objects.filter(
+        user_id=user_id,
+        course_id=usage_key.course_key,
+        usage_key__in=ancestors,
+    ).delete()
+
+
+@receiver(SCORE_CHANGED)
+def invalidate_subsection_grades_on_score_change(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Consume the SCORE_CHANGED signal and drop the persisted subsection grades
+    that contain the updated problem, so that they are recomputed the next
+    time the student is graded.
+    """
+    from courseware.grades import SubsectionGradeStore  # avoid circular import
+    if not SubsectionGradeStore.is_enabled():
+        return
+
+    user_id = kwargs.get('user_id', None)
+    usage_id = kwargs.get('usage_id', None)
+    course_id = kwargs.get('course_id', None)
+    if None in (user_id, usage_id, course_id):
+        return
+
+    try:
+        usage_key = UsageKey.from_string(usage_id)
+    except InvalidKeyError:
+        log.warning(u"Could not invalidate subsection grades for usage_id %s", usage_id)
+        return
+
+    invalidate_subsection_grades(user_id, usage_key.map_into_course(CourseKey.from_string(course_id)))
+
+
+@receiver(post_delete, sender=StudentModule)
+def invalidate_subsection_grades_on_state_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Deleting student state (e.g. an instructor resetting a problem) removes
+    its score without sending SCORE_CHANGED, so invalidate here as well.
+    """
+    from courseware.grades import SubsectionGradeStore  # avoid circular import
+    if not SubsectionGradeStore.is_enabled():
+        return
+
+    if instance.grade is not None or instance.max_grade is not None:
+        invalidate_subsection_grades(
+            instance.student_id,
+            instance.module_state_key.map_into_course(instance.course_id),
+        )
@@ -26,8 +26,9 @@ from django.views.decorators.csrf import csrf_exempt
 
 import newrelic.agent
 
+from capa.safe_exec import SafeExecCache
 from capa.xqueue_interface import XQueueInterface
-from courseware.access import has_access, get_user_role
+from courseware.access import has_access, get_accessible_block_keys, get_user_role
 from courseware.masquerade import (
     MasqueradingKeyValueStore,
     filter_displayed_blocks,
@@ -48,6 +49,7 @@ from lms.djangoapps.lms_xblock.models import XBlockAsidesConfig
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import UsageKey, CourseKey
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from openedx.core.djangoapps.content.course_structures.course_blocks import get_course_blocks
 from openedx.core.lib.xblock_utils import (
     replace_course_urls,
     replace_jump_to_id_urls,
@@ -94,6 +96,14 @@ XQUEUE_INTERFACE = XQueueInterface(
     REQUESTS_AUTH,
 )
 
+# Results of sandboxed problem code, kept in this process in front of the
+# shared cache.
+SAFE_EXEC_CACHE = SafeExecCache(
+    cache,
+    settings.SAFE_EXEC_CACHE_MAX_BYTES,
+    settings.SAFE_EXEC_CACHE_MAX_ITEM_BYTES,
+)
+
 # TODO: course_id and course_key are used interchangeably in this file, which is wrong.
 # Some brave person should make the variable names consistently someday, but the code's
 # coupled enough that it's kind of tricky--you've been warned!
@@ -142,6 +152,11 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
     field_data_cache must include data from the course module and 2 levels of its descendents
     '''
 
+    if settings.FEATURES.get('ENABLE_COURSE_BLOCKS_TOC') and not settings.FIELD_OVERRIDE_PROVIDERS:
+        course_blocks = get_course_blocks(course.id)
+        if course_blocks is not None:
+            return _toc_for_course_blocks(user, request, course, active_chapter, active_section, course_blocks)
+
     with modulestore().bulk_operations(course.id):
         course_module = get_module_for_descriptor(
             user, request, course, field_data_cache, course.id, course=course
@@ -151,13 +166,7 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
 
         toc_chapters = list()
         chapters = course_module.get_display_items()
-
-        # See if the course is gated by one or more content milestones
-        required_content = milestones_helpers.get_required_content(course, user)
-
-        # The user may not actually have to complete the entrance exam, if one is required
-        if not user_must_complete_entrance_exam(request, user, course):
-            required_content = [content for content in required_content if not content == course.entrance_exam_id]
+        required_content = _get_required_content(user, request, course)
 
         for chapter in chapters:
             # Only show required content, if there is required content
@@ -194,6 +203,62 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
         return toc_chapters
 
 
+def _toc_for_course_blocks(user, request, course, active_chapter, active_section, course_blocks):
+    """
+    Create the same table of contents as toc_for_course, from the course's
+    block tree (see get_course_blocks) rather than its modules: the access
+    rules are applied to all of the blocks at once, and no modules are
+    loaded.
+    """
+    accessible = get_accessible_block_keys(user, course, course_blocks)
+    if course_blocks.root not in accessible:
+        return None
+
+    toc_chapters = list()
+    required_content = _get_required_content(user, request, course)
+
+    for chapter_key in course_blocks.get_children(course_blocks.root):
+        if chapter_key not in accessible:
+            continue
+        chapter = course_blocks[chapter_key]
+        if chapter.hide_from_toc or (required_content and unicode(chapter_key) not in required_content):
+            continue
+
+        sections = list()
+        for section_key in course_blocks.get_children(chapter_key):
+            if section_key not in accessible or course_blocks[section_key].hide_from_toc:
+                continue
+            section = course_blocks[section_key]
+            sections.append({'display_name': section.display_name_with_default,
+                             'url_name': section.url_name,
+                             'format': section.format if section.format is not None else '',
+                             'due': section.due,
+                             'active': chapter.url_name == active_chapter and section.url_name == active_section,
+                             'graded': section.graded,
+                             })
+        toc_chapters.append({
+            'display_name': chapter.display_name_with_default,
+            'url_name': chapter.url_name,
+            'sections': sections,
+            'active': chapter.url_name == active_chapter
+        })
+    return toc_chapters
+
+
+def _get_required_content(user, request, course):
+    """
+    Return the locations (as strings) of the chapters the user is limited to
+    by the course's content milestones, or an empty list if they aren't.
+    """
+    # See if the course is gated by one or more content milestones
+    required_content = milestones_helpers.get_required_content(course, user)
+
+    # The user may not actually have to complete the entrance exam, if one is required
+    if not user_must_complete_entrance_exam(request, user, course):
+        required_content = [content for content in required_content if not content == course.entrance_exam_id]
+    return required_content
+
+
 def get_module(user, request, usage_key, field_data_cache,
                position=None, log_if_not_found=True, wrap_xmodule_display=True,
                grade_bucket_type=None, depth=0,
@@ -666,7 +731,7 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
         course_id=course_id,
         open_ended_grading_interface=open_ended_grading_interface,
         s3_interface=s3_interface,
-        cache=cache,
+        cache=SAFE_EXEC_CACHE,
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
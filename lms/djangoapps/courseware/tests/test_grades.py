@@ -8,9 +8,16 @@ from mock import patch
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
-from courseware.grades import field_data_cache_for_grading, grade, iterate_grades_for, MaxScoresCache
+from capa.tests.response_xml_factory import StringResponseXMLFactory
+from courseware.grades import (
+    field_data_cache_for_grading, grade, iterate_grades_for, MaxScoresCache, static_max_score, SubsectionGradeStore
+)
+from courseware.module_render import get_module_for_descriptor
+from courseware.model_data import set_score
+from courseware.models import PersistentSubsectionGrade, SCORE_CHANGED
 from student.tests.factories import UserFactory
 from student.models import CourseEnrollment
+from xmodule.graders import Score
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
@@ -194,3 +201,201 @@ class TestFieldDataCacheScorableLocations(ModuleStoreTestCase):
         self.assertNotIn('html', block_types)
         self.assertNotIn('discussion', block_types)
         self.assertIn('problem', block_types)
+
+
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_SUBSECTION_GRADES': True})
+class TestSubsectionGradeStore(ModuleStoreTestCase):
+    """
+    Tests for persisting subsection scores between grading runs.
+    """
+    def setUp(self):
+        super(TestSubsectionGradeStore, self).setUp()
+        self.student = UserFactory.create()
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(category='chapter', parent=self.course)
+        self.sequential = ItemFactory.create(
+            category='sequential', parent=chapter, metadata={'graded': True, 'format': 'Homework'}
+        )
+        self.vertical = ItemFactory.create(category='vertical', parent=self.sequential)
+        self.problem = ItemFactory.create(category='problem', parent=self.vertical)
+        self.course = self.store.get_course(self.course.id)
+
+        CourseEnrollment.enroll(self.student, self.course.id)
+        self.request = RequestFactory().get('/')
+        self.request.user = self.student
+        self.request.session = {}
+
+    def _stored_rows(self):
+        """Return the persisted grade rows for our student."""
+        return PersistentSubsectionGrade.objects.filter(user=self.student, course_id=self.course.id)
+
+    def test_round_trip(self):
+        store = SubsectionGradeStore(self.student, self.course)
+        score = Score(1.0, 2.0, True, u"Problem", self.problem.location)
+        store.set(self.sequential.location, True, [score])
+        store.push()
+
+        store = SubsectionGradeStore(self.student, self.course)
+        store.fetch()
+        self.assertEqual(store.num_stored(), 1)
+        self.assertEqual(store.get(self.sequential.location), (True, [score]))
+
+    def test_unattempted_section_is_stored(self):
+        grade(self.student, self.request, self.course)
+        row = self._stored_rows().get()
+        self.assertFalse(row.attempted)
+
+    def test_grade_reads_stored_scores(self):
+        set_score(self.student.id, self.problem.location, 1, 2)
+        first = grade(self.student, self.request, self.course)
+        self.assertTrue(self._stored_rows().get().attempted)
+
+        with patch('courseware.grades._compute_section_scores') as mock_compute:
+            second = grade(self.student, self.request, self.course)
+        self.assertFalse(mock_compute.called)
+        self.assertEqual(first['percent'], second['percent'])
+
+    def test_score_change_invalidates(self):
+        grade(self.student, self.request, self.course)
+        self.assertEqual(self._stored_rows().count(), 1)
+
+        SCORE_CHANGED.send(
+            sender=None,
+            points_possible=2,
+            points_earned=1,
+            user_id=self.student.id,
+            course_id=unicode(self.course.id),
+            usage_id=unicode(self.problem.location),
+        )
+        self.assertEqual(self._stored_rows().count(), 0)
+
+    def test_score_change_ignored_when_disabled(self):
+        grade(self.student, self.request, self.course)
+
+        with patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_SUBSECTION_GRADES': False}):
+            with patch('courseware.models.invalidate_subsection_grades') as mock_invalidate:
+                SCORE_CHANGED.send(
+                    sender=None,
+                    points_possible=2,
+                    points_earned=1,
+                    user_id=self.student.id,
+                    course_id=unicode(self.course.id),
+                    usage_id=unicode(self.problem.location),
+                )
+        self.assertFalse(mock_invalidate.called)
+
+    def test_dynamic_section_not_stored(self):
+        ItemFactory.create(category='library_content', parent=self.vertical)
+        self.course = self.store.get_course(self.course.id)
+
+        grade(self.student, self.request, self.course)
+        self.assertFalse(self._stored_rows().exists())
+
+    def test_other_course_version_ignored(self):
+        grade(self.student, self.request, self.course)
+        self._stored_rows().update(course_version=u"stale")
+
+        store = SubsectionGradeStore(self.student, self.course)
+        store.fetch()
+        self.assertEqual(store.num_stored(), 0)
+
+
+class TestBulkGrades(ModuleStoreTestCase):
+    """
+    The bulk grader must produce the same gradesets as grading students one
+    at a time.
+    """
+    def setUp(self):
+        super(TestBulkGrades, self).setUp()
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(category='chapter', parent=self.course)
+        sequential = ItemFactory.create(
+            category='sequential', parent=chapter, metadata={'graded': True, 'format': 'Homework'}
+        )
+        vertical = ItemFactory.create(category='vertical', parent=sequential)
+        self.problems = [
+            ItemFactory.create(category='problem', parent=vertical, metadata={'weight': weight})
+            for weight in (None, 3)
+        ]
+        self.course = self.store.get_course(self.course.id)
+        self.students = [UserFactory.create() for _ in xrange(4)]
+        for student in self.students:
+            CourseEnrollment.enroll(student, self.course.id)
+
+        set_score(self.students[0].id, self.problems[0].location, 1, 1)
+        set_score(self.students[0].id, self.problems[1].location, 1, 2)
+        set_score(self.students[1].id, self.problems[1].location, 2, 2)
+
+    def _gradesets(self, keep_raw_scores=False):
+        """Map students to the gradesets iterate_grades_for computes for them."""
+        return {
+            student: gradeset
+            for student, gradeset, _ in iterate_grades_for(self.course, self.students, keep_raw_scores)
+        }
+
+    def test_matches_individual_grading(self):
+        expected = self._gradesets(keep_raw_scores=True)
+        with patch.dict('django.conf.settings.FEATURES', {'ENABLE_BULK_GRADE_COMPUTATION': True}):
+            actual = self._gradesets(keep_raw_scores=True)
+
+        for student in self.students:
+            self.assertEqual(actual[student]['percent'], expected[student]['percent'])
+            self.assertEqual(actual[student]['grade'], expected[student]['grade'])
+            self.assertEqual(actual[student]['totaled_scores'], expected[student]['totaled_scores'])
+            self.assertEqual(
+                sorted(actual[student]['raw_scores']),
+                sorted(expected[student]['raw_scores'])
+            )
+
+    def test_unknown_max_score_falls_back(self):
+        with patch.dict('django.conf.settings.FEATURES', {'ENABLE_BULK_GRADE_COMPUTATION': True}):
+            with patch('courseware.bulk_grades.grades.grade', wraps=grade) as mock_grade:
+                with patch('courseware.bulk_grades.grades.static_max_score', return_value=None):
+                    self._gradesets()
+        # Student 1 hasn't seen problem 0, and nobody has cached its max score
+        # yet, so at least that student has to be graded individually.
+        self.assertTrue(mock_grade.called)
+
+    def test_static_max_score_avoids_fallback(self):
+        with patch.dict('django.conf.settings.FEATURES', {'ENABLE_BULK_GRADE_COMPUTATION': True}):
+            with patch('courseware.bulk_grades.grades.grade', wraps=grade) as mock_grade:
+                self._gradesets()
+        # The problems' max scores can be read from their XML.
+        self.assertFalse(mock_grade.called)
+
+
+class TestStaticMaxScore(ModuleStoreTestCase):
+    """
+    Students who haven't seen a problem are graded on the max score read from
+    its XML, without instantiating it.
+    """
+    def setUp(self):
+        super(TestStaticMaxScore, self).setUp()
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(category='chapter', parent=self.course)
+        sequential = ItemFactory.create(
+            category='sequential', parent=chapter, metadata={'graded': True, 'format': 'Homework'}
+        )
+        self.problem = ItemFactory.create(
+            category='problem',
+            parent=sequential,
+            data=StringResponseXMLFactory().build_xml(answer='foo', num_responses=2),
+        )
+        self.course = self.store.get_course(self.course.id)
+        self.student = UserFactory.create()
+        CourseEnrollment.enroll(self.student, self.course.id)
+
+    def test_static_max_score(self):
+        self.assertEqual(static_max_score(self.store.get_item(self.problem.location)), 2)
+
+        request = RequestFactory().get('/')
+        request.user = self.student
+        request.session = {}
+        with patch('courseware.grades.get_module_for_descriptor', wraps=get_module_for_descriptor) as get_module:
+            gradeset = grade(self.student, request, self.course, keep_raw_scores=True)
+        self.assertEqual(
+            [(score.earned, score.possible) for score in gradeset['raw_scores']], [(0.0, 2.0)]
+        )
+        # The problem wasn't instantiated.
+        instantiated = [call_args[0][2].location for call_args in get_module.call_args_list]
+        self.assertNotIn(self.problem.location, instantiated)
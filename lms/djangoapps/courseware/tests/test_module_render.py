@@ -38,6 +38,7 @@ from courseware.tests.tests import LoginEnrollmentTestCase
 from courseware.tests.test_submitting_problems import TestSubmittingProblems
 from lms.djangoapps.lms_xblock.runtime import quote_slashes
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
+from openedx.core.djangoapps.content.course_structures.tasks import update_course_structure
 from student.models import anonymous_id_for_user
 from xmodule.modulestore.tests.django_utils import (
     TEST_DATA_MIXED_TOY_MODULESTORE,
@@ -681,6 +682,24 @@ class TestTOC(ModuleStoreTestCase):
             for toc_section in expected:
                 self.assertIn(toc_section, actual)
 
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0), (ModuleStoreEnum.Type.split, 6, 0))
+    @ddt.unpack
+    def test_toc_from_course_blocks(self, default_ms, setup_finds, setup_sends):
+        with self.store.default_store(default_ms):
+            self.setup_modulestore(default_ms, setup_finds, setup_sends)
+            update_course_structure(unicode(self.course_key))
+            expected = render.toc_for_course(
+                self.request.user, self.request, self.toy_course, self.chapter, 'Welcome', self.field_data_cache
+            )
+
+            # The table of contents comes from the course structure, without loading any modules.
+            with patch.dict(settings.FEATURES, {'ENABLE_COURSE_BLOCKS_TOC': True}):
+                with check_mongo_calls(0):
+                    actual = render.toc_for_course(
+                        self.request.user, self.request, self.toy_course, self.chapter, 'Welcome', self.field_data_cache
+                    )
+        self.assertEqual(actual, expected)
+
 
 @attr('shard_1')
 @ddt.ddt
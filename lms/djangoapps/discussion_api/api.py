@@ -31,10 +31,15 @@ from django_comment_client.base.views import (
     get_thread_created_event_data,
     track_forum_event,
 )
-from django_comment_client.utils import get_accessible_discussion_modules, is_commentable_cohorted
+from django_comment_client.utils import (
+    get_accessible_discussion_modules,
+    has_discussion_privileges,
+    is_commentable_cohorted,
+)
 from lms.lib.comment_client.comment import Comment
 from lms.lib.comment_client.thread import Thread
-from lms.lib.comment_client.utils import CommentClientRequestError
+from lms.lib.comment_client.user import User as CommentClientUser
+from lms.lib.comment_client.utils import CommentClientRequestError, perform_concurrently
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort_id
 
 
@@ -62,10 +67,13 @@ def _get_thread_and_context(request, thread_id, retrieve_kwargs=None):
     try:
         if "mark_as_read" not in retrieve_kwargs:
             retrieve_kwargs["mark_as_read"] = False
-        cc_thread = Thread(id=thread_id).retrieve(**retrieve_kwargs)
+        cc_thread, cc_requester = perform_concurrently(
+            lambda: Thread(id=thread_id).retrieve(**retrieve_kwargs),
+            CommentClientUser.from_django_user(request.user).retrieve,
+        )
         course_key = CourseKey.from_string(cc_thread["course_id"])
         course = _get_course_or_404(course_key, request.user)
-        context = get_context(course, request, cc_thread)
+        context = get_context(course, request, cc_thread, cc_requester)
         if (
                 not context["is_requester_privileged"] and
                 cc_thread["group_id"] and
@@ -293,12 +301,11 @@ def get_thread_list(
         })
 
     course = _get_course_or_404(course_key, request.user)
-    context = get_context(course, request)
 
     query_params = {
         "user_id": unicode(request.user.id),
         "group_id": (
-            None if context["is_requester_privileged"] else
+            None if has_discussion_privileges(request.user, course.id) else
             get_cohort_id(request.user, course.id)
         ),
         "page": page,
@@ -319,12 +326,19 @@ def get_thread_list(
             })
 
     if following:
+        context = get_context(course, request)
         threads, result_page, num_pages = context["cc_requester"].subscribed_threads(query_params)
     else:
         query_params["course_id"] = unicode(course.id)
         query_params["commentable_ids"] = ",".join(topic_id_list) if topic_id_list else None
         query_params["text"] = text_search
-        threads, result_page, num_pages, text_search_rewrite = Thread.search(query_params)
+        # The search doesn't depend on the requester's comments service user,
+        # so both are fetched at once.
+        cc_requester, (threads, result_page, num_pages, text_search_rewrite) = perform_concurrently(
+            CommentClientUser.from_django_user(request.user).retrieve,
+            lambda: Thread.search(query_params),
+        )
+        context = get_context(course, request, cc_requester=cc_requester)
     # The comments service returns the last page of results if the requested
     # page is beyond the last page, but we want be consistent with DRF's general
     # behavior and return a 404 in that case
@@ -7,6 +7,7 @@ from urlparse import parse_qs, urlparse, urlunparse
 from urllib import urlencode
 
 import ddt
+from eventtracking import tracker
 import httpretty
 import mock
 from pytz import UTC
@@ -14,6 +15,7 @@ from pytz import UTC
 from django.core.exceptions import ValidationError
 from django.http import Http404
 from django.test.client import RequestFactory
+from django.test.utils import override_settings
 
 from rest_framework.exceptions import PermissionDenied
 
@@ -781,6 +783,27 @@ class GetThreadListTest(CommentsServiceMockMixin, UrlResetMixin, SharedModuleSto
             "text": ["test search string"],
         })
 
+    @override_settings(COMMENTS_SERVICE_CONCURRENT_REQUESTS=2)
+    def test_text_search_event_context(self):
+        # The search runs alongside the user lookup, in another thread, but
+        # its event is still tracked in the context of the request.
+        self.register_get_threads_search_response([], None)
+        contexts = []
+
+        def capture_context(*args, **kwargs):  # pylint: disable=unused-argument
+            """
+            Record the tracking context the event is emitted in.
+            """
+            contexts.append(tracker.get_tracker().resolve_context())
+
+        request_context = {"user_id": self.user.id, "course_id": unicode(self.course.id)}
+        with tracker.get_tracker().context("test.request", request_context):
+            with mock.patch("eventtracking.tracker.emit", side_effect=capture_context) as mock_emit:
+                get_thread_list(self.request, self.course.id, page=1, page_size=10, text_search="test search string")
+        self.assertEqual(mock_emit.call_args[0][0], "edx.forum.searched")
+        self.assertEqual(len(contexts), 1)
+        self.assertDictContainsSubset(request_context, contexts[0])
+
     def test_following(self):
         self.register_subscribed_threads_response(self.user, [], page=1, num_pages=1)
         result = get_thread_list(
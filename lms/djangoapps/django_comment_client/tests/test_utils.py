@@ -8,6 +8,8 @@ from django.utils.timezone import UTC as django_utc
 
 from django.core.urlresolvers import reverse
 from django.test import TestCase, RequestFactory
+from django.test.utils import override_settings
+from django.utils import translation
 from edxmako import add_lookup
 
 from django_comment_client.tests.factories import RoleFactory
@@ -23,11 +25,12 @@ from student.tests.factories import UserFactory, AdminFactory, CourseEnrollmentF
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from openedx.core.djangoapps.util.testing import ContentGroupTestCase
 from student.roles import CourseStaffRole
-from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory, check_mongo_calls
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase, TEST_DATA_MIXED_TOY_MODULESTORE
 from xmodule.modulestore.django import modulestore
 from opaque_keys.edx.locator import CourseLocator
 from teams.tests.factories import CourseTeamFactory
+from lms.lib.comment_client.utils import CommentClientRequestError, perform_concurrently
 
 
 @attr('shard_1')
@@ -255,6 +258,15 @@ class CachedDiscussionIdMapTestCase(ModuleStoreTestCase):
         CourseStructure.objects.all().delete()
         self.verify_discussion_metadata()
 
+    def test_get_discussion_id_map_from_course_blocks(self):
+        # The modules' metadata and access come from the course's block tree, without loading them.
+        with check_mongo_calls(0):
+            self.verify_discussion_metadata()
+
+    def test_get_discussion_id_map_without_course_blocks(self):
+        with mock.patch.object(utils, 'get_course_blocks', return_value=None):
+            self.verify_discussion_metadata()
+
     def test_get_missing_discussion_id_map_from_cache(self):
         metadata = utils.get_cached_discussion_id_map(self.course, ['bogus_id'], self.user)
         self.assertEqual(metadata, {})
@@ -286,6 +298,13 @@ class CachedDiscussionIdMapTestCase(ModuleStoreTestCase):
         self.assertTrue(utils.discussion_category_id_access(self.course, self.user, 'private_discussion_id'))
         self.assertFalse(utils.discussion_category_id_access(self.course, user, 'private_discussion_id'))
 
+    def test_discussion_id_map_looked_up_once_per_request(self):
+        utils.get_cached_discussion_key(self.course, 'test_discussion_id')
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                utils.get_cached_discussion_key(self.course, 'test_discussion_id_2'), self.discussion2.location
+            )
+
 
 class CategoryMapTestMixin(object):
     """
@@ -1232,3 +1251,28 @@ class IsCommentableCohortedTestCase(ModuleStoreTestCase):
         # Verify that team discussions are not cohorted, but other discussions are
         self.assertFalse(utils.is_commentable_cohorted(course.id, team.discussion_topic_id))
         self.assertTrue(utils.is_commentable_cohorted(course.id, "random"))
+
+
+@attr('shard_1')
+@override_settings(COMMENTS_SERVICE_CONCURRENT_REQUESTS=2)
+class PerformConcurrentlyTestCase(TestCase):
+    """
+    Test the concurrent requests to the comments service.
+    """
+    def test_results_in_order(self):
+        self.assertEqual(
+            perform_concurrently(*[lambda i=i: i for i in range(5)]),
+            [0, 1, 2, 3, 4]
+        )
+
+    def test_language(self):
+        with translation.override('eo'):
+            self.assertEqual(perform_concurrently(translation.get_language, translation.get_language), ['eo', 'eo'])
+
+    def test_error(self):
+        def fail():
+            """ A request which fails """
+            raise CommentClientRequestError("Not found", 404)
+
+        with self.assertRaises(CommentClientRequestError):
+            perform_concurrently(lambda: None, fail)
@@ -4,6 +4,7 @@ import json
 import logging
 
 import pytz
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
 from django.db import connection
@@ -12,7 +13,9 @@ from django.utils.timezone import UTC
 import pystache_custom as pystache
 from opaque_keys.edx.locations import i4xEncoder
 from opaque_keys.edx.keys import CourseKey
+from request_cache import get_cache
 from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.split_mongo.mongo_connection import StructureLRU
 
 from django_comment_common.models import Role, FORUM_ROLE_STUDENT
 from django_comment_client.permissions import check_permissions_by_view, has_permission, get_team
@@ -20,7 +23,8 @@ from django_comment_client.settings import MAX_COMMENT_DEPTH
 from edxmako import lookup_template
 
 from courseware import courses
-from courseware.access import has_access
+from courseware.access import get_accessible_block_keys, has_access
+from openedx.core.djangoapps.content.course_structures.course_blocks import get_course_blocks
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from openedx.core.djangoapps.course_groups.cohorts import (
     get_course_cohort_settings, get_cohort_by_id, get_cohort_id, is_course_cohorted
@@ -30,6 +34,8 @@ from openedx.core.djangoapps.course_groups.models import CourseUserGroup
 
 log = logging.getLogger(__name__)
 
+DISCUSSION_ID_MAP_LRU = StructureLRU()
+
 
 def extract(dic, keys):
     return {k: dic.get(k) for k in keys}
@@ -114,29 +120,118 @@ def get_discussion_id_map_entry(module):
         module.discussion_id,
         {
             "location": module.location,
-            "title": module.discussion_category.split("/")[-1].strip() + " / " + module.discussion_target
+            "title": _get_discussion_title(module)
         }
     )
 
 
+def _get_discussion_title(module):
+    """
+    Returns the title of a discussion module (or of its block in the course's block tree).
+    """
+    return module.discussion_category.split("/")[-1].strip() + " / " + module.discussion_target
+
+
 class DiscussionIdMapIsNotCached(Exception):
     """Thrown when the discussion id map is not cached for this course, but an attempt was made to access it."""
     pass
 
 
+def _get_cached_discussion_id_map(course):
+    """
+    Returns the cached mapping of discussion ids to usage keys for course, or raises DiscussionIdMapIsNotCached.
+
+    The mapping is looked up at most once per request. Each process keeps the decoded mappings of the last
+    settings.COURSE_BLOCKS_LRU_SIZE course structures it read, so a new request only has to check that the
+    structure hasn't changed.
+    """
+    request_cache = get_cache('django_comment_client.discussion_id_map')
+    if course.id not in request_cache:
+        request_cache[course.id] = _load_discussion_id_map(course.id)
+    cached_mapping = request_cache[course.id]
+    if not cached_mapping:
+        raise DiscussionIdMapIsNotCached()
+    return cached_mapping
+
+
+def _load_discussion_id_map(course_key):
+    """
+    Returns the mapping of discussion ids to usage keys from the course structure, or None.
+    """
+    modified = CourseStructure.objects.filter(course_id=course_key).values_list('modified', flat=True)
+    if not modified:
+        return None
+    lru_key = (unicode(course_key), modified[0])
+
+    lru_size = getattr(settings, 'COURSE_BLOCKS_LRU_SIZE', 0)
+    if lru_size:
+        cached_mapping = DISCUSSION_ID_MAP_LRU.get(lru_key)
+        if cached_mapping is not None:
+            return cached_mapping
+
+    try:
+        cached_mapping = CourseStructure.objects.get(course_id=course_key).discussion_id_map
+    except CourseStructure.DoesNotExist:
+        return None
+    if cached_mapping and lru_size:
+        DISCUSSION_ID_MAP_LRU.set(lru_key, cached_mapping, lru_size)
+    return cached_mapping
+
+
 def get_cached_discussion_key(course, discussion_id):
     """
     Returns the usage key of the discussion module associated with discussion_id if it is cached. If the discussion id
     map is cached but does not contain discussion_id, returns None. If the discussion id map is not cached for course,
     raises a DiscussionIdMapIsNotCached exception.
     """
-    try:
-        cached_mapping = CourseStructure.objects.get(course_id=course.id).discussion_id_map
-        if not cached_mapping:
-            raise DiscussionIdMapIsNotCached()
-        return cached_mapping.get(discussion_id)
-    except CourseStructure.DoesNotExist:
-        raise DiscussionIdMapIsNotCached()
+    return _get_cached_discussion_id_map(course).get(discussion_id)
+
+
+def _get_accessible_discussion_blocks(course, user):
+    """
+    Returns the course's block tree and the keys of the blocks in it that user can load, or (None, None) if the
+    tree can't stand in for the course's modules (it isn't generated yet, or field overrides are enabled).
+
+    The accessible blocks are worked out at most once per request.
+    """
+    if settings.FIELD_OVERRIDE_PROVIDERS:
+        return None, None
+    request_cache = get_cache('django_comment_client.accessible_blocks')
+    cache_key = (course.id, user.id)
+    if cache_key not in request_cache:
+        course_blocks = get_course_blocks(course.id)
+        accessible = None if course_blocks is None else get_accessible_block_keys(user, course, course_blocks)
+        request_cache[cache_key] = (course_blocks, accessible)
+    return request_cache[cache_key]
+
+
+def _get_cached_discussion_entries(course, discussion_ids, user):
+    """
+    Returns a dict mapping each of discussion_ids to the metadata of its discussion module, if the module is valid
+    and visible to the user, and the accessibility of each as a dict of booleans. Raises DiscussionIdMapIsNotCached
+    if the discussion id map is not cached for course.
+
+    The modules' metadata and access rules come from the course's block tree when it's available, so that
+    resolving many ids doesn't load or check access to each module separately.
+    """
+    cached_mapping = _get_cached_discussion_id_map(course)
+    keys = {
+        discussion_id: cached_mapping[discussion_id]
+        for discussion_id in discussion_ids if discussion_id in cached_mapping
+    }
+    course_blocks, accessible = _get_accessible_discussion_blocks(course, user) if keys else (None, None)
+
+    entries = {}
+    for discussion_id, key in keys.iteritems():
+        if course_blocks is not None and key in course_blocks:
+            block = course_blocks[key]
+            if key in accessible and block.discussion_category and block.discussion_target:
+                entries[discussion_id] = {"location": key, "title": _get_discussion_title(block)}
+        else:
+            module = modulestore().get_item(key)
+            if has_required_keys(module) and has_access(user, 'load', module, course.id):
+                entries[discussion_id] = get_discussion_id_map_entry(module)[1]
+    return entries
 
 
 def get_cached_discussion_id_map(course, discussion_ids, user):
@@ -145,16 +240,7 @@ def get_cached_discussion_id_map(course, discussion_ids, user):
     user. If not, returns the result of get_discussion_id_map
     """
     try:
-        entries = []
-        for discussion_id in discussion_ids:
-            key = get_cached_discussion_key(course, discussion_id)
-            if not key:
-                continue
-            module = modulestore().get_item(key)
-            if not (has_required_keys(module) and has_access(user, 'load', module, course.id)):
-                continue
-            entries.append(get_discussion_id_map_entry(module))
-        return dict(entries)
+        return _get_cached_discussion_entries(course, discussion_ids, user)
     except DiscussionIdMapIsNotCached:
         return get_discussion_id_map(course, user)
 
@@ -358,11 +444,7 @@ def discussion_category_id_access(course, user, discussion_id):
     if discussion_id in course.top_level_discussion_topic_ids:
         return True
     try:
-        key = get_cached_discussion_key(course, discussion_id)
-        if not key:
-            return False
-        module = modulestore().get_item(key)
-        return has_required_keys(module) and has_access(user, 'load', module, course.id)
+        return discussion_id in _get_cached_discussion_entries(course, [discussion_id], user)
     except DiscussionIdMapIsNotCached:
         return discussion_id in get_discussion_categories_ids(course, user)
 
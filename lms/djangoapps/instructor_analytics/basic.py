@@ -33,6 +33,9 @@ SALE_ORDER_FEATURES = ('id', 'company_name', 'company_contact_name', 'company_co
                        'bill_to_country', 'order_type',)
 
 AVAILABLE_FEATURES = STUDENT_FEATURES + PROFILE_FEATURES
+
+# Number of students fetched per query by the `iter_*` functions below.
+STUDENTS_PER_QUERY = 1000
 COURSE_REGISTRATION_FEATURES = ('code', 'course_id', 'created_by', 'created_at', 'is_valid')
 COUPON_FEATURES = ('code', 'course_id', 'percentage_discount', 'description', 'expiration_date', 'is_active')
 
@@ -168,6 +171,15 @@ def enrolled_students_features(course_key, features):
         {'username': 'username3', 'first_name': 'firstname3'}
     ]
     """
+    return list(iter_enrolled_students_features(course_key, features))
+
+
+def iter_enrolled_students_features(course_key, features, chunk_size=STUDENTS_PER_QUERY):
+    """
+    Generator version of `enrolled_students_features`. Students are fetched
+    `chunk_size` at a time, so memory use doesn't grow with the size of the
+    course.
+    """
     include_cohort_column = 'cohort' in features
 
     students = User.objects.filter(
@@ -215,7 +227,17 @@ def enrolled_students_features(course_key, features):
             )
         return student_dict
 
-    return [extract_student(student, features) for student in students]
+    # Page through the students by username rather than by offset so that
+    # each query stays cheap however far into the course we are.
+    last_username = None
+    while True:
+        chunk = students if last_username is None else students.filter(username__gt=last_username)
+        chunk = list(chunk[:chunk_size])
+        for student in chunk:
+            yield extract_student(student, features)
+        if len(chunk) < chunk_size:
+            return
+        last_username = chunk[-1].username
 
 
 def list_may_enroll(course_key, features):
@@ -232,6 +254,14 @@ def list_may_enroll(course_key, features):
     Note that result does not include students who may enroll and have
     already done so.
     """
+    return list(iter_may_enroll(course_key, features))
+
+
+def iter_may_enroll(course_key, features):
+    """
+    Generator version of `list_may_enroll`, which doesn't load every
+    student into memory at once.
+    """
     may_enroll_and_unenrolled = CourseEnrollmentAllowed.may_enroll_and_unenrolled(course_key)
 
     def extract_student(student, features):
@@ -240,7 +270,8 @@ def list_may_enroll(course_key, features):
         """
         return dict((feature, getattr(student, feature)) for feature in features)
 
-    return [extract_student(student, features) for student in may_enroll_and_unenrolled]
+    for student in may_enroll_and_unenrolled.iterator():
+        yield extract_student(student, features)
 
 
 def coupon_codes_features(features, coupons_list, course_id):
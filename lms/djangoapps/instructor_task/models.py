@@ -193,9 +193,9 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. `store_rows()` accepts any iterable of rows, including a
+    generator, and writes them out as they are produced, so the whole dataset
+    never has to be held in memory.
     """
     @classmethod
     def from_config(cls, config_name):
@@ -209,6 +209,20 @@ class ReportStore(object):
         elif storage_type.lower() == "localfs":
             return LocalFSReportStore.from_config(config_name)
 
+    # Suffix given to the partial CSV files that sharded reports are built
+    # from, and to files that are still being written. These are never listed.
+    PARTIAL_SUFFIX = '.part'
+
+    @classmethod
+    def partial_filename(cls, filename, index):
+        """Return the name of the `index`th partial file of the report `filename`."""
+        return u"{}{}{:05d}".format(filename, cls.PARTIAL_SUFFIX, index)
+
+    @classmethod
+    def is_partial_filename(cls, filename):
+        """Is `filename` the name of a partial report file?"""
+        return cls.PARTIAL_SUFFIX in os.path.splitext(filename)[1]
+
     def _get_utf8_encoded_rows(self, rows):
         """
         Given a list of `rows` containing unicode strings, return a
@@ -218,6 +232,14 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_unicode_rows(self, csv_file):
+        """
+        Read rows out of a utf-8 encoded CSV file object, decoding each value
+        back into unicode.
+        """
+        for row in csv.reader(csv_file):
+            yield [item.decode('utf-8') for item in row]
+
 
 class S3ReportStore(ReportStore):
     """
@@ -241,6 +263,10 @@ class S3ReportStore(ReportStore):
 
         self.bucket = conn.get_bucket(bucket_name)
 
+    # S3 requires every part of a multipart upload except the last to be at
+    # least 5MB.
+    MULTIPART_CHUNK_SIZE = 5 * 1024 * 1024
+
     @classmethod
     def from_config(cls, config_name):
         """
@@ -318,14 +344,67 @@ class S3ReportStore(ReportStore):
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
+
+        `rows` is consumed lazily. Once the compressed output reaches
+        `MULTIPART_CHUNK_SIZE` it is sent to S3 as one part of a multipart
+        upload, so only a single part is ever held in memory. The file only
+        becomes visible in S3 once the upload is completed.
         """
+        key = self.key_for(course_id, filename)
         output_buffer = StringIO()
         gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
         csvwriter = csv.writer(gzip_file)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        gzip_file.close()
+        multipart_upload = None
+        part_number = 0
+        try:
+            for row in self._get_utf8_encoded_rows(rows):
+                csvwriter.writerow(row)
+                if output_buffer.tell() >= self.MULTIPART_CHUNK_SIZE:
+                    if multipart_upload is None:
+                        multipart_upload = self.bucket.initiate_multipart_upload(
+                            key.key,
+                            headers={"Content-Encoding": "gzip", "Content-Type": "text/csv"}
+                        )
+                    part_number += 1
+                    self._upload_part(multipart_upload, part_number, output_buffer)
+            gzip_file.close()
+
+            if multipart_upload is None:
+                # Everything fit in a single part; upload it the simple way.
+                self.store(course_id, filename, output_buffer)
+            else:
+                self._upload_part(multipart_upload, part_number + 1, output_buffer)
+                multipart_upload.complete_upload()
+        except Exception:
+            if multipart_upload is not None:
+                multipart_upload.cancel_upload()
+            raise
+
+    @staticmethod
+    def _upload_part(multipart_upload, part_number, buff):
+        """
+        Upload the contents of `buff` as part `part_number` of
+        `multipart_upload`, then empty `buff` so it can be reused for the
+        next part.
+        """
+        buff.seek(0)
+        multipart_upload.upload_part_from_file(buff, part_number)
+        buff.seek(0)
+        buff.truncate()
 
-        self.store(course_id, filename, output_buffer)
+    def iter_rows(self, course_id, filename):
+        """
+        Yield the rows of a CSV file previously written with `store_rows()`,
+        with every value decoded to unicode.
+        """
+        key = self.key_for(course_id, filename)
+        gzip_file = GzipFile(fileobj=StringIO(key.get_contents_as_string()), mode="rb")
+        for row in self._get_unicode_rows(gzip_file):
+            yield row
+
+    def delete(self, course_id, filename):
+        """Remove `filename` from the store, if it exists."""
+        self.key_for(course_id, filename).delete()
 
     def links_for(self, course_id):
         """
@@ -336,6 +415,7 @@ class S3ReportStore(ReportStore):
         return [
             (key.key.split("/")[-1], key.generate_url(expires_in=300))
             for key in sorted(self.bucket.list(prefix=course_dir.key), reverse=True, key=lambda k: k.last_modified)
+            if not self.is_partial_filename(key.key)
         ]
 
 
@@ -395,12 +475,40 @@ class LocalFSReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of strings),
         write this data out.
+
+        `rows` is consumed lazily and written straight to disk. The file is
+        written under a partial name first and renamed once complete, so
+        `links_for()` never returns a half-written report.
         """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+        full_path = self.path_to(course_id, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.mkdir(directory)
 
-        self.store(course_id, filename, output_buffer)
+        temp_path = full_path + self.PARTIAL_SUFFIX
+        try:
+            with open(temp_path, "wb") as f:
+                csvwriter = csv.writer(f)
+                csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            os.rename(temp_path, full_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def iter_rows(self, course_id, filename):
+        """
+        Yield the rows of a CSV file previously written with `store_rows()`,
+        with every value decoded to unicode.
+        """
+        with open(self.path_to(course_id, filename), "rb") as f:
+            for row in self._get_unicode_rows(f):
+                yield row
+
+    def delete(self, course_id, filename):
+        """Remove `filename` from the store, if it exists."""
+        full_path = self.path_to(course_id, filename)
+        if os.path.exists(full_path):
+            os.remove(full_path)
 
     def links_for(self, course_id):
         """
@@ -413,7 +521,11 @@ class LocalFSReportStore(ReportStore):
         course_dir = self.path_to(course_id, '')
         if not os.path.exists(course_dir):
             return []
-        files = [(filename, os.path.join(course_dir, filename)) for filename in os.listdir(course_dir)]
+        files = [
+            (filename, os.path.join(course_dir, filename))
+            for filename in os.listdir(course_dir)
+            if not self.is_partial_filename(filename)
+        ]
         files.sort(key=lambda (filename, full_path): os.path.getmtime(full_path), reverse=True)
 
         return [
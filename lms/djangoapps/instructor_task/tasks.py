@@ -36,6 +36,8 @@ from instructor_task.tasks_helper import (
     delete_problem_module_state,
     upload_grades_csv,
     upload_problem_grade_report,
+    queue_report_shards,
+    run_report_shard,
     upload_students_csv,
     cohort_students_and_upload,
     upload_enrollment_report,
@@ -156,7 +158,10 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    if settings.GRADES_DOWNLOAD_STUDENTS_PER_SHARD:
+        task_fn = partial(queue_report_shards, calculate_report_shard, 'grade_report', xmodule_instance_args)
+    else:
+        task_fn = partial(upload_grades_csv, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
@@ -173,10 +178,23 @@ def calculate_problem_grade_report(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_problem_grade_report, xmodule_instance_args)
+    if settings.GRADES_DOWNLOAD_STUDENTS_PER_SHARD:
+        task_fn = partial(queue_report_shards, calculate_report_shard, 'problem_grade_report', xmodule_instance_args)
+    else:
+        task_fn = partial(upload_problem_grade_report, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_report_shard(entry_id, csv_name, shard_index, user_ids, timestamp_str, subtask_status_dict):
+    """
+    Build one shard of a grade or problem grade report as a subtask of the
+    InstructorTask `entry_id`, and merge the report if this is the last shard
+    to finish. See `queue_report_shards`.
+    """
+    return run_report_shard(entry_id, csv_name, shard_index, user_ids, timestamp_str, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
@@ -8,10 +8,11 @@ from collections import OrderedDict
 from datetime import datetime
 from django.conf import settings
 from eventtracking import tracker
-from itertools import chain
+from itertools import chain, count
 from time import time
 import unicodecsv
 import logging
+import traceback
 
 from celery import Task, current_task
 from celery.states import SUCCESS, FAILURE
@@ -46,9 +47,16 @@ from courseware.grades import iterate_grades_for
 from courseware.models import StudentModule
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
-from instructor_analytics.basic import enrolled_students_features, list_may_enroll
-from instructor_analytics.csvs import format_dictlist
+from instructor_analytics.basic import iter_enrolled_students_features, iter_may_enroll
+from instructor_analytics.csvs import iter_dictlist_rows
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    track_memory_usage,
+    update_subtask_status,
+)
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
@@ -72,6 +80,9 @@ UPDATE_STATUS_SKIPPED = 'skipped'
 # The setting name used for events when "settings" (account settings, preferences, profile information) change.
 REPORT_REQUESTED_EVENT_NAME = u'edx.instructor.report.requested'
 
+# The timestamp format used in report filenames
+REPORT_TIMESTAMP_FORMAT = "%Y-%m-%d-%H%M"
+
 
 class BaseInstructorTask(Task):
     """
@@ -168,6 +179,14 @@ class UpdateProblemModuleStateError(Exception):
     pass
 
 
+class ReportShardsFailedError(Exception):
+    """
+    Error signaling that some shards of a sharded report failed, so the
+    report is missing students and is not written.
+    """
+    pass
+
+
 def _get_current_task():
     """
     Stub to make it easier to test without actually running Celery.
@@ -599,22 +618,30 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            This may be a generator, in which case the rows are written out
+            as they are generated.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
     """
     report_store = ReportStore.from_config(config_name)
-    report_store.store_rows(
-        course_id,
-        u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
-            course_prefix=course_filename_prefix_generator(course_id),
-            csv_name=csv_name,
-            timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
-        ),
-        rows
-    )
+    with track_memory_usage('instructor_task.upload_csv.{}.memory'.format(csv_name), course_id):
+        report_store.store_rows(
+            course_id,
+            _report_filename(csv_name, course_id, timestamp),
+            rows
+        )
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": csv_name, })
 
 
+def _report_filename(csv_name, course_id, timestamp):
+    """Return the name of the CSV file that `upload_csv_to_report_store` writes."""
+    return u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+        course_prefix=course_filename_prefix_generator(course_id),
+        csv_name=csv_name,
+        timestamp_str=timestamp.strftime(REPORT_TIMESTAMP_FORMAT)
+    )
+
+
 def upload_exec_summary_to_store(data_dict, report_name, course_id, generated_at, config_name='FINANCIAL_REPORTS'):
     """
     Upload Executive Summary Html file using ReportStore.
@@ -650,17 +677,13 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
     be accessed by instantiating another `ReportStore` (via
-    `ReportStore.from_config()`) and calling `link_for()` on it. Writes are
-    buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
-    that are visible in ReportStore will be complete ones.
-
-    As we start to add more CSV downloads, it will probably be worthwhile to
-    make a more general CSVDoc class instead of building out the rows like we
-    do here.
+    `ReportStore.from_config()`) and calling `link_for()` on it. Students are
+    graded as their rows are written out, but we'll never write part of a CSV
+    file to S3 -- i.e. any files that are visible in ReportStore will be
+    complete ones.
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
     task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
 
@@ -673,6 +696,47 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
+    current_step = {'step': 'Calculating Grades'}
+    rows, err_rows = _grade_report_rows(
+        course_id, enrolled_students, task_progress, task_info_string, action_name, current_step
+    )
+
+    # Students are graded as the report is written out.
+    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+    TASK_LOG.info(
+        u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
+        task_info_string,
+        action_name,
+        current_step,
+        task_progress.attempted,
+        task_progress.total
+    )
+
+    current_step = {'step': 'Uploading CSVs'}
+    task_progress.update_task_state(extra_meta=current_step)
+    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+
+    # If there are any error rows (don't count the header), write them out as well
+    if len(err_rows) > 1:
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+
+    # One last update before we close out...
+    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
+    return task_progress.update_task_state(extra_meta=current_step)
+
+
+def _grade_report_rows(course_id, students, task_progress, task_info_string, action_name, current_step):
+    """
+    Return a tuple `(rows, err_rows)` of grade report CSV rows for
+    `students`. `rows` starts with a header row if at least one student could
+    be graded; `err_rows` always starts with its header row.
+
+    `rows` is a generator that grades each student as their row is
+    requested, so only one student's grades are in memory at a time. It
+    must be exhausted before `err_rows` is complete. `task_progress` is
+    updated as students are graded.
+    """
+    status_interval = 100
     course = get_course_by_id(course_id)
     course_is_cohorted = is_course_cohorted(course.id)
     cohorts_header = ['Cohort Name'] if course_is_cohorted else []
@@ -684,14 +748,8 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
     whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
 
-    # Loop over all our students and build our CSV lists in memory
-    header = None
-    rows = []
     err_rows = [["id", "username", "error_msg"]]
-    current_step = {'step': 'Calculating Grades'}
-
-    total_enrolled_students = enrolled_students.count()
-    student_counter = 0
+    total_enrolled_students = task_progress.total
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
         task_info_string,
@@ -699,104 +757,86 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         current_step,
         total_enrolled_students
     )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
-
-        # Now add a log entry after each student is graded to get a sense
-        # of the task's progress
-        student_counter += 1
-        TASK_LOG.info(
-            u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
-            task_info_string,
-            action_name,
-            current_step,
-            student_counter,
-            total_enrolled_students
-        )
-
-        if gradeset:
-            # We were able to successfully grade this student for this course.
-            task_progress.succeeded += 1
-            if not header:
-                header = [section['label'] for section in gradeset[u'section_breakdown']]
-                rows.append(
-                    ["id", "email", "username", "grade"] + header + cohorts_header +
-                    group_configs_header + ['Enrollment Track', 'Verification Status'] + certificate_info_header
-                )
-
-            percents = {
-                section['label']: section.get('percent', 0.0)
-                for section in gradeset[u'section_breakdown']
-                if 'label' in section
-            }
-
-            cohorts_group_name = []
-            if course_is_cohorted:
-                group = get_cohort(student, course_id, assign=False)
-                cohorts_group_name.append(group.name if group else '')
 
-            group_configs_group_names = []
-            for partition in experiment_partitions:
-                group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
-                group_configs_group_names.append(group.name if group else '')
-
-            enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
-            verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
-                student,
-                course_id,
-                enrollment_mode
-            )
-            certificate_info = certificate_info_for_user(
-                student,
-                course_id,
-                gradeset['grade'],
-                student.id in whitelisted_user_ids
-            )
+    def _rows():
+        """Grade each student in turn, yielding their row of the report."""
+        header = None
+        student_counter = 0
+        for student, gradeset, err_msg in iterate_grades_for(course_id, students):
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
 
-            # Not everybody has the same gradable items. If the item is not
-            # found in the user's gradeset, just assume it's a 0. The aggregated
-            # grades for their sections and overall course will be calculated
-            # without regard for the item they didn't have access to, so it's
-            # possible for a student to have a 0.0 show up in their row but
-            # still have 100% for the course.
-            row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append(
-                [student.id, student.email, student.username, gradeset['percent']] +
-                row_percents + cohorts_group_name + group_configs_group_names +
-                [enrollment_mode] + [verification_status] + certificate_info
+            # Now add a log entry after each student is graded to get a sense
+            # of the task's progress
+            student_counter += 1
+            TASK_LOG.info(
+                u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
+                task_info_string,
+                action_name,
+                current_step,
+                student_counter,
+                total_enrolled_students
             )
-        else:
-            # An empty gradeset means we failed to grade a student.
-            task_progress.failed += 1
-            err_rows.append([student.id, student.username, err_msg])
 
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
-        task_info_string,
-        action_name,
-        current_step,
-        student_counter,
-        total_enrolled_students
-    )
+            if gradeset:
+                # We were able to successfully grade this student for this course.
+                task_progress.succeeded += 1
+                if not header:
+                    header = [section['label'] for section in gradeset[u'section_breakdown']]
+                    yield (
+                        ["id", "email", "username", "grade"] + header + cohorts_header +
+                        group_configs_header + ['Enrollment Track', 'Verification Status'] + certificate_info_header
+                    )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+                percents = {
+                    section['label']: section.get('percent', 0.0)
+                    for section in gradeset[u'section_breakdown']
+                    if 'label' in section
+                }
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+                cohorts_group_name = []
+                if course_is_cohorted:
+                    group = get_cohort(student, course_id, assign=False)
+                    cohorts_group_name.append(group.name if group else '')
+
+                group_configs_group_names = []
+                for partition in experiment_partitions:
+                    group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
+                    group_configs_group_names.append(group.name if group else '')
+
+                enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
+                verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
+                    student,
+                    course_id,
+                    enrollment_mode
+                )
+                certificate_info = certificate_info_for_user(
+                    student,
+                    course_id,
+                    gradeset['grade'],
+                    student.id in whitelisted_user_ids
+                )
 
-    # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+                # Not everybody has the same gradable items. If the item is not
+                # found in the user's gradeset, just assume it's a 0. The aggregated
+                # grades for their sections and overall course will be calculated
+                # without regard for the item they didn't have access to, so it's
+                # possible for a student to have a 0.0 show up in their row but
+                # still have 100% for the course.
+                row_percents = [percents.get(label, 0.0) for label in header]
+                yield (
+                    [student.id, student.email, student.username, gradeset['percent']] +
+                    row_percents + cohorts_group_name + group_configs_group_names +
+                    [enrollment_mode] + [verification_status] + certificate_info
+                )
+            else:
+                # An empty gradeset means we failed to grade a student.
+                task_progress.failed += 1
+                err_rows.append([student.id, student.username, err_msg])
 
-    # One last update before we close out...
-    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
-    return task_progress.update_task_state(extra_meta=current_step)
+    return _rows(), err_rows
 
 
 def _order_problems(blocks):
@@ -856,30 +896,52 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
     task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
 
-    # This struct encapsulates both the display names of each static item in the
-    # header row as values as well as the django User field names of those items
-    # as the keys.  It is structured in this way to keep the values related.
-    header_row = OrderedDict([('id', 'Student ID'), ('email', 'Email'), ('username', 'Username')])
-
     try:
-        course_structure = CourseStructure.objects.get(course_id=course_id)
-        blocks = course_structure.ordered_blocks
-        problems = _order_problems(blocks)
+        rows, error_rows = _problem_grade_report_rows(course_id, enrolled_students, task_progress)
     except CourseStructure.DoesNotExist:
         return task_progress.update_task_state(
             extra_meta={'step': 'Generating course structure. Please refresh and try again.'}
         )
 
+    # Perform the upload if any students have been successfully graded
+    if len(rows) > 1:
+        upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
+    # If there are any error rows, write them out as well
+    if len(error_rows) > 1:
+        upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
+
+    return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
+
+
+def _problem_grade_report_rows(course_id, students, task_progress):
+    """
+    Grade `students` and return a tuple `(rows, error_rows)` of problem grade
+    report CSV rows, both starting with their header row.
+
+    `task_progress` is updated as students are graded. Raises
+    `CourseStructure.DoesNotExist` if the course structure hasn't been
+    generated yet.
+    """
+    status_interval = 100
+
+    # This struct encapsulates both the display names of each static item in the
+    # header row as values as well as the django User field names of those items
+    # as the keys.  It is structured in this way to keep the values related.
+    header_row = OrderedDict([('id', 'Student ID'), ('email', 'Email'), ('username', 'Username')])
+
+    course_structure = CourseStructure.objects.get(course_id=course_id)
+    blocks = course_structure.ordered_blocks
+    problems = _order_problems(blocks)
+
     # Just generate the static fields for now.
     rows = [list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))]
     error_rows = [list(header_row.values()) + ['error_msg']]
     current_step = {'step': 'Calculating Grades'}
 
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students, keep_raw_scores=True):
+    for student, gradeset, err_msg in iterate_grades_for(course_id, students, keep_raw_scores=True):
         student_fields = [getattr(student, field_name) for field_name in header_row]
         task_progress.attempted += 1
 
@@ -913,14 +975,215 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
         if task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
 
-    # Perform the upload if any students have been successfully graded
-    if len(rows) > 1:
-        upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
-    # If there are any error rows, write them out as well
-    if len(error_rows) > 1:
-        upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
+    return rows, error_rows
+
+
+def queue_report_shards(shard_task, csv_name, _xmodule_instance_args, entry_id, course_id, task_input, action_name):
+    """
+    Split the `csv_name` report (one of `SHARDED_REPORTS`) for all enrolled
+    students into shards of `settings.GRADES_DOWNLOAD_STUDENTS_PER_SHARD`
+    students and queue a `shard_task` subtask for each of them.
+
+    Each subtask writes a partial CSV to the report store (see
+    `run_report_shard`), and the subtask that completes last merges them into
+    the final report.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    # If the parent task was requeued after already creating its subtasks,
+    # don't create a second set of them. See `perform_delegate_email_batches`.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued its report shards", entry.task_id)
+        return json.loads(entry.task_output)
+
+    enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
+    total_num_students = enrolled_students.count()
+    if total_num_students == 0:
+        # There is nothing to shard, and nothing would ever mark the task as complete.
+        upload_fcn = SHARDED_REPORTS[csv_name][2]
+        return upload_fcn(_xmodule_instance_args, entry_id, course_id, task_input, action_name)
+
+    if csv_name == 'problem_grade_report' and not CourseStructure.objects.filter(course_id=course_id).exists():
+        # Every shard would fail; handle it as `upload_problem_grade_report` does.
+        task_progress = TaskProgress(action_name, total_num_students, time())
+        return task_progress.update_task_state(
+            extra_meta={'step': 'Generating course structure. Please refresh and try again.'}
+        )
+
+    timestamp_str = datetime.now(UTC).strftime(REPORT_TIMESTAMP_FORMAT)
+    shard_indexes = count()
+
+    def _create_report_shard_subtask(item_list, initial_subtask_status):
+        """Creates a subtask to build one shard of the report."""
+        return shard_task.subtask(
+            (
+                entry_id,
+                csv_name,
+                next(shard_indexes),
+                [item['pk'] for item in item_list],
+                timestamp_str,
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_report_shard_subtask,
+        [enrolled_students],
+        [],
+        settings.GRADES_DOWNLOAD_STUDENTS_PER_SHARD,
+        total_num_students,
+    )
+
+
+def run_report_shard(entry_id, csv_name, shard_index, user_ids, timestamp_str, subtask_status_dict):
+    """
+    Build the rows of the `csv_name` report for the students in `user_ids`
+    and store them as partial CSVs in the report store. If this is the last
+    shard of the report to complete, merge all of the partial CSVs and mark
+    the InstructorTask as complete (see `finish_report_shards`).
+
+    Returns the subtask status as a dict.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    action_name = json.loads(entry.task_output).get('action_name')
+    timestamp = datetime.strptime(timestamp_str, REPORT_TIMESTAMP_FORMAT)
+    err_csv_name, rows_fcn, __ = SHARDED_REPORTS[csv_name]
+
+    students = User.objects.filter(id__in=user_ids).order_by('id')
+    task_progress = TaskProgress(action_name, len(user_ids), time())
+    try:
+        with track_memory_usage('instructor_task.report_shard.memory', course_id):
+            # `rows` may be a generator that fills in `err_rows` as it goes,
+            # so it has to be stored first.
+            rows, err_rows = rows_fcn(course_id, students, task_progress)
+            report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+            report_store.store_rows(
+                course_id,
+                ReportStore.partial_filename(_report_filename(csv_name, course_id, timestamp), shard_index),
+                rows
+            )
+            report_store.store_rows(
+                course_id,
+                ReportStore.partial_filename(_report_filename(err_csv_name, course_id, timestamp), shard_index),
+                err_rows
+            )
+    except Exception:
+        TASK_LOG.exception(u"Report shard %s of instructor task %s failed unexpectedly", current_task_id, entry_id)
+        subtask_status.increment(failed=len(user_ids), state=FAILURE)
+        if update_subtask_status(entry_id, current_task_id, subtask_status, mark_task_complete=False):
+            finish_report_shards(entry_id, csv_name, timestamp)
+        raise
+
+    subtask_status.increment(succeeded=task_progress.succeeded, failed=task_progress.failed, state=SUCCESS)
+    if update_subtask_status(entry_id, current_task_id, subtask_status, mark_task_complete=False):
+        finish_report_shards(entry_id, csv_name, timestamp)
+    return subtask_status.to_dict()
+
+
+def finish_report_shards(entry_id, csv_name, timestamp):
+    """
+    Merge the `csv_name` report once all of its shards have completed, and
+    only then mark the InstructorTask `entry_id` as complete: SUCCESS if the
+    report was written, or FAILURE, with the error stored in `task_output`,
+    if a shard or the merge failed.
+    """
+    try:
+        merge_report_shards(entry_id, csv_name, timestamp)
+    except Exception as exception:  # pylint: disable=broad-except
+        TASK_LOG.exception(u"Merging the %s report shards of instructor task %s failed", csv_name, entry_id)
+        entry = InstructorTask.objects.get(pk=entry_id)
+        entry.task_output = InstructorTask.create_output_for_failure(exception, traceback.format_exc())
+        entry.task_state = FAILURE
+    else:
+        entry = InstructorTask.objects.get(pk=entry_id)
+        entry.task_state = SUCCESS
+    entry.save_now()
 
-    return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
+
+def merge_report_shards(entry_id, csv_name, timestamp):
+    """
+    Stream the partial CSVs of every shard of the `csv_name` report, in shard
+    order, into the final report (and error report, if any student could not
+    be graded), then delete them.
+
+    If any shard failed, its students are missing from the partial CSVs, so
+    no report is written and `ReportShardsFailedError` is raised.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    subtask_dict = json.loads(entry.subtasks)
+    task_progress = json.loads(entry.task_output)
+    err_csv_name = SHARDED_REPORTS[csv_name][0]
+    report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+
+    def _partial_filenames(name):
+        """The names of the partial CSVs of report `name`, in shard order."""
+        filename = _report_filename(name, course_id, timestamp)
+        return [ReportStore.partial_filename(filename, index) for index in xrange(subtask_dict['total'])]
+
+    def _merged_rows(partial_filenames):
+        """Yield the header row of the first shard that has one, then every shard's data rows."""
+        header_written = False
+        for partial_filename in partial_filenames:
+            rows = report_store.iter_rows(course_id, partial_filename)
+            header = next(rows, None)
+            if header is not None and not header_written:
+                header_written = True
+                yield header
+            for row in rows:
+                yield row
+
+    try:
+        if subtask_dict['failed'] > 0:
+            raise ReportShardsFailedError(
+                u"{failed} of {total} report shards failed; the report was not written".format(**subtask_dict)
+            )
+        with track_memory_usage('instructor_task.report_merge.memory', course_id):
+            upload_csv_to_report_store(_merged_rows(_partial_filenames(csv_name)), csv_name, course_id, timestamp)
+            if task_progress['failed'] > 0:
+                upload_csv_to_report_store(
+                    _merged_rows(_partial_filenames(err_csv_name)), err_csv_name, course_id, timestamp
+                )
+    finally:
+        for partial_filename in _partial_filenames(csv_name) + _partial_filenames(err_csv_name):
+            report_store.delete(course_id, partial_filename)
+
+
+def _grade_report_shard_rows(course_id, students, task_progress):
+    """Return the `(rows, err_rows)` of one shard of the grade report."""
+    return _grade_report_rows(
+        course_id,
+        students,
+        task_progress,
+        u'Course: {}'.format(course_id),
+        task_progress.action_name,
+        {'step': 'Calculating Grades'},
+    )
+
+
+# Reports that can be built in shards, keyed by name. Values are tuples of
+# (error report name, function returning the shard's `(rows, error_rows)`,
+# function building the whole report in a single task).
+SHARDED_REPORTS = {
+    'grade_report': (
+        'grade_report_err',
+        _grade_report_shard_rows,
+        upload_grades_csv,
+    ),
+    'problem_grade_report': (
+        'problem_grade_report_err',
+        _problem_grade_report_rows,
+        upload_problem_grade_report,
+    ),
+}
 
 
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
@@ -937,25 +1200,31 @@ def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input
     current_step = {'step': 'Calculating Profile Info'}
     task_progress.update_task_state(extra_meta=current_step)
 
-    # compute the student features table and format it
+    # compute the student features table and format it as it is written out
     query_features = task_input.get('features')
-    student_data = enrolled_students_features(course_id, query_features)
-    header, rows = format_dictlist(student_data, query_features)
-
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
-
-    rows.insert(0, header)
-
-    current_step = {'step': 'Uploading CSV'}
-    task_progress.update_task_state(extra_meta=current_step)
+    student_data = iter_enrolled_students_features(course_id, query_features)
+    rows = _counted_rows(query_features, iter_dictlist_rows(student_data, query_features), task_progress)
 
     # Perform the upload
     upload_csv_to_report_store(rows, 'student_profile_info', course_id, start_date)
 
+    task_progress.skipped = task_progress.total - task_progress.attempted
+    current_step = {'step': 'Uploading CSV'}
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+def _counted_rows(header, rows, task_progress):
+    """
+    Yield `header` followed by `rows`, counting each of `rows` as a
+    successful attempt in `task_progress`.
+    """
+    yield header
+    for row in rows:
+        task_progress.attempted += 1
+        task_progress.succeeded += 1
+        yield row
+
+
 def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing profile
@@ -977,13 +1246,9 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
-    # Loop over all our students and build our CSV lists in memory
-    rows = []
-    header = None
     current_step = {'step': 'Gathering Profile Information'}
     enrollment_report_provider = PaidCourseEnrollmentReportProvider()
     total_students = students_in_course.count()
-    student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, generating detailed enrollment report for total students: %s',
         task_info_string,
@@ -992,85 +1257,89 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
         total_students
     )
 
-    for student in students_in_course:
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
+    def _rows():
+        """Gather each student's enrollment profile in turn, yielding their row of the report."""
+        header = None
+        student_counter = 0
+        for student in students_in_course.iterator():
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
 
-        # Now add a log entry after certain intervals to get a hint that task is in progress
-        student_counter += 1
-        if student_counter % 100 == 0:
-            TASK_LOG.info(
-                u'%s, Task type: %s, Current step: %s, gathering enrollment profile for students in progress: %s/%s',
-                task_info_string,
-                action_name,
-                current_step,
-                student_counter,
-                total_students
-            )
+            # Now add a log entry after certain intervals to get a hint that task is in progress
+            student_counter += 1
+            if student_counter % 100 == 0:
+                TASK_LOG.info(
+                    u'%s, Task type: %s, Current step: %s, '
+                    u'gathering enrollment profile for students in progress: %s/%s',
+                    task_info_string,
+                    action_name,
+                    current_step,
+                    student_counter,
+                    total_students
+                )
 
-        user_data = enrollment_report_provider.get_user_profile(student.id)
-        course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
-        payment_data = enrollment_report_provider.get_payment_info(student, course_id)
-
-        # display name map for the column headers
-        enrollment_report_headers = {
-            'User ID': _('User ID'),
-            'Username': _('Username'),
-            'Full Name': _('Full Name'),
-            'First Name': _('First Name'),
-            'Last Name': _('Last Name'),
-            'Company Name': _('Company Name'),
-            'Title': _('Title'),
-            'Language': _('Language'),
-            'Year of Birth': _('Year of Birth'),
-            'Gender': _('Gender'),
-            'Level of Education': _('Level of Education'),
-            'Mailing Address': _('Mailing Address'),
-            'Goals': _('Goals'),
-            'City': _('City'),
-            'Country': _('Country'),
-            'Enrollment Date': _('Enrollment Date'),
-            'Currently Enrolled': _('Currently Enrolled'),
-            'Enrollment Source': _('Enrollment Source'),
-            'Enrollment Role': _('Enrollment Role'),
-            'List Price': _('List Price'),
-            'Payment Amount': _('Payment Amount'),
-            'Coupon Codes Used': _('Coupon Codes Used'),
-            'Registration Code Used': _('Registration Code Used'),
-            'Payment Status': _('Payment Status'),
-            'Transaction Reference Number': _('Transaction Reference Number')
-        }
+            user_data = enrollment_report_provider.get_user_profile(student.id)
+            course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
+            payment_data = enrollment_report_provider.get_payment_info(student, course_id)
+
+            # display name map for the column headers
+            enrollment_report_headers = {
+                'User ID': _('User ID'),
+                'Username': _('Username'),
+                'Full Name': _('Full Name'),
+                'First Name': _('First Name'),
+                'Last Name': _('Last Name'),
+                'Company Name': _('Company Name'),
+                'Title': _('Title'),
+                'Language': _('Language'),
+                'Year of Birth': _('Year of Birth'),
+                'Gender': _('Gender'),
+                'Level of Education': _('Level of Education'),
+                'Mailing Address': _('Mailing Address'),
+                'Goals': _('Goals'),
+                'City': _('City'),
+                'Country': _('Country'),
+                'Enrollment Date': _('Enrollment Date'),
+                'Currently Enrolled': _('Currently Enrolled'),
+                'Enrollment Source': _('Enrollment Source'),
+                'Enrollment Role': _('Enrollment Role'),
+                'List Price': _('List Price'),
+                'Payment Amount': _('Payment Amount'),
+                'Coupon Codes Used': _('Coupon Codes Used'),
+                'Registration Code Used': _('Registration Code Used'),
+                'Payment Status': _('Payment Status'),
+                'Transaction Reference Number': _('Transaction Reference Number')
+            }
 
-        if not header:
-            header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
-            display_headers = []
-            for header_element in header:
-                # translate header into a localizable display string
-                display_headers.append(enrollment_report_headers.get(header_element, header_element))
-            rows.append(display_headers)
+            if not header:
+                header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
+                display_headers = []
+                for header_element in header:
+                    # translate header into a localizable display string
+                    display_headers.append(enrollment_report_headers.get(header_element, header_element))
+                yield display_headers
 
-        rows.append(user_data.values() + course_enrollment_data.values() + payment_data.values())
-        task_progress.succeeded += 1
+            task_progress.succeeded += 1
+            yield user_data.values() + course_enrollment_data.values() + payment_data.values()
+
+    # Profiles are gathered as the report is written out.
+    upload_csv_to_report_store(_rows(), 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS')
 
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
         task_info_string,
         action_name,
         current_step,
-        student_counter,
+        task_progress.attempted,
         total_students
     )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
     current_step = {'step': 'Uploading CSVs'}
     task_progress.update_task_state(extra_meta=current_step)
     TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS')
-
     # One last update before we close out...
     TASK_LOG.info(u'%s, Task type: %s, Finalizing detailed enrollment task', task_info_string, action_name)
     return task_progress.update_task_state(extra_meta=current_step)
@@ -1089,22 +1358,16 @@ def upload_may_enroll_csv(_xmodule_instance_args, _entry_id, course_id, task_inp
     current_step = {'step': 'Calculating info about students who may enroll'}
     task_progress.update_task_state(extra_meta=current_step)
 
-    # Compute result table and format it
+    # Compute result table and format it as it is written out
     query_features = task_input.get('features')
-    student_data = list_may_enroll(course_id, query_features)
-    header, rows = format_dictlist(student_data, query_features)
-
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
-
-    rows.insert(0, header)
-
-    current_step = {'step': 'Uploading CSV'}
-    task_progress.update_task_state(extra_meta=current_step)
+    student_data = iter_may_enroll(course_id, query_features)
+    rows = _counted_rows(query_features, iter_dictlist_rows(student_data, query_features), task_progress)
 
     # Perform the upload
     upload_csv_to_report_store(rows, 'may_enroll_info', course_id, start_date)
 
+    task_progress.skipped = task_progress.total - task_progress.attempted
+    current_step = {'step': 'Uploading CSV'}
     return task_progress.update_task_state(extra_meta=current_step)
 
 
@@ -3,10 +3,13 @@ Tests for instructor_task/models.py.
 """
 
 from cStringIO import StringIO
+from gzip import GzipFile
 import mock
+import os
 import time
 from datetime import datetime
 from unittest import TestCase
+from uuid import uuid4
 
 from instructor_task.models import LocalFSReportStore, S3ReportStore
 from instructor_task.tests.test_base import TestReportMixin
@@ -30,10 +33,38 @@ class MockKey(object):
         return "http://fake-edx-s3.edx.org/"
 
 
+class MockMultiPartUpload(object):
+    """ Mocking a boto S3 MultiPartUpload object. """
+    def __init__(self, bucket, key_name):
+        self.bucket = bucket
+        self.key_name = key_name
+        self.parts = []
+        self.completed = False
+
+    def upload_part_from_file(self, fp, part_num):
+        """ Expected method on a MultiPartUpload object. """
+        self.parts.append((part_num, fp.read()))
+
+    def complete_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        self.completed = True
+
+    def cancel_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        pass
+
+
 class MockBucket(object):
     """ Mocking a boto S3 Bucket object. """
     def __init__(self, _name):
         self.keys = []
+        self.multipart_uploads = []
+
+    def initiate_multipart_upload(self, key_name, headers):  # pylint: disable=unused-argument
+        """ Expected method on a Bucket object. """
+        multipart_upload = MockMultiPartUpload(self, key_name)
+        self.multipart_uploads.append(multipart_upload)
+        return multipart_upload
 
     def store_key(self, key):
         """ Not a Bucket method, created just to store the keys in the Bucket for testing purposes. """
@@ -84,6 +115,20 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_links_for_hides_partial_files(self):
+        """
+        Test that the partial files a sharded report is built from are not
+        offered for download.
+        """
+        report_store = self.create_report_store()
+        report_store.store(self.course_id, 'report.csv', StringIO())
+        report_store.store(self.course_id, report_store.partial_filename('report.csv', 0), StringIO())
+
+        self.assertEqual(
+            [link[0] for link in report_store.links_for(self.course_id)],
+            ['report.csv']
+        )
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     """
@@ -93,6 +138,41 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config(config_name='GRADES_DOWNLOAD')
 
+    def test_iter_rows_and_delete(self):
+        """
+        Test that rows written with store_rows() are read back as unicode,
+        and that delete() removes the file.
+        """
+        report_store = self.create_report_store()
+        rows = [[u'id', u'name'], [u'1', u'\u00e9l\u00e8ve']]
+        report_store.store_rows(self.course_id, 'report.csv', rows)
+
+        self.assertEqual(list(report_store.iter_rows(self.course_id, 'report.csv')), rows)
+
+        report_store.delete(self.course_id, 'report.csv')
+        report_store.delete(self.course_id, 'report.csv')
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
+    def test_store_rows_from_generator(self):
+        """
+        Test that store_rows() accepts a generator, and doesn't leave a
+        partial file behind if it fails part way through.
+        """
+        report_store = self.create_report_store()
+
+        def rows():
+            """ Yield a couple of rows, then fail. """
+            yield [u'id']
+            yield [u'1']
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            report_store.store_rows(self.course_id, 'report.csv', rows())
+        self.assertEqual(os.listdir(report_store.path_to(self.course_id, '')), [])
+
+        report_store.store_rows(self.course_id, 'report.csv', ([unicode(i)] for i in xrange(3)))
+        self.assertEqual(list(report_store.iter_rows(self.course_id, 'report.csv')), [[u'0'], [u'1'], [u'2']])
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -105,3 +185,23 @@ class S3ReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     def create_report_store(self):
         """ Create and return a S3ReportStore. """
         return S3ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+
+    def test_store_rows_multipart(self):
+        """
+        Test that large reports are uploaded in parts as they are written.
+        """
+        report_store = self.create_report_store()
+        rows = ([unicode(uuid4()) for __ in xrange(10)] for __ in xrange(1000))
+        with mock.patch.object(S3ReportStore, 'MULTIPART_CHUNK_SIZE', 1024):
+            report_store.store_rows(self.course_id, 'report.csv', rows)
+
+        self.assertEqual(report_store.bucket.keys, [])
+        multipart_upload = report_store.bucket.multipart_uploads[0]
+        self.assertTrue(multipart_upload.completed)
+        self.assertGreater(len(multipart_upload.parts), 1)
+        self.assertEqual(
+            [part_num for part_num, __ in multipart_upload.parts],
+            range(1, len(multipart_upload.parts) + 1)
+        )
+        contents = GzipFile(fileobj=StringIO(''.join(data for __, data in multipart_upload.parts))).read()
+        self.assertEqual(len(contents.splitlines()), 1000)
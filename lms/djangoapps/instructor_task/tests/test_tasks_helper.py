@@ -7,9 +7,14 @@ Tests that CSV grade report generation works with unicode emails.
 
 """
 import ddt
+from datetime import datetime
+import json
 from mock import Mock, patch
+import os
 import tempfile
 import unicodecsv
+from uuid import uuid4
+from celery.states import SUCCESS, FAILURE
 from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
 
@@ -19,6 +24,7 @@ from certificates.tests.factories import GeneratedCertificateFactory, Certificat
 from course_modes.models import CourseMode
 from courseware.tests.factories import InstructorFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TestReportMixin, InstructorTaskModuleTestCase
+from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitionGroup
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 import openedx.core.djangoapps.user_api.course_tag.api as course_tag_api
@@ -27,11 +33,18 @@ from shoppingcart.models import Order, PaidCourseRegistration, CourseRegistratio
     CourseRegistrationCodeInvoiceItem, InvoiceTransaction, Coupon
 from student.tests.factories import UserFactory, CourseModeFactory
 from student.models import CourseEnrollment, CourseEnrollmentAllowed, ManualEnrollmentAudit, ALLOWEDTOENROLL_TO_ENROLLED
+from util.file import course_filename_prefix_generator
 from verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.partitions.partitions import Group, UserPartition
-from instructor_task.models import ReportStore
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.subtasks import SubtaskStatus, initialize_subtask_info
+from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tasks_helper import (
+    ReportShardsFailedError,
+    merge_report_shards,
+    queue_report_shards,
+    run_report_shard,
     cohort_students_and_upload,
     upload_grades_csv,
     upload_problem_grade_report,
@@ -277,6 +290,132 @@ class TestInstructorGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
         self.assertDictContainsSubset({'attempted': 1, 'succeeded': 1, 'failed': 0}, result)
 
 
+class TestMergeReportShards(TestReportMixin, InstructorTaskCourseTestCase):
+    """
+    Tests that the partial CSVs of a sharded report are merged into one report.
+    """
+    def setUp(self):
+        super(TestMergeReportShards, self).setUp()
+        self.course = CourseFactory.create()
+        self.timestamp = datetime(2015, 6, 1, 12, 30)
+        self.report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+
+    def _create_entry(self, shards_failed=0, students_failed=0):
+        """Create an InstructorTask whose two report shards have completed."""
+        return InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_type='grade_course',
+            task_output=json.dumps({'action_name': 'graded', 'failed': students_failed}),
+            subtasks=json.dumps({'total': 2, 'succeeded': 2 - shards_failed, 'failed': shards_failed}),
+        )
+
+    def _filename(self, csv_name):
+        """Return the name of the merged `csv_name` report."""
+        return u"{}_{}_2015-06-01-1230.csv".format(course_filename_prefix_generator(self.course.id), csv_name)
+
+    def _store_partial(self, csv_name, index, rows):
+        """Store the rows of one shard of the `csv_name` report."""
+        filename = ReportStore.partial_filename(self._filename(csv_name), index)
+        self.report_store.store_rows(self.course.id, filename, rows)
+
+    def _store_partials(self):
+        """Store the partial CSVs of two shards, the first with an error."""
+        self._store_partial('grade_report', 0, [[u'id', u'grade'], [u'1', u'0.5']])
+        self._store_partial('grade_report', 1, [[u'id', u'grade'], [u'2', u'1.0'], [u'3', u'0.0']])
+        self._store_partial('grade_report_err', 0, [[u'id', u'error_msg'], [u'4', u'Cannot grade student']])
+        self._store_partial('grade_report_err', 1, [])
+
+    def test_merge(self):
+        self._store_partials()
+        merge_report_shards(self._create_entry(students_failed=1).id, 'grade_report', self.timestamp)
+
+        self.assertItemsEqual(
+            [link[0] for link in self.report_store.links_for(self.course.id)],
+            [self._filename('grade_report'), self._filename('grade_report_err')]
+        )
+        self.assertEqual(
+            list(self.report_store.iter_rows(self.course.id, self._filename('grade_report'))),
+            [[u'id', u'grade'], [u'1', u'0.5'], [u'2', u'1.0'], [u'3', u'0.0']]
+        )
+        self.assertEqual(
+            list(self.report_store.iter_rows(self.course.id, self._filename('grade_report_err'))),
+            [[u'id', u'error_msg'], [u'4', u'Cannot grade student']]
+        )
+
+    def test_merge_with_failed_shard(self):
+        self._store_partials()
+        with self.assertRaises(ReportShardsFailedError):
+            merge_report_shards(self._create_entry(shards_failed=1).id, 'grade_report', self.timestamp)
+
+        # Nothing is written, and the partial CSVs are cleaned up.
+        self.assertEqual(self.report_store.links_for(self.course.id), [])
+        self.assertEqual(os.listdir(self.report_store.path_to(self.course.id, '')), [])
+
+
+@patch('instructor_task.tasks_helper._get_current_task', Mock())
+class TestReportShards(TestReportMixin, InstructorTaskCourseTestCase):
+    """
+    Tests that a sharded report's InstructorTask is only marked as complete
+    once its shards have been merged into the report.
+    """
+    def setUp(self):
+        super(TestReportShards, self).setUp()
+        self.course = CourseFactory.create()
+        self.student = self.create_student(u'student')
+        self.report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+
+    def _create_entry(self):
+        """Create an InstructorTask with a single report shard, and return it with the shard's status."""
+        entry = InstructorTaskFactory.create(course_id=self.course.id, task_type='grade_course')
+        subtask_status = SubtaskStatus.create(str(uuid4()))
+        initialize_subtask_info(entry, 'graded', 1, [subtask_status.task_id])
+        return entry, subtask_status
+
+    def _run_shard(self, entry, subtask_status):
+        """Run the grade report shard of `entry`, and return the updated InstructorTask."""
+        run_report_shard(
+            entry.id, 'grade_report', 0, [self.student.id], '2015-06-01-1230', subtask_status.to_dict()
+        )
+        return InstructorTask.objects.get(pk=entry.id)
+
+    def test_last_shard(self):
+        entry = self._run_shard(*self._create_entry())
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertDictContainsSubset({'attempted': 1, 'succeeded': 1, 'failed': 0}, json.loads(entry.task_output))
+        self.assertEqual(len(self.report_store.links_for(self.course.id)), 1)
+
+    @patch('instructor_task.tasks_helper._grade_report_rows')
+    def test_shard_failure(self, mock_grade_report_rows):
+        mock_grade_report_rows.side_effect = Exception(u'Cannot grade shard')
+        entry, subtask_status = self._create_entry()
+        with self.assertRaises(Exception):
+            self._run_shard(entry, subtask_status)
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(json.loads(entry.task_output)['exception'], 'ReportShardsFailedError')
+        self.assertEqual(self.report_store.links_for(self.course.id), [])
+
+    @patch('instructor_task.tasks_helper.upload_csv_to_report_store')
+    def test_merge_failure(self, mock_upload_csv):
+        mock_upload_csv.side_effect = IOError(u'No space left on device')
+        entry = self._run_shard(*self._create_entry())
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(json.loads(entry.task_output)['message'], u'No space left on device')
+
+    def test_missing_course_structure(self):
+        CourseStructure.objects.filter(course_id=self.course.id).delete()
+        entry = InstructorTaskFactory.create(course_id=self.course.id, task_type='problem_grade_report')
+        shard_task = Mock()
+        result = queue_report_shards(
+            shard_task, 'problem_grade_report', None, entry.id, self.course.id, None, 'graded'
+        )
+
+        self.assertEqual(result['step'], 'Generating course structure. Please refresh and try again.')
+        self.assertFalse(shard_task.subtask.called)
+        self.assertEqual(InstructorTask.objects.get(pk=entry.id).subtasks, '')
+
+
 @ddt.ddt
 @patch.dict('django.conf.settings.FEATURES', {'ENABLE_PAID_COURSE_REGISTRATION': True})
 class TestInstructorDetailedEnrollmentReport(TestReportMixin, InstructorTaskCourseTestCase):
@@ -49,23 +49,26 @@ class FriendsInCourse(generics.ListAPIView):
         if not isinstance(result, list):
             return result
 
-        def is_member(friend, course_key):
+        # For each friend check if they are a linked edX user
+        friends_with_edx_users = get_linked_edx_accounts(result)
+
+        # Look up whether the friends are members of the course all at once
+        course_key = CourseKey.from_string(kwargs['course_id'])
+        enrollment_states = CourseEnrollment.enrollment_states(
+            [friend['edX_id'] for friend in friends_with_edx_users], [course_key]
+        )
+
+        def is_member(friend):
             """
             Return true if friend is a member of the course specified by the course_key
             """
-            return CourseEnrollment.objects.filter(
-                course_id=course_key,
-                user_id=friend['edX_id']
-            ).count() == 1
-
-        # For each friend check if they are a linked edX user
-        friends_with_edx_users = get_linked_edx_accounts(result)
+            mode, __ = enrollment_states[(friend['edX_id'], course_key)]
+            return mode is not None
 
         # Filter by sharing preferences and enrollment in course
-        course_key = CourseKey.from_string(kwargs['course_id'])
         friends_with_sharing_in_course = [
             {'id': friend['id'], 'name': friend['name']}
             for friend in friends_with_edx_users
-            if share_with_facebook_friends(friend) and is_member(friend, course_key)
+            if share_with_facebook_friends(friend) and is_member(friend)
         ]
         return Response({'friends': friends_with_sharing_in_course})
@@ -1,14 +1,18 @@
 """
 Serializer for video outline
 """
+import hashlib
+
 from rest_framework.reverse import reverse
 
 from xmodule.modulestore.mongo.base import BLOCK_TYPES_WITH_CHILDREN
 from xmodule.modulestore.django import modulestore
+from xmodule.split_test_module import get_split_user_partitions
 from courseware.access import has_access
 from courseware.courses import get_course_by_id
 from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module_for_descriptor
+from student.roles import CourseBetaTesterRole
 from util.module_utils import get_dynamic_descriptor_children
 
 from edxval.api import (
@@ -27,6 +31,10 @@ class BlockOutline(object):
         self.course_id = course_id
         self.request = request  # needed for making full URLS
         self.local_cache = {}
+        self.has_dynamic_children = False
+        self._course = None
+        self._field_data_cache = None
+        self._cached_locations = set()
         try:
             self.local_cache['course_videos'] = get_video_info_for_course_and_profiles(
                 unicode(course_id), video_profiles
@@ -48,16 +56,21 @@ class BlockOutline(object):
             """
             Factory method for creating and binding a module for the given descriptor.
             """
-            field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
-                self.course_id, self.request.user, descriptor, depth=0,
-            )
-            course = get_course_by_id(self.course_id)
+            if descriptor.location not in self._cached_locations:
+                self._field_data_cache.add_descriptors_to_cache([descriptor])
+                self._cached_locations.add(descriptor.location)
             return get_module_for_descriptor(
-                self.request.user, self.request, descriptor, field_data_cache, self.course_id, course=course
+                self.request.user, self.request, descriptor, self._field_data_cache, self.course_id,
+                course=self._get_course()
             )
 
         with modulestore().bulk_operations(self.course_id):
-            child_to_parent = {}
+            self._prefetch_dynamic_blocks(parent_or_requested_block_type)
+
+            # Maps the location of each block to the blocks above it, starting with self.start_block.
+            ancestors = {self.start_block.location: ()}
+            # Maps the location of each parent to the path and urls of its children.
+            parent_outlines = {}
             stack = [self.start_block]
             while stack:
                 curr_block = stack.pop()
@@ -71,17 +84,25 @@ class BlockOutline(object):
                     # from the table-of-contents.
                     continue
 
+                block_ancestors = ancestors[curr_block.location]
                 if curr_block.location.block_type in self.block_types:
                     if not has_access(self.request.user, 'load', curr_block, course_key=self.course_id):
                         continue
 
                     summary_fn = self.block_types[curr_block.category]
-                    block_path = list(path(curr_block, child_to_parent, self.start_block))
-                    unit_url, section_url = find_urls(self.course_id, curr_block, child_to_parent, self.request)
+                    parent_location = block_ancestors[-1].location if block_ancestors else None
+                    if parent_location not in parent_outlines:
+                        block_path = list(path(block_ancestors, self.start_block))
+                        parent_outlines[parent_location] = (
+                            block_path,
+                            [b["name"] for b in block_path],
+                            find_urls(self.course_id, block_ancestors, self.request),
+                        )
+                    block_path, named_path, (unit_url, section_url) = parent_outlines[parent_location]
 
                     yield {
                         "path": block_path,
-                        "named_path": [b["name"] for b in block_path],
+                        "named_path": named_path,
                         "unit_url": unit_url,
                         "section_url": section_url,
                         "summary": summary_fn(self.course_id, curr_block, self.request, self.local_cache)
@@ -94,16 +115,78 @@ class BlockOutline(object):
                         create_module,
                         usage_key_filter=parent_or_requested_block_type
                     )
+                    child_ancestors = block_ancestors + (curr_block,)
                     for block in reversed(children):
                         stack.append(block)
-                        child_to_parent[block] = curr_block
-
+                        ancestors[block.location] = child_ancestors
+
+    def _get_course(self):
+        """
+        Returns the course descriptor, loading it at most once.
+        """
+        if self._course is None:
+            if self.start_block.location.block_type == 'course':
+                self._course = self.start_block
+            else:
+                self._course = get_course_by_id(self.course_id)
+        return self._course
+
+    def _prefetch_dynamic_blocks(self, usage_key_filter):
+        """
+        Loads the user state of all the blocks with dynamic children below
+        self.start_block, which have to be bound to the user to get their
+        children, in a single FieldDataCache.
+        """
+        dynamic_blocks = []
+        stack = [self.start_block]
+        while stack:
+            block = stack.pop()
+            if block.hide_from_toc:
+                continue
+            if block.has_dynamic_children():
+                dynamic_blocks.append(block)
+            elif block.has_children:
+                stack.extend(block.get_children(usage_key_filter=usage_key_filter))
+
+        self.has_dynamic_children = bool(dynamic_blocks)
+        self._field_data_cache = FieldDataCache(dynamic_blocks, self.course_id, self.request.user)
+        self._cached_locations = set(block.location for block in dynamic_blocks)
+
+
+def outline_cache_key(course, user, request, video_profiles):
+    """
+    Returns the cache key of the video outline of `course` for `user`.
 
-def path(block, child_to_parent, start_block):
-    """path for block"""
+    Users with the same access to the course share the key: it depends on
+    the published version of the course, whether the user is staff or a beta
+    tester, and the user's group in each of the course's user partitions
+    (other than those of split tests, whose content is bound per user).
+    """
+    split_partitions = get_split_user_partitions(course.user_partitions)
+    partition_groups = []
+    for user_partition in course.user_partitions:
+        if user_partition in split_partitions:
+            continue
+        group = user_partition.scheme.get_group_for_user(course.id, user, user_partition)
+        partition_groups.append(u'{}:{}'.format(user_partition.id, group.id if group else None))
+
+    course_version = course.subtree_edited_on.isoformat() if course.subtree_edited_on else u''
+    key = u'.'.join([
+        unicode(course.id),
+        course_version,
+        u'staff' if has_access(user, 'staff', course) else u'',
+        u'beta' if CourseBetaTesterRole(course.id).has_user(user) else u'',
+        u','.join(partition_groups),
+        u','.join(video_profiles),
+        request.build_absolute_uri('/'),
+    ])
+    return u'mobile_api.video_outline.{}'.format(hashlib.md5(key.encode('utf-8')).hexdigest())
+
+
+def path(ancestors, start_block):
+    """path for a block below `ancestors`"""
     block_path = []
-    while block in child_to_parent:
-        block = child_to_parent[block]
+    for block in ancestors:
         if block is not start_block:
             block_path.append({
                 # to be consistent with other edx-platform clients, return the defaulted display name
@@ -111,12 +194,12 @@ def path(block, child_to_parent, start_block):
                 'category': block.category,
                 'id': unicode(block.location)
             })
-    return reversed(block_path)
+    return block_path
 
 
-def find_urls(course_id, block, child_to_parent, request):
+def find_urls(course_id, ancestors, request):
     """
-    Find the section and unit urls for a block.
+    Find the section and unit urls for a block below `ancestors`.
 
     Returns:
         unit_url, section_url:
@@ -124,12 +207,7 @@ def find_urls(course_id, block, child_to_parent, request):
             section_url (str): The url of a section
 
     """
-    block_path = []
-    while block in child_to_parent:
-        block = child_to_parent[block]
-        block_path.append(block)
-
-    block_list = list(reversed(block_path))
+    block_list = list(ancestors)
     block_count = len(block_list)
 
     chapter_id = block_list[1].location.block_id if block_count > 1 else None
@@ -6,7 +6,9 @@ import ddt
 import itertools
 from uuid import uuid4
 from collections import namedtuple
+from mock import patch
 
+from django.test.utils import override_settings
 from edxval import api
 from mobile_api.models import MobileApiConfig
 from xmodule.modulestore.tests.factories import ItemFactory
@@ -18,6 +20,7 @@ from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitionGroup
 
 from ..testutils import MobileAPITestCase, MobileAuthTestMixin, MobileCourseAccessTestMixin
+from .serializers import BlockOutline
 
 
 class TestVideoAPITestCase(MobileAPITestCase):
@@ -766,6 +769,34 @@ class TestVideoSummaryList(
         video_outline = self.api_response().data
         self.assertEqual(len(video_outline), 2)
 
+    @override_settings(MOBILE_VIDEO_OUTLINE_CACHE_TIMEOUT=60)
+    def test_cached_outline(self):
+        self.login_and_enroll()
+        self._setup_course_partitions(scheme_id='cohort', is_cohorted=True)
+        self._create_cohorted_video(0)
+        cohort = CohortFactory(course_id=self.course.id, name=u"Cohort 0", users=[self.user])
+        CourseUserGroupPartitionGroup(course_user_group=cohort, partition_id=self.partition_id, group_id=0).save()
+
+        video_outline = self.api_response().data
+        self.assertEqual(len(video_outline), 1)
+        with patch('mobile_api.video_outlines.views.BlockOutline') as mock_block_outline:
+            self.assertEqual(self.api_response().data, video_outline)
+        self.assertFalse(mock_block_outline.called)
+
+        # Users in other groups have their own outline.
+        cohort.users.remove(self.user)
+        self.assertEqual(len(self.api_response().data), 0)
+
+    @override_settings(MOBILE_VIDEO_OUTLINE_CACHE_TIMEOUT=60)
+    def test_split_block_outline_not_cached(self):
+        self.login_and_enroll()
+        self._setup_split_module("video")
+
+        self.assertEqual(len(self.api_response().data), 1)
+        with patch('mobile_api.video_outlines.views.BlockOutline', wraps=BlockOutline) as mock_block_outline:
+            self.assertEqual(len(self.api_response().data), 1)
+        self.assertTrue(mock_block_outline.called)
+
     def test_with_hidden_blocks(self):
         self.login_and_enroll()
         hidden_subsection = ItemFactory.create(
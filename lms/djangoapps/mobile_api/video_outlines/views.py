@@ -8,6 +8,8 @@ general XBlock representation in this rather specialized formatting.
 """
 from functools import partial
 
+from django.conf import settings
+from django.core.cache import cache
 from django.http import Http404, HttpResponse
 from mobile_api.models import MobileApiConfig
 
@@ -19,7 +21,7 @@ from xmodule.exceptions import NotFoundError
 from xmodule.modulestore.django import modulestore
 
 from ..utils import mobile_view, mobile_course_access
-from .serializers import BlockOutline, video_summary
+from .serializers import BlockOutline, outline_cache_key, video_summary
 
 
 @mobile_view()
@@ -77,15 +79,24 @@ class VideoSummaryList(generics.ListAPIView):
     @mobile_course_access(depth=None)
     def list(self, request, course, *args, **kwargs):
         video_profiles = MobileApiConfig.get_video_profiles()
-        video_outline = list(
-            BlockOutline(
-                course.id,
-                course,
-                {"video": partial(video_summary, video_profiles)},
-                request,
-                video_profiles,
-            )
+        cache_timeout = getattr(settings, 'MOBILE_VIDEO_OUTLINE_CACHE_TIMEOUT', 0)
+        if cache_timeout:
+            cache_key = outline_cache_key(course, request.user, request, video_profiles)
+            video_outline = cache.get(cache_key)
+            if video_outline is not None:
+                return Response(video_outline)
+
+        block_outline = BlockOutline(
+            course.id,
+            course,
+            {"video": partial(video_summary, video_profiles)},
+            request,
+            video_profiles,
         )
+        video_outline = list(block_outline)
+        # The children of blocks with dynamic children are picked per user.
+        if cache_timeout and not block_outline.has_dynamic_children:
+            cache.set(cache_key, video_outline, cache_timeout)
         return Response(video_outline)
 
 
@@ -187,6 +187,14 @@ if 'loc_cache' not in CACHES:
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'edx_location_mem_cache',
     }
+COURSE_STRUCTURE_LRU_SIZE = ENV_TOKENS.get('COURSE_STRUCTURE_LRU_SIZE', COURSE_STRUCTURE_LRU_SIZE)
+COURSE_BLOCKS_LRU_SIZE = ENV_TOKENS.get('COURSE_BLOCKS_LRU_SIZE', COURSE_BLOCKS_LRU_SIZE)
+CONTENTSERVER_DISK_CACHE.update(ENV_TOKENS.get('CONTENTSERVER_DISK_CACHE', {}))
+SAFE_EXEC_CACHE_MAX_BYTES = ENV_TOKENS.get('SAFE_EXEC_CACHE_MAX_BYTES', SAFE_EXEC_CACHE_MAX_BYTES)
+GEOIP_MMAP = ENV_TOKENS.get('GEOIP_MMAP', GEOIP_MMAP)
+GEOIP_COUNTRY_CACHE_SIZE = ENV_TOKENS.get('GEOIP_COUNTRY_CACHE_SIZE', GEOIP_COUNTRY_CACHE_SIZE)
+GEOIP_COUNTRY_CACHE_TIMEOUT = ENV_TOKENS.get('GEOIP_COUNTRY_CACHE_TIMEOUT', GEOIP_COUNTRY_CACHE_TIMEOUT)
+CAPA_PROBLEM_TREE_CACHE_SIZE = ENV_TOKENS.get('CAPA_PROBLEM_TREE_CACHE_SIZE', CAPA_PROBLEM_TREE_CACHE_SIZE)
 
 # Email overrides
 DEFAULT_FROM_EMAIL = ENV_TOKENS.get('DEFAULT_FROM_EMAIL', DEFAULT_FROM_EMAIL)
@@ -216,6 +224,8 @@ BULK_EMAIL_MAX_RETRIES = ENV_TOKENS.get('BULK_EMAIL_MAX_RETRIES', BULK_EMAIL_MAX
 BULK_EMAIL_INFINITE_RETRY_CAP = ENV_TOKENS.get('BULK_EMAIL_INFINITE_RETRY_CAP', BULK_EMAIL_INFINITE_RETRY_CAP)
 BULK_EMAIL_LOG_SENT_EMAILS = ENV_TOKENS.get('BULK_EMAIL_LOG_SENT_EMAILS', BULK_EMAIL_LOG_SENT_EMAILS)
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = ENV_TOKENS.get('BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS', BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+BULK_EMAIL_CONNECTIONS_PER_TASK = ENV_TOKENS.get('BULK_EMAIL_CONNECTIONS_PER_TASK', BULK_EMAIL_CONNECTIONS_PER_TASK)
+BULK_EMAIL_MAX_SENDS_PER_SECOND = ENV_TOKENS.get('BULK_EMAIL_MAX_SENDS_PER_SECOND', BULK_EMAIL_MAX_SENDS_PER_SECOND)
 # We want Bulk Email running on the high-priority queue, so we define the
 # routing key that points to it. At the moment, the name is the same.
 # We have to reset the value here, since we have changed the value of the queue name.
@@ -267,6 +277,12 @@ VIRTUAL_UNIVERSITIES = ENV_TOKENS.get('VIRTUAL_UNIVERSITIES', [])
 META_UNIVERSITIES = ENV_TOKENS.get('META_UNIVERSITIES', {})
 COMMENTS_SERVICE_URL = ENV_TOKENS.get("COMMENTS_SERVICE_URL", '')
 COMMENTS_SERVICE_KEY = ENV_TOKENS.get("COMMENTS_SERVICE_KEY", '')
+COMMENTS_SERVICE_CONNECTION_POOL_SIZE = ENV_TOKENS.get(
+    "COMMENTS_SERVICE_CONNECTION_POOL_SIZE", COMMENTS_SERVICE_CONNECTION_POOL_SIZE
+)
+COMMENTS_SERVICE_CONCURRENT_REQUESTS = ENV_TOKENS.get(
+    "COMMENTS_SERVICE_CONCURRENT_REQUESTS", COMMENTS_SERVICE_CONCURRENT_REQUESTS
+)
 CERT_QUEUE = ENV_TOKENS.get("CERT_QUEUE", 'test-pull')
 ZENDESK_URL = ENV_TOKENS.get("ZENDESK_URL")
 FEEDBACK_SUBMISSION_EMAIL = ENV_TOKENS.get("FEEDBACK_SUBMISSION_EMAIL")
@@ -452,6 +468,8 @@ DATADOG.update(ENV_TOKENS.get("DATADOG", {}))
 if 'DATADOG_API' in AUTH_TOKENS:
     DATADOG['api_key'] = AUTH_TOKENS['DATADOG_API']
 
+MIDDLEWARE_TIMING.update(ENV_TOKENS.get('MIDDLEWARE_TIMING', {}))
+
 # Analytics dashboard server
 ANALYTICS_SERVER_URL = ENV_TOKENS.get("ANALYTICS_SERVER_URL")
 ANALYTICS_API_KEY = AUTH_TOKENS.get("ANALYTICS_API_KEY", "")
@@ -510,6 +528,9 @@ VERIFY_STUDENT = AUTH_TOKENS.get("VERIFY_STUDENT", VERIFY_STUDENT)
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
+GRADES_DOWNLOAD_STUDENTS_PER_SHARD = ENV_TOKENS.get(
+    'GRADES_DOWNLOAD_STUDENTS_PER_SHARD', GRADES_DOWNLOAD_STUDENTS_PER_SHARD
+)
 
 # financial reports
 FINANCIAL_REPORTS = ENV_TOKENS.get("FINANCIAL_REPORTS", FINANCIAL_REPORTS)
@@ -605,6 +626,13 @@ COURSE_ABOUT_VISIBILITY_PERMISSION = ENV_TOKENS.get(
 # Enrollment API Cache Timeout
 ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT = ENV_TOKENS.get('ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT', 60)
 
+# Student dashboard and enrollment state Cache Timeouts
+DASHBOARD_DATA_CACHE_TIMEOUT = ENV_TOKENS.get('DASHBOARD_DATA_CACHE_TIMEOUT', DASHBOARD_DATA_CACHE_TIMEOUT)
+ENROLLMENT_STATE_CACHE_TIMEOUT = ENV_TOKENS.get('ENROLLMENT_STATE_CACHE_TIMEOUT', ENROLLMENT_STATE_CACHE_TIMEOUT)
+
+# Mobile video outline Cache Timeout
+MOBILE_VIDEO_OUTLINE_CACHE_TIMEOUT = ENV_TOKENS.get('MOBILE_VIDEO_OUTLINE_CACHE_TIMEOUT', MOBILE_VIDEO_OUTLINE_CACHE_TIMEOUT)
+
 # PDF RECEIPT/INVOICE OVERRIDES
 PDF_RECEIPT_TAX_ID = ENV_TOKENS.get('PDF_RECEIPT_TAX_ID', PDF_RECEIPT_TAX_ID)
 PDF_RECEIPT_FOOTER_TEXT = ENV_TOKENS.get('PDF_RECEIPT_FOOTER_TEXT', PDF_RECEIPT_FOOTER_TEXT)
@@ -419,6 +419,18 @@ FEATURES = {
     # Enable the max score cache to speed up grading
     'ENABLE_MAX_SCORE_CACHE': True,
 
+    # Persist per-subsection scores so that grading doesn't have to
+    # instantiate every problem on each request
+    'ENABLE_PERSISTENT_SUBSECTION_GRADES': False,
+
+    # Grade whole chunks of students with set-based queries in
+    # iterate_grades_for (grade reports, CCX grade downloads)
+    'ENABLE_BULK_GRADE_COMPUTATION': False,
+
+    # Build the courseware table of contents from the course structure that's
+    # generated on publish, rather than from the course's blocks
+    'ENABLE_COURSE_BLOCKS_TOC': False,
+
     # Enable LTI Provider feature.
     'ENABLE_LTI_PROVIDER': False,
 }
@@ -464,6 +476,12 @@ NODE_PATH = ':'.join(node_paths)
 # For geolocation ip database
 GEOIP_PATH = REPO_ROOT / "common/static/data/geoip/GeoIP.dat"
 GEOIPV6_PATH = REPO_ROOT / "common/static/data/geoip/GeoIPv6.dat"
+# Memory-map the ip databases instead of reading them for every lookup.
+GEOIP_MMAP = True
+# Each process keeps the countries of this many recently looked up addresses,
+# for GEOIP_COUNTRY_CACHE_TIMEOUT seconds.
+GEOIP_COUNTRY_CACHE_SIZE = 10000
+GEOIP_COUNTRY_CACHE_TIMEOUT = 60 * 60
 
 # Where to look for a status message
 STATUS_MESSAGE_PATH = ENV_ROOT / "status_message.json"
@@ -764,6 +782,32 @@ MODULESTORE = {
     }
 }
 
+# Number of compiled split modulestore course structures to keep in each
+# process, in front of the 'course_structure_cache'. Structures never change,
+# so this only bounds memory use. 0 disables the process-local cache.
+COURSE_STRUCTURE_LRU_SIZE = 16
+
+# Number of course block trees and discussion id maps (both built from the
+# course structures generated on publish) to keep in each process. 0 disables
+# the process-local caches.
+COURSE_BLOCKS_LRU_SIZE = 16
+
+# Connections to each comments service host kept open in each process, and the
+# number of requests a page may make to the comments service at once (1 makes
+# them one after the other).
+COMMENTS_SERVICE_CONNECTION_POOL_SIZE = 10
+COMMENTS_SERVICE_CONCURRENT_REQUESTS = 4
+
+# Local disk cache for the bodies of course assets too large for memcache,
+# shared by the processes on a machine. Set DIRECTORY to turn it on.
+CONTENTSERVER_DISK_CACHE = {
+    'DIRECTORY': None,
+    # Evict the least recently used assets past this many bytes in all.
+    'MAX_BYTES': 10 * 1024 * 1024 * 1024,
+    # Serve assets bigger than this straight from the contentstore.
+    'MAX_ASSET_BYTES': 1024 * 1024 * 1024,
+}
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -777,8 +821,26 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Keep sandboxed interpreters with the assumed imports loaded waiting for
+    # executions, instead of starting one for every execution.  'size' is how
+    # many idle workers to keep (0 turns the pool off).  Each worker runs a
+    # single execution.
+    'worker_pool': {
+        'size': 0,
+    },
 }
 
+# Results of sandboxed code are cached in each process, in front of the
+# default cache: at most SAFE_EXEC_CACHE_MAX_BYTES of them in all, and none
+# bigger than SAFE_EXEC_CACHE_MAX_ITEM_BYTES (memcache's item limit).
+SAFE_EXEC_CACHE_MAX_BYTES = 32 * 1024 * 1024
+SAFE_EXEC_CACHE_MAX_ITEM_BYTES = 1024 * 1024
+
+# Each process keeps the parsed XML trees of this many capa problems, so that
+# instantiating a problem again doesn't parse it again.
+CAPA_PROBLEM_TREE_CACHE_SIZE = 1000
+
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
 # of them must match the course id for that course to run unsafe code.
 #
@@ -1177,6 +1239,8 @@ MIDDLEWARE_CLASSES = (
     # 'django.middleware.locale.LocaleMiddleware',
     'django_locale.middleware.LocaleMiddleware',
 
+    # Must be before TransactionMiddleware, to act after the commit
+    'student.middleware.EnrollmentStateCacheMiddleware',
     'django.middleware.transaction.TransactionMiddleware',
     # 'debug_toolbar.middleware.DebugToolbarMiddleware',
 
@@ -1206,6 +1270,17 @@ MIDDLEWARE_CLASSES = (
 # Clickjacking protection can be enabled by setting this to 'DENY'
 X_FRAME_OPTIONS = 'ALLOW'
 
+# Time every middleware method and view, and report the times to datadog
+# (see monkey_patch/django_core_handlers_base.py).  A PROFILE_SAMPLE_RATE
+# fraction of requests is also profiled; the profiles of those that take at
+# least PROFILE_MIN_SECONDS are written to PROFILE_DIRECTORY.
+MIDDLEWARE_TIMING = {
+    'ENABLED': False,
+    'PROFILE_SAMPLE_RATE': 0,
+    'PROFILE_MIN_SECONDS': 1,
+    'PROFILE_DIRECTORY': None,
+}
+
 ############################### Pipeline #######################################
 
 STATICFILES_STORAGE = 'openedx.core.lib.django_require.staticstorage.OptimizedCachedRequireJsStorage'
@@ -1759,6 +1834,15 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Number of connections over which each bulk email task sends its emails at
+# once.
+BULK_EMAIL_CONNECTIONS_PER_TASK = 4
+
+# Maximum number of emails sent per second by each worker process, or None
+# for no limit.  Set it to the provider's maximum send rate (e.g. the SES
+# sending quota) divided by the number of worker processes sending email.
+BULK_EMAIL_MAX_SENDS_PER_SECOND = None
+
 ############################# Email Opt In ####################################
 
 # Minimum age for organization-wide email opt in
@@ -2147,6 +2231,10 @@ BADGR_ISSUER_SLUG = "example-issuer"
 ###################### Grade Downloads ######################
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
+# If set, grade and problem grade reports are split into subtasks that each
+# grade this many students, and whose partial CSVs are merged at the end.
+GRADES_DOWNLOAD_STUDENTS_PER_SHARD = None
+
 GRADES_DOWNLOAD = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': 'edx-grades',
@@ -2460,6 +2548,20 @@ COURSE_ABOUT_VISIBILITY_PERMISSION = 'see_exists'
 # Enrollment API Cache Timeout
 ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT = 60
 
+# How long the student dashboard caches a user's enrollments and certificate
+# statuses.  They are dropped from the cache as soon as one of them changes.
+DASHBOARD_DATA_CACHE_TIMEOUT = 60 * 60
+
+# How long the state (mode and activity) of a user's enrollment in a course is
+# cached.  Saving the enrollment drops it from the cache, again once the
+# transaction is over (see student.middleware.EnrollmentStateCacheMiddleware).
+ENROLLMENT_STATE_CACHE_TIMEOUT = 15 * 60
+
+# How long the mobile video outline of a course is cached, for all the users
+# with the same access to it.  Publishing the course changes the cache key, but
+# blocks whose start date passes appear only when the outline expires.
+MOBILE_VIDEO_OUTLINE_CACHE_TIMEOUT = 5 * 60
+
 # for Student Notes we would like to avoid too frequent token refreshes (default is 30 seconds)
 if FEATURES['ENABLE_EDXNOTES']:
     OAUTH_ID_TOKEN_EXPIRATION = 60 * 60
@@ -217,6 +217,28 @@ CACHES = {
     },
 }
 
+# Tests count the mongo queries made for course structures, so don't keep
+# structures around between requests.
+COURSE_STRUCTURE_LRU_SIZE = 0
+COURSE_BLOCKS_LRU_SIZE = 0
+
+# Likewise, don't keep sandboxed code results between tests.
+SAFE_EXEC_CACHE_MAX_BYTES = 0
+
+# Tests give the same addresses different countries.
+GEOIP_COUNTRY_CACHE_SIZE = 0
+
+# Tests check the order of the requests made to the comments service.
+COMMENTS_SERVICE_CONCURRENT_REQUESTS = 1
+
+# Likewise for the emails sent by bulk email tasks.
+BULK_EMAIL_CONNECTIONS_PER_TASK = 1
+
+# The cache isn't cleared between tests, which reuse user ids.
+DASHBOARD_DATA_CACHE_TIMEOUT = 0
+ENROLLMENT_STATE_CACHE_TIMEOUT = 0
+MOBILE_VIDEO_OUTLINE_CACHE_TIMEOUT = 0
+
 # Dummy secret key for dev
 SECRET_KEY = '85920908f28904ed733fe576320db18cabd7b6cd'
 
@@ -1,15 +1,50 @@
 from contextlib import contextmanager
+from cookielib import DefaultCookiePolicy
 import dogstats_wrapper as dog_stats_api
 import logging
+from multiprocessing.pool import ThreadPool
+import os
 import requests
+from requests.adapters import HTTPAdapter
+import threading
 from django.conf import settings
 from time import time
 from uuid import uuid4
+from django.utils import translation
 from django.utils.translation import get_language
+from eventtracking import tracker
 
 log = logging.getLogger(__name__)
 
 
+def _create_session():
+    """
+    Create the session which makes all the requests to the comments service.
+
+    The session is shared by all the threads of the process. It keeps up to
+    COMMENTS_SERVICE_CONNECTION_POOL_SIZE connections per host alive between
+    requests, and keeps no cookies, since its requests are made for all users.
+    """
+    pool_size = getattr(settings, 'COMMENTS_SERVICE_CONNECTION_POOL_SIZE', 10)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+SESSION = _create_session()
+
+# The name of the tracking context copied into the threads making concurrent requests.
+CONCURRENT_REQUEST_CONTEXT_NAME = 'comment_client.concurrent_request'
+
+# The threads making concurrent requests, created by the first process which needs them.
+_thread_pool = None
+_thread_pool_pid = None
+_thread_pool_lock = threading.Lock()
+
+
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
 
@@ -31,6 +66,55 @@ def merge_dict(dic1, dic2):
     return dict(dic1.items() + dic2.items())
 
 
+def _get_thread_pool(size):
+    """
+    Return the pool of `size` threads for concurrent requests of this process.
+
+    Threads don't survive a fork, so a process doesn't use its parent's pool.
+    """
+    global _thread_pool, _thread_pool_pid  # pylint: disable=global-statement
+    with _thread_pool_lock:
+        if _thread_pool is None or _thread_pool_pid != os.getpid():
+            _thread_pool = ThreadPool(size)
+            _thread_pool_pid = os.getpid()
+        return _thread_pool
+
+
+def perform_concurrently(*functions):
+    """
+    Call each of `functions`, with no arguments, and return their results in
+    order, making their requests to the comments service at the same time.
+
+    Up to COMMENTS_SERVICE_CONCURRENT_REQUESTS functions are called at once,
+    each in a thread of their own, so they should do nothing but make
+    requests. If that setting is 1, they are called one after the other. If
+    any of them fails, the first one's exception is raised.
+
+    The functions run in the language and the tracking context of the
+    current thread, so that the events they emit are about its request.
+    """
+    concurrency = getattr(settings, 'COMMENTS_SERVICE_CONCURRENT_REQUESTS', 1)
+    if concurrency <= 1 or len(functions) <= 1:
+        return [function() for function in functions]
+
+    # Requests are made in the language of the current thread's request.
+    language = get_language()
+    tracking_context = tracker.get_tracker().resolve_context()
+
+    def call(function):
+        """
+        Call function in the current language and tracking context.
+        """
+        with translation.override(language):
+            with tracker.get_tracker().context(CONCURRENT_REQUEST_CONTEXT_NAME, tracking_context):
+                return function()
+
+    tags = [u'count:{}'.format(len(functions))]
+    with dog_stats_api.timer('comment_client.concurrent_requests.time', tags=tags):
+        pending = [_get_thread_pool(concurrency).apply_async(call, (function,)) for function in functions]
+        return [result.get() for result in pending]
+
+
 @contextmanager
 def request_timer(request_id, method, url, tags=None):
     start = time()
@@ -76,7 +160,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = SESSION.request(
             method,
             url,
             data=data,
@@ -23,13 +23,16 @@ SCHEME_SUPPORTS_ASSIGNMENT = [RandomUserPartitionScheme, ]
 class LmsSearchFilterGenerator(SearchFilterGenerator):
     """ SearchFilterGenerator for LMS Search """
 
-    _user_enrollments = {}
+    def __init__(self, *args, **kwargs):
+        super(LmsSearchFilterGenerator, self).__init__(*args, **kwargs)
+        # Enrollments are kept for as long as the generator is used, not across searches.
+        self._user_enrollments = {}
 
     def _enrollments_for_user(self, user):
         """ Return the specified user's course enrollments """
-        if user not in self._user_enrollments:
-            self._user_enrollments[user] = CourseEnrollment.enrollments_for_user(user)
-        return self._user_enrollments[user]
+        if user.id not in self._user_enrollments:
+            self._user_enrollments[user.id] = list(CourseEnrollment.enrollments_for_user(user))
+        return self._user_enrollments[user.id]
 
     def filter_dictionary(self, **kwargs):
         """ LMS implementation, adds filtering by user partition, course id and user """
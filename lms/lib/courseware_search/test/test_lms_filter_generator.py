@@ -80,6 +80,17 @@ class LmsSearchFilterGeneratorTestCase(ModuleStoreTestCase):
         self.assertIn(unicode(self.courses[0].id), field_dictionary['course'])
         self.assertIn(unicode(self.courses[1].id), field_dictionary['course'])
 
+    def test_enrollment_changes_seen_by_later_searches(self):
+        """
+        Tests that the user's enrollments aren't kept from one search to the next
+        """
+        LmsSearchFilterGenerator.generate_field_filters(user=self.user)
+        CourseEnrollment.unenroll(self.user, self.courses[0].id)
+        field_dictionary, _, _ = LmsSearchFilterGenerator.generate_field_filters(user=self.user)
+
+        self.assertNotIn(unicode(self.courses[0].id), field_dictionary['course'])
+        self.assertIn(unicode(self.courses[1].id), field_dictionary['course'])
+
     def test_course_id_provided(self):
         """
         Tests that we get the course ID when the course ID is provided
@@ -12,7 +12,7 @@ settings.INSTALLED_APPS  # pylint: disable=pointless-statement
 from openedx.core.lib.django_startup import autostartup
 import edxmako
 import logging
-from monkey_patch import django_utils_translation
+from monkey_patch import django_core_handlers_base, django_utils_translation
 import analytics
 
 
@@ -25,6 +25,9 @@ def run():
     """
     django_utils_translation.patch()
 
+    if settings.MIDDLEWARE_TIMING.get('ENABLED'):
+        django_core_handlers_base.patch()
+
     autostartup()
 
     add_mimetypes()
@@ -38,6 +41,12 @@ def run():
     if settings.FEATURES.get('ENABLE_THIRD_PARTY_AUTH', False):
         enable_third_party_auth()
 
+    if settings.CODE_JAIL.get('worker_pool', {}).get('size'):
+        enable_codejail_worker_pool()
+
+    if getattr(settings, 'CAPA_PROBLEM_TREE_CACHE_SIZE', 0):
+        enable_capa_problem_tree_cache()
+
     # Initialize Segment.io analytics module. Flushes first time a message is received and
     # every 50 messages thereafter, or if 10 seconds have passed since last flush
     if settings.FEATURES.get('SEGMENT_IO_LMS') and hasattr(settings, 'SEGMENT_IO_LMS_KEY'):
@@ -58,6 +67,24 @@ def add_mimetypes():
     mimetypes.add_type('application/font-woff', '.woff')
 
 
+def enable_codejail_worker_pool():
+    """
+    Run capa's sandboxed code in a pool of warm codejail workers.
+    """
+    from capa.safe_exec import configure_worker_pool
+
+    configure_worker_pool(settings.CODE_JAIL['worker_pool']['size'])
+
+
+def enable_capa_problem_tree_cache():
+    """
+    Keep the parsed trees of recently instantiated capa problems.
+    """
+    from capa.capa_problem import configure_problem_tree_cache
+
+    configure_problem_tree_cache(settings.CAPA_PROBLEM_TREE_CACHE_SIZE)
+
+
 def enable_theme():
     """
     Enable the settings for a custom theme, whose files should be stored
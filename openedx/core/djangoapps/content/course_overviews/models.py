@@ -216,6 +216,38 @@ class CourseOverview(TimeStampedModel):
             course_overview = None
         return course_overview or cls._load_from_module_store(course_id)
 
+    @classmethod
+    def get_from_ids(cls, course_ids):
+        """
+        Load the CourseOverview objects of several courses, with a single
+        query for those that are already in the database.
+
+        Arguments:
+            course_ids (iterable[CourseKey]): the IDs of the course overviews to be loaded.
+
+        Returns:
+            dict: maps each course ID to its CourseOverview, or to None if the
+                course was not found or couldn't be loaded from the module store.
+        """
+        course_ids = set(course_ids)
+        overviews = {}
+        stale_ids = []
+        for course_overview in cls.objects.filter(id__in=course_ids):
+            if course_overview.version == cls.VERSION:
+                overviews[course_overview.id] = course_overview
+            else:
+                stale_ids.append(course_overview.id)
+        if stale_ids:
+            # Throw away old versions of CourseOverview, as they might contain stale data.
+            cls.objects.filter(id__in=stale_ids).delete()
+
+        for course_id in course_ids - set(overviews):
+            try:
+                overviews[course_id] = cls._load_from_module_store(course_id)
+            except (cls.DoesNotExist, IOError):
+                overviews[course_id] = None
+        return overviews
+
     def clean_id(self, padding_char='='):
         """
         Returns a unique deterministic base32-encoded ID for the course.
@@ -0,0 +1,191 @@
+"""
+A course's published block tree, read from its stored course structure.
+
+Course navigation (the table of contents, a block's chain of parents, its
+position among its siblings) used to walk the modulestore's blocks on every
+request.  CourseBlocks answers those questions with dict lookups on the
+course structure that is generated when the course is published, and is kept
+in each process for as long as that structure is unchanged.
+"""
+from django.conf import settings
+from opaque_keys.edx.keys import UsageKey
+
+from xmodule.course_metadata_utils import display_name_with_default
+from xmodule.fields import Date
+from xmodule.modulestore.split_mongo.mongo_connection import StructureLRU
+
+from .models import CourseStructure
+
+
+COURSE_BLOCKS_LRU = StructureLRU()
+
+
+class CourseBlock(object):
+    """
+    The settings of one block of a course structure that navigation and
+    access checks need.  Start and due dates are datetimes, and group_access
+    is the block's group access merged with its ancestors', keyed by
+    partition id (see LmsBlockMixin.merged_group_access).  Discussion
+    modules also have their discussion category and target.
+    """
+    __slots__ = (
+        'usage_key', 'block_type', 'display_name', 'graded', 'format', 'start', 'due',
+        'days_early_for_beta', 'visible_to_staff_only', 'hide_from_toc', 'group_access',
+        'discussion_category', 'discussion_target',
+    )
+
+    def __init__(self, usage_key, block):
+        self.usage_key = usage_key
+        self.block_type = block['block_type']
+        self.display_name = block['display_name']
+        self.graded = block.get('graded', False)
+        self.format = block.get('format')
+        self.start = Date().from_json(block.get('start'))
+        self.due = Date().from_json(block.get('due'))
+        self.days_early_for_beta = block.get('days_early_for_beta')
+        self.visible_to_staff_only = block.get('visible_to_staff_only', False)
+        self.hide_from_toc = block.get('hide_from_toc', False)
+        self.group_access = {
+            int(partition_id): group_ids
+            for partition_id, group_ids in block.get('group_access', {}).iteritems()
+        }
+        # Only set for discussion modules.
+        self.discussion_category = block.get('discussion_category')
+        self.discussion_target = block.get('discussion_target')
+
+    @property
+    def location(self):
+        """
+        The block's usage key, under the name the access checks use.
+        """
+        return self.usage_key
+
+    @property
+    def url_name(self):
+        """
+        The block's url_name, as used in courseware URLs.
+        """
+        return self.usage_key.block_id
+
+    @property
+    def display_name_with_default(self):
+        """
+        The block's display name, falling back to its url_name, as the block itself would give it.
+        """
+        return display_name_with_default(self)
+
+
+class CourseBlocks(object):
+    """
+    The block tree of a course, from its stored course structure.
+
+    Blocks are looked up by usage key.  A block that is the child of several
+    others (which the structure allows, though courseware doesn't make use of
+    it) is given its first parent.
+    """
+    def __init__(self, course_key, structure):
+        self.course_key = course_key
+        self.root = self._usage_key(structure['root'])
+        self.blocks = {}
+        self.children = {}
+        self.parents = {}
+        self.positions = {}
+        for key_string, block in structure['blocks'].iteritems():
+            usage_key = self._usage_key(key_string)
+            self.blocks[usage_key] = CourseBlock(usage_key, block)
+            children = [self._usage_key(child) for child in block.get('children', [])]
+            self.children[usage_key] = children
+            for position, child in enumerate(children, 1):
+                self.parents.setdefault(child, usage_key)
+                self.positions.setdefault(child, position)
+
+    def _usage_key(self, key_string):
+        """
+        Parse a usage key of the structure.  Old-style keys don't include the
+        course run, so it's added back in.
+        """
+        return UsageKey.from_string(key_string).map_into_course(self.course_key)
+
+    def __contains__(self, usage_key):
+        return usage_key in self.blocks
+
+    def __getitem__(self, usage_key):
+        return self.blocks[usage_key]
+
+    def get_children(self, usage_key):
+        """
+        Return the usage keys of the block's children, in order.
+        """
+        return self.children.get(usage_key, [])
+
+    def get_parent(self, usage_key):
+        """
+        Return the usage key of the block's parent, or None for the root.
+        """
+        return self.parents.get(usage_key)
+
+    def get_path(self, usage_key):
+        """
+        Return the usage keys from the root of the course down to the block, inclusive.
+        """
+        path = [usage_key]
+        while path[-1] in self.parents:
+            path.append(self.parents[path[-1]])
+        path.reverse()
+        return path
+
+    def get_position(self, usage_key):
+        """
+        Return the 1-based position of the block among its parent's children, or None for the root.
+        """
+        return self.positions.get(usage_key)
+
+    def filter(self, is_visible):
+        """
+        Return the usage keys of the blocks for which `is_visible(block)` is
+        true, and is true for all of their ancestors as well.
+        """
+        visible = set()
+        stack = [self.root] if self.root in self.blocks else []
+        while stack:
+            usage_key = stack.pop()
+            if usage_key in visible or not is_visible(self.blocks[usage_key]):
+                continue
+            visible.add(usage_key)
+            stack.extend(child for child in self.children[usage_key] if child in self.blocks)
+        return visible
+
+
+def get_course_blocks(course_key):
+    """
+    Return the CourseBlocks of the published course, or None if its structure
+    hasn't been generated yet, or was generated before structures included
+    the blocks' settings (run the generate_course_structure command to
+    regenerate those).
+
+    Each process keeps the trees of the last `settings.COURSE_BLOCKS_LRU_SIZE`
+    course structures it used; checking that a tree is still current costs a
+    single query.
+    """
+    modified = CourseStructure.objects.filter(course_id=course_key).values_list('modified', flat=True)
+    if not modified:
+        return None
+    lru_key = (unicode(course_key), modified[0])
+
+    lru_size = getattr(settings, 'COURSE_BLOCKS_LRU_SIZE', 0)
+    if lru_size:
+        course_blocks = COURSE_BLOCKS_LRU.get(lru_key)
+        if course_blocks is not None:
+            return course_blocks
+
+    try:
+        structure = CourseStructure.objects.get(course_id=course_key).structure
+    except CourseStructure.DoesNotExist:
+        return None
+    if structure is None or 'start' not in structure['blocks'].get(structure['root'], {}):
+        return None
+
+    course_blocks = CourseBlocks(course_key, structure)
+    if lru_size:
+        COURSE_BLOCKS_LRU.set(lru_key, course_blocks, lru_size)
+    return course_blocks
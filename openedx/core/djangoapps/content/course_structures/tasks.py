@@ -3,6 +3,7 @@ import logging
 
 from celery.task import task
 from opaque_keys.edx.keys import CourseKey
+from xmodule.fields import Date
 from xmodule.modulestore.django import modulestore
 
 
@@ -34,6 +35,11 @@ def _generate_course_structure(course_key):
                     curr_block.discussion_id):
                 discussions[curr_block.discussion_id] = unicode(curr_block.scope_ids.usage_id)
 
+            if curr_block.category == 'discussion':
+                # What the forums show of the module, so they don't have to load it.
+                block['discussion_category'] = getattr(curr_block, 'discussion_category', None)
+                block['discussion_target'] = getattr(curr_block, 'discussion_target', None)
+
             # Retrieve these attributes separately so that we can fail gracefully
             # if the block doesn't have the attribute.
             attrs = (('graded', False), ('format', None))
@@ -44,6 +50,19 @@ def _generate_course_structure(course_key):
                     log.warning('Failed to retrieve %s attribute of block %s. Defaulting to %s.', attr, key, default)
                     block[attr] = default
 
+            # Inherited settings that navigation and access checks need, so that
+            # they can be answered from the structure without loading the blocks.
+            block['start'] = Date().to_json(getattr(curr_block, 'start', None))
+            block['due'] = Date().to_json(getattr(curr_block, 'due', None))
+            block['days_early_for_beta'] = getattr(curr_block, 'days_early_for_beta', None)
+            block['visible_to_staff_only'] = getattr(curr_block, 'visible_to_staff_only', False)
+            block['hide_from_toc'] = getattr(curr_block, 'hide_from_toc', False)
+            # JSON object keys are strings, so store the partition ids as strings up front.
+            block['group_access'] = {
+                unicode(partition_id): group_ids
+                for partition_id, group_ids in getattr(curr_block, 'merged_group_access', {}).items()
+            }
+
             blocks_dict[key] = block
 
             # Add this blocks children to the stack so that we can traverse them as well.
@@ -1,9 +1,11 @@
 import json
 
 from xmodule_django.models import UsageKey
+from xmodule.fields import Date
 from xmodule.modulestore.django import SignalHandler
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+from openedx.core.djangoapps.content.course_structures.course_blocks import get_course_blocks
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from openedx.core.djangoapps.content.course_structures.signals import listen_for_course_publish
 from openedx.core.djangoapps.content.course_structures.tasks import _generate_course_structure, update_course_structure
@@ -48,8 +50,19 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
                 "display_name": block.display_name,
                 "graded": block.graded,
                 "format": block.format,
-                "children": [unicode(child.location) for child in children]
+                "children": [unicode(child.location) for child in children],
+                "start": Date().to_json(block.start),
+                "due": Date().to_json(block.due),
+                "days_early_for_beta": block.days_early_for_beta,
+                "visible_to_staff_only": block.visible_to_staff_only,
+                "hide_from_toc": block.hide_from_toc,
+                "group_access": {},
             }
+            if block.category == 'discussion':
+                blocks[unicode(block.location)].update({
+                    "discussion_category": block.discussion_category,
+                    "discussion_target": block.discussion_target,
+                })
 
             for child in children:
                 add_block(child)
@@ -156,7 +169,13 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
             "display_name": display_name,
             "graded": False,
             "format": None,
-            "children": []
+            "children": [],
+            "start": Date().to_json(module.start),
+            "due": None,
+            "days_early_for_beta": None,
+            "visible_to_staff_only": False,
+            "hide_from_toc": False,
+            "group_access": {},
         }
         self.assertEqual(actual, expected)
 
@@ -226,3 +245,68 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
             [unicode(value) for value in structure.discussion_id_map.values()],
             expected_structure['discussion_id_map'].values()
         )
+
+
+class CourseBlocksTests(SignalDisconnectTestMixin, ModuleStoreTestCase):
+    """
+    Tests for the course block trees built from course structures.
+    """
+    def setUp(self):
+        super(CourseBlocksTests, self).setUp()
+        self.course = CourseFactory.create(org='TestX', course='TS102', run='T1')
+        self.chapter = ItemFactory.create(parent=self.course, category='chapter', display_name='Chapter')
+        self.sequential_1 = ItemFactory.create(parent=self.chapter, category='sequential')
+        self.sequential_2 = ItemFactory.create(
+            parent=self.chapter, category='sequential', display_name='Hidden', visible_to_staff_only=True
+        )
+        self.vertical = ItemFactory.create(parent=self.sequential_2, category='vertical')
+        update_course_structure(unicode(self.course.id))
+
+    def test_tree(self):
+        course_blocks = get_course_blocks(self.course.id)
+
+        self.assertEqual(course_blocks.root, self.course.location)
+        self.assertEqual(course_blocks.get_children(self.chapter.location), [
+            self.sequential_1.location, self.sequential_2.location
+        ])
+        self.assertEqual(course_blocks.get_parent(self.vertical.location), self.sequential_2.location)
+        self.assertIsNone(course_blocks.get_parent(self.course.location))
+        self.assertEqual(course_blocks.get_path(self.vertical.location), [
+            self.course.location, self.chapter.location, self.sequential_2.location, self.vertical.location
+        ])
+        self.assertEqual(course_blocks.get_position(self.sequential_2.location), 2)
+
+        block = course_blocks[self.sequential_2.location]
+        self.assertEqual(block.display_name_with_default, 'Hidden')
+        self.assertEqual(block.url_name, self.sequential_2.location.block_id)
+        self.assertEqual(block.start, self.sequential_2.start)
+        # Inherited settings come from the parent.
+        self.assertTrue(course_blocks[self.vertical.location].visible_to_staff_only)
+
+    def test_filter(self):
+        course_blocks = get_course_blocks(self.course.id)
+
+        visible = course_blocks.filter(lambda block: block.usage_key != self.sequential_2.location)
+
+        self.assertEqual(visible, {self.course.location, self.chapter.location, self.sequential_1.location})
+
+    def test_not_generated(self):
+        CourseStructure.objects.all().delete()
+        self.assertIsNone(get_course_blocks(self.course.id))
+
+    def test_generated_without_settings(self):
+        # Structures generated before the blocks' settings were included can't be used.
+        structure = CourseStructure.objects.get(course_id=self.course.id)
+        structure.structure_json = json.dumps({
+            'root': unicode(self.course.location),
+            'blocks': {
+                unicode(self.course.location): {
+                    'usage_key': unicode(self.course.location),
+                    'block_type': 'course',
+                    'display_name': 'Course',
+                    'children': [],
+                },
+            },
+        })
+        structure.save()
+        self.assertIsNone(get_course_blocks(self.course.id))